@@ -0,0 +1,60 @@
+def agreguj_elementy(elementy):
+    """
+    Zwija listę elementów do postaci (rozmiar, ilość).
+
+    Identyczne elementy (ta sama długość w 1D albo ta sama krotka
+    (szerokość, wysokość) w 2D) tworzą jeden typ. Dla każdego typu
+    zapamiętywane są indeksy elementów z oryginalnej listy, żeby
+    rozwiązanie dało się z powrotem rozpisać na konkretne elementy.
+
+    Zwraca listę słowników {"rozmiar": ..., "ilosc": ..., "indeksy": [...]}
+    w kolejności pierwszego wystąpienia.
+    """
+    grupy = {}
+    for i, element in enumerate(elementy):
+        grupy.setdefault(element, []).append(i)
+    return [
+        {"rozmiar": rozmiar, "ilosc": len(indeksy), "indeksy": indeksy}
+        for rozmiar, indeksy in grupy.items()
+    ]
+
+
+def dodaj_liczniki_typow(model, typy_elementow, wskazniki_przypisania, liczba_opcji, prefiks='liczba'):
+    """
+    Dodaje całkowite zmienne licznikowe: ile sztuk danego typu trafia na daną opcję
+    (listwę lub arkusz). Licznik jest sumą wskaźników przypisania kopii tego typu
+    (pary pominięte w wskazniki_przypisania są niewykonalne i liczą się jako 0).
+
+    Zwraca słownik {(indeks_typu, indeks_opcji): IntVar}.
+    """
+    liczniki = {}
+    for k, typ in enumerate(typy_elementow):
+        for s in range(liczba_opcji):
+            licznik = model.NewIntVar(0, typ["ilosc"], f'{prefiks}_{k}_{s}')
+            model.Add(licznik == sum(wskazniki_przypisania.get((i, s), 0) for i in typ["indeksy"]))
+            liczniki[(k, s)] = licznik
+    return liczniki
+
+
+def dodaj_porzadek_kopii(model, typy_elementow, przypisanie_elementu, polozenie=None, zakres_polozenia=0):
+    """
+    Łamie symetrię między kopiami tego samego typu elementu.
+
+    Identyczne elementy są wymienne, więc bez straty optymalności można
+    wymagać, aby kolejne kopie były uporządkowane leksykograficznie po
+    (indeks opcji, położenie). Usuwa to silnię równoważnych rozwiązań.
+
+    Parametry:
+      - przypisanie_elementu: lista wyrażeń z indeksem opcji dla każdego elementu
+                              (np. z przypisanie.indeksy_opcji)
+      - polozenie: opcjonalna lista zmiennych położenia (np. x), używana przy remisie
+      - zakres_polozenia: maksymalna wartość położenia (potrzebna do ważenia klucza)
+    """
+    for typ in typy_elementow:
+        for a, b in zip(typ["indeksy"], typ["indeksy"][1:]):
+            if polozenie is None:
+                model.Add(przypisanie_elementu[a] <= przypisanie_elementu[b])
+            else:
+                waga = zakres_polozenia + 1
+                model.Add(przypisanie_elementu[a] * waga + polozenie[a]
+                          <= przypisanie_elementu[b] * waga + polozenie[b])
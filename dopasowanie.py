@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def macierz_dopasowania(elementy, opcje_arkuszy, grubosc_krawedzi):
+    """
+    Macierz wykonalności trójek (element, arkusz, obrót) wyznaczana wektorowo.
+
+    Element z grubością cięcia mieści się w arkuszu bez obrotu, gdy
+    szer + rzaz <= szerokość i wys + rzaz <= wysokość arkusza; po obrocie
+    wymiary elementu są zamienione.
+
+    Zwraca tablicę bool o kształcie (liczba_elementow, liczba_opcji, 2), gdzie
+    [i, s, 0] to dopasowanie bez obrotu, a [i, s, 1] po obrocie.
+    """
+    wymiary = np.asarray(elementy, dtype=np.int64).reshape(-1, 2) + grubosc_krawedzi
+    arkusze = np.asarray([(arkusz["width"], arkusz["height"]) for arkusz in opcje_arkuszy],
+                         dtype=np.int64).reshape(-1, 2)
+    szerokosc, wysokosc = wymiary[:, 0, None], wymiary[:, 1, None]
+    bez_obrotu = (szerokosc <= arkusze[:, 0]) & (wysokosc <= arkusze[:, 1])
+    po_obrocie = (wysokosc <= arkusze[:, 0]) & (szerokosc <= arkusze[:, 1])
+    return np.stack([bez_obrotu, po_obrocie], axis=2)
+
+
+def dodaj_wymuszone_obroty(model, dopasowanie, elementy, wskazniki_przypisania, obrocony):
+    """
+    Ustala obroty wynikające z macierzy dopasowania.
+
+      - element kwadratowy nigdy nie jest obracany (obrót niczego nie zmienia),
+      - element mieszczący się tylko w jednej orientacji na wszystkich arkuszach
+        ma tę orientację ustaloną na stałe,
+      - jeśli na danym arkuszu mieści się tylko jedna orientacja, przypisanie
+        do arkusza pociąga za sobą tę orientację.
+
+    Parametry:
+      - dopasowanie: wynik macierz_dopasowania
+      - wskazniki_przypisania: słownik {(indeks_elementu, indeks_arkusza): BoolVar}
+                               (tylko wykonalne pary)
+      - obrocony: lista BoolVar obrotu elementów
+    """
+    mozliwe_orientacje = dopasowanie.any(axis=1)
+    for i, (szer, wys) in enumerate(elementy):
+        if szer == wys or not mozliwe_orientacje[i, 1]:
+            model.Add(obrocony[i] == 0)
+        elif not mozliwe_orientacje[i, 0]:
+            model.Add(obrocony[i] == 1)
+        else:
+            for s in np.flatnonzero(dopasowanie[i, :, 0] != dopasowanie[i, :, 1]):
+                wskaznik = wskazniki_przypisania[(i, int(s))]
+                model.AddImplication(wskaznik, obrocony[i] if dopasowanie[i, s, 1] else obrocony[i].Not())
+
+
+def arkusz_miesci(arkusz, inny):
+    """
+    Czy arkusz mieści cały arkusz inny (wprost albo po obrocie o 90°).
+
+    Elementy wolno obracać, więc każdy układ z arkusza inny da się wtedy
+    przenieść na arkusz bez zmian (albo po obróceniu całego układu).
+    """
+    return ((arkusz["width"] >= inny["width"] and arkusz["height"] >= inny["height"])
+            or (arkusz["width"] >= inny["height"] and arkusz["height"] >= inny["width"]))
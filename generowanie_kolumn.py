@@ -0,0 +1,210 @@
+from ortools.linear_solver import pywraplp
+from ortools.sat.python import cp_model
+import numpy as np
+
+from agregacja_popytu import agreguj_elementy
+from ograniczenia_dolne import ZatrzymaniePrzyOgraniczeniu, dolne_ograniczenie_kosztu
+
+
+def plecak_ograniczony(wartosci, wagi, limity, pojemnosc):
+    """
+    Rozwiązuje ograniczony problem plecakowy (programowanie dynamiczne po pojemności).
+
+    Krotności elementów są rozbijane binarnie (1, 2, 4, ...), dzięki czemu
+    każda kopia jest traktowana jak zwykły element plecaka 0/1.
+    Zwraca krotkę (najlepsza_wartosc, lista krotności dla każdego elementu).
+    """
+    kopie = []
+    for i, (wartosc, waga, limit) in enumerate(zip(wartosci, wagi, limity)):
+        if wartosc <= 0 or waga > pojemnosc:
+            continue
+        limit = min(limit, pojemnosc // waga)
+        krok = 1
+        while limit > 0:
+            krotnosc = min(krok, limit)
+            kopie.append((i, krotnosc))
+            limit -= krotnosc
+            krok *= 2
+
+    najlepsze = np.zeros(pojemnosc + 1)
+    wybory = np.zeros((len(kopie), pojemnosc + 1), dtype=bool)
+    for n, (i, krotnosc) in enumerate(kopie):
+        waga = wagi[i] * krotnosc
+        kandydat = najlepsze[:-waga] + wartosci[i] * krotnosc
+        lepsze = kandydat > najlepsze[waga:] + 1e-12
+        wybory[n, waga:] = lepsze
+        najlepsze[waga:] = np.where(lepsze, kandydat, najlepsze[waga:])
+
+    wzorzec = [0] * len(wartosci)
+    c = pojemnosc
+    for n in range(len(kopie) - 1, -1, -1):
+        i, krotnosc = kopie[n]
+        if wybory[n, c]:
+            wzorzec[i] += krotnosc
+            c -= wagi[i] * krotnosc
+    return najlepsze[pojemnosc], wzorzec
+
+
+def rozwiaz_generowaniem_kolumn(oryginalne_listew, elementy, grubosc_krawedzi,
+                                maks_iteracji=200, limit_czasu=10.0):
+    """
+    Rozwiązuje jednowymiarowe cięcie listew metodą generowania kolumn (Gilmore–Gomory).
+
+    Zamiast zmiennych dla każdej pary (element, instancja listwy) model operuje
+    na wzorcach cięcia: wektorach mówiących, ile kawałków danej długości
+    wycinamy z jednej listwy danego typu. Relaksacja LP (GLOP) jest rozszerzana
+    o nowe wzorce wyznaczane z problemu plecakowego na cenach dualnych,
+    a na końcu CP-SAT wybiera całkowitą liczbę użyć każdego wzorca.
+
+    Parametry:
+      - oryginalne_listew: lista słowników z danymi listew (długość, cena, id, number_of_items)
+      - elementy: lista długości elementów do wycięcia (w mm)
+      - grubosc_krawedzi: grubość cięcia (mm)
+      - maks_iteracji: maksymalna liczba iteracji generowania kolumn
+      - limit_czasu: limit czasu (s) dla końcowego, całkowitoliczbowego problemu głównego
+
+    Zwraca krotkę (uklad, koszt), gdzie uklad to lista słowników
+    {"listwa": instancja listwy, "elementy": [(indeks_elementu, pozycja), ...]},
+    albo None, jeśli rozwiązanie nie istnieje.
+    """
+    wspolczynnik_skalujacy = 100
+
+    # Agregacja popytu: różne długości i liczba sztuk każdej z nich
+    typy_elementow = sorted(agreguj_elementy(elementy), key=lambda t: t["rozmiar"], reverse=True)
+    rozmiary = [t["rozmiar"] for t in typy_elementow]
+    popyt = [t["ilosc"] for t in typy_elementow]
+    wagi = [d + grubosc_krawedzi for d in rozmiary]
+
+    typy = []
+    for listwa in oryginalne_listew:
+        typy.append({
+            "listwa": listwa,
+            "pojemnosc": listwa["length"] + grubosc_krawedzi,
+            "price_int": int(round(listwa["price"] * wspolczynnik_skalujacy)),
+            "dostepne": listwa.get("number_of_items", 1),
+        })
+
+    # Każdy kawałek musi zmieścić się (razem z rzazem) w co najmniej jednym typie listwy
+    for d in rozmiary:
+        if not any(d + grubosc_krawedzi <= t["listwa"]["length"] for t in typy):
+            return None
+
+    def pasuje(k, t):
+        return rozmiary[k] + grubosc_krawedzi <= typy[t]["listwa"]["length"]
+
+    # Wzorce startowe: jednorodne cięcie każdej długości z każdego typu
+    wzorce = []  # lista krotek (typ, wektor krotności)
+    for t, typ in enumerate(typy):
+        for k in range(len(rozmiary)):
+            if pasuje(k, t):
+                wektor = [0] * len(rozmiary)
+                wektor[k] = min(popyt[k], typ["pojemnosc"] // wagi[k])
+                wzorce.append((t, wektor))
+
+    # ==========================
+    # Problem główny (relaksacja LP)
+    # ==========================
+    lp = pywraplp.Solver.CreateSolver("GLOP")
+    ograniczenia_popytu = [lp.Constraint(popyt[k], lp.infinity()) for k in range(len(rozmiary))]
+    ograniczenia_dostepnosci = [lp.Constraint(0, typ["dostepne"]) for typ in typy]
+    cel = lp.Objective()
+    cel.SetMinimization()
+
+    # Zmienne sztuczne – gwarantują dopuszczalność przy ograniczonej dostępności listew
+    kara = sum(t["price_int"] for t in typy) * (len(elementy) + 1)
+    sztuczne = []
+    for k, ograniczenie in enumerate(ograniczenia_popytu):
+        sztuczna = lp.NumVar(0, lp.infinity(), f'sztuczna_{k}')
+        ograniczenie.SetCoefficient(sztuczna, 1)
+        cel.SetCoefficient(sztuczna, kara)
+        sztuczne.append(sztuczna)
+
+    def dodaj_kolumne(t, wektor):
+        zmienna = lp.NumVar(0, lp.infinity(), f'wzorzec_{lp.NumVariables()}')
+        for k, krotnosc in enumerate(wektor):
+            if krotnosc:
+                ograniczenia_popytu[k].SetCoefficient(zmienna, krotnosc)
+        ograniczenia_dostepnosci[t].SetCoefficient(zmienna, 1)
+        cel.SetCoefficient(zmienna, typy[t]["price_int"])
+
+    for t, wektor in wzorce:
+        dodaj_kolumne(t, wektor)
+
+    zbiezne = False
+    for _ in range(maks_iteracji):
+        if lp.Solve() != pywraplp.Solver.OPTIMAL:
+            return None
+
+        ceny_dualne = [o.dual_value() for o in ograniczenia_popytu]
+        dualne_dostepnosci = [o.dual_value() for o in ograniczenia_dostepnosci]
+
+        # Problem wyceny: dla każdego typu listwy szukamy wzorca o ujemnym koszcie zredukowanym
+        nowe_wzorce = []
+        for t, typ in enumerate(typy):
+            limity = [popyt[k] if pasuje(k, t) else 0 for k in range(len(rozmiary))]
+            wartosc, wektor = plecak_ograniczony(ceny_dualne, wagi, limity, typ["pojemnosc"])
+            koszt_zredukowany = typ["price_int"] - wartosc - dualne_dostepnosci[t]
+            if koszt_zredukowany < -1e-6 and (t, wektor) not in wzorce:
+                nowe_wzorce.append((t, wektor))
+
+        if not nowe_wzorce:
+            zbiezne = True
+            break
+        for t, wektor in nowe_wzorce:
+            wzorce.append((t, wektor))
+            dodaj_kolumne(t, wektor)
+
+    # Dolne ograniczenie: ograniczenia kombinatoryczne oraz – po zbieżności, gdy zmienne
+    # sztuczne są zerowe – zaokrąglona w górę wartość relaksacji LP
+    ograniczenie = dolne_ograniczenie_kosztu(oryginalne_listew, elementy, grubosc_krawedzi)
+    if zbiezne and all(z.solution_value() < 1e-6 for z in sztuczne):
+        ograniczenie = max(ograniczenie, int(np.ceil(cel.Value() - 1e-6)))
+
+    # ==========================
+    # Całkowitoliczbowy problem główny (CP-SAT na wygenerowanych wzorcach)
+    # ==========================
+    model = cp_model.CpModel()
+    uzycia = [
+        model.NewIntVar(0, typy[t]["dostepne"], f'uzycie_wzorca_{p}')
+        for p, (t, _) in enumerate(wzorce)
+    ]
+    for k in range(len(rozmiary)):
+        model.Add(sum(wektor[k] * uzycia[p] for p, (_, wektor) in enumerate(wzorce) if wektor[k]) >= popyt[k])
+    for t, typ in enumerate(typy):
+        model.Add(sum(uzycia[p] for p, (t_p, _) in enumerate(wzorce) if t_p == t) <= typ["dostepne"])
+    koszt_calosciowy = sum(typy[t]["price_int"] * uzycia[p] for p, (t, _) in enumerate(wzorce))
+    model.Add(koszt_calosciowy >= ograniczenie)
+    model.Minimize(koszt_calosciowy)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = limit_czasu
+    status = solver.Solve(model, ZatrzymaniePrzyOgraniczeniu(ograniczenie))
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+
+    # ==========================
+    # Rozwinięcie wzorców w układ na konkretnych listwach
+    # ==========================
+    kolejki = {t["rozmiar"]: list(reversed(t["indeksy"])) for t in typy_elementow}
+    licznik_instancji = [0] * len(typy)
+    uklad = []
+    for p, (t, wektor) in enumerate(wzorce):
+        for _ in range(solver.Value(uzycia[p])):
+            przypisane = []
+            pozycja = 0
+            for k, d in enumerate(rozmiary):
+                for _ in range(wektor[k]):
+                    # Nadwyżka produkcji (kawałek ponad popyt) jest pomijana
+                    if not kolejki[d]:
+                        break
+                    przypisane.append((kolejki[d].pop(), pozycja))
+                    pozycja += d + grubosc_krawedzi
+            if not przypisane:
+                continue
+            licznik_instancji[t] += 1
+            instancja = typy[t]["listwa"].copy()
+            instancja["id"] = f'{typy[t]["listwa"]["id"]}_{licznik_instancji[t]}'
+            uklad.append({"listwa": instancja, "elementy": przypisane})
+
+    koszt = sum(int(round(wpis["listwa"]["price"] * wspolczynnik_skalujacy)) for wpis in uklad)
+    return uklad, koszt / wspolczynnik_skalujacy
@@ -0,0 +1,756 @@
+import time
+
+from ortools.linear_solver import pywraplp
+from ortools.sat.python import cp_model
+import numpy as np
+
+from agregacja_popytu import agreguj_elementy
+from generowanie_kolumn import plecak_ograniczony
+from ograniczenia_dolne import ZatrzymaniePrzyOgraniczeniu, zaokraglij_do_kosztu
+from ograniczenia_plyt import dolne_ograniczenia
+from siatka import nwd_wymiarow
+
+
+def _orientacje(szer, wys):
+    """Orientacje elementu jako krotki (szerokość, wysokość, obrot); kwadrat ma tylko jedną."""
+    return [(szer, wys, False)] + ([(wys, szer, True)] if szer != wys else [])
+
+
+def _tablica_pasow(szerokosc, wysokosci, wymiary, wartosci, popyt, etapy):
+    """
+    Plecak zawartości pasów – jeden dla wszystkich wysokości pasa i szerokości do szerokosc.
+
+    W pasie o wysokości h element leży w orientacji o najmniejszej szerokości spośród tych,
+    które się w nim mieszczą (przy etapy=2 – o wysokości równej h). Tablica programowania
+    dynamicznego ma wiersz na każdą wysokość; kopia elementu (rozbicie binarne krotności jak
+    w plecak_ograniczony) aktualizuje jednym przesunięciem wszystkie wiersze o tej samej
+    szerokości elementu. Tablica zaczyna od zer, więc kolumna c zawiera najlepszą wartość
+    pasa o szerokości c – jedna tablica obsługuje wszystkie węższe arkusze (_odczytaj_pasy).
+    """
+    wiersze = len(wysokosci)
+    wysokosci_pasow = np.asarray(wysokosci)
+    najlepsze = np.zeros((wiersze, szerokosc + 1))
+    szerokosci_w_pasach = np.zeros((len(wymiary), wiersze), dtype=np.int64)  # 0 – nie mieści się
+    obroty_w_pasach = np.zeros((len(wymiary), wiersze), dtype=bool)
+    kopie = []
+    for k, (szer, wys) in enumerate(wymiary):
+        # Orientacje od najszerszej, więc węższa pasująca nadpisuje szerszą
+        for w, h, obrot in sorted(_orientacje(szer, wys), reverse=True):
+            if w <= szerokosc:
+                pasuje = wysokosci_pasow == h if etapy == 2 else wysokosci_pasow >= h
+                szerokosci_w_pasach[k, pasuje] = w
+                obroty_w_pasach[k, pasuje] = obrot
+        if wartosci[k] <= 0 or not szerokosci_w_pasach[k].any():
+            continue
+        grupy = [(int(w), np.flatnonzero(szerokosci_w_pasach[k] == w))
+                 for w in np.unique(szerokosci_w_pasach[k][szerokosci_w_pasach[k] > 0])]
+        limit = min(popyt[k], szerokosc // grupy[0][0])
+        krok = 1
+        while limit > 0:
+            krotnosc = min(krok, limit)
+            kopie.append((k, krotnosc, grupy))
+            limit -= krotnosc
+            krok *= 2
+
+    wybory = np.zeros((len(kopie), wiersze, szerokosc + 1), dtype=bool)
+    for n, (k, krotnosc, grupy) in enumerate(kopie):
+        for w, rzedy in grupy:
+            waga = w * krotnosc
+            if waga > szerokosc:
+                break
+            stare = najlepsze[rzedy]
+            kandydat = stare[:, :-waga] + wartosci[k] * krotnosc
+            lepsze = kandydat > stare[:, waga:] + 1e-12
+            wybory[n, rzedy, waga:] = lepsze
+            najlepsze[rzedy, waga:] = np.where(lepsze, kandydat, stare[:, waga:])
+    return {"najlepsze": najlepsze, "wybory": wybory, "kopie": [(k, krotnosc) for k, krotnosc, _ in kopie],
+            "szerokosci": szerokosci_w_pasach, "obroty": obroty_w_pasach}
+
+
+def _odczytaj_pasy(tablica, szerokosc):
+    """
+    Odtwarza z tablicy (_tablica_pasow) najlepsze zawartości pasów o danej szerokości.
+
+    Zwraca listę krotek (wartosc, [(indeks_typu, obrot, liczba), ...]) w kolejności wysokości.
+    """
+    szerokosci, obroty = tablica["szerokosci"], tablica["obroty"]
+    wiersze = np.arange(szerokosci.shape[1])
+    liczby = np.zeros(szerokosci.shape, dtype=np.int64)
+    c = np.full(len(wiersze), szerokosc)
+    for n in range(len(tablica["kopie"]) - 1, -1, -1):
+        k, krotnosc = tablica["kopie"][n]
+        wybrane = tablica["wybory"][n, wiersze, c]
+        liczby[k] += krotnosc * wybrane
+        c -= szerokosci[k] * krotnosc * wybrane
+    return [
+        (tablica["najlepsze"][r, szerokosc],
+         [(int(k), bool(obroty[k, r]), int(liczby[k, r])) for k in np.flatnonzero(liczby[:, r])])
+        for r in wiersze
+    ]
+
+
+def najlepszy_wzorzec(szerokosc, wysokosc, wymiary, wartosci, popyt, etapy=3, pamiec=None,
+                      powtorzenia_wg_popytu=False, szerokosc_tablicy=None):
+    """
+    Najcenniejszy wzorzec etapowy na arkuszu: poziome pasy, w pasach elementy obok siebie.
+
+    Wysokość pasa to wymiar któregoś elementu z rzazem. W pasie leżą elementy tej wysokości
+    (etapy=2) albo także niższe, docinane trzecim cięciem (etapy=3). Zawartości pasów
+    wybiera plecak po szerokości arkusza (_tablica_pasow), a pasy – plecak po jego wysokości.
+    Bez powtorzenia_wg_popytu pas może się powtarzać, ile zmieści się w arkuszu, więc
+    wartość wzorca nie jest mniejsza od wartości żadnego rzeczywistego układu etapowego
+    (wycena w generowaniu kolumn); z nim – tylko tyle razy, na ile starcza popytu.
+
+    Parametry:
+      - szerokosc, wysokosc: wymiary arkusza (przeskalowane)
+      - wymiary: lista krotek (szerokość, wysokość) typów elementów z rzazem (przeskalowanych)
+      - wartosci: wartość jednej sztuki każdego typu (np. ceny dualne)
+      - popyt: maksymalna liczba sztuk każdego typu w jednym pasie
+      - etapy: 2 (pasy dokładne) albo 3 (pasy z docinaniem)
+      - pamiec: opcjonalny słownik na tablicę pasów i jej odczyty – przy tych samych
+                wartościach wspólny dla wszystkich arkuszy
+      - szerokosc_tablicy: szerokość, dla której liczona jest tablica pasów (domyślnie
+                           szerokosc); przy wielu arkuszach – największa z ich szerokości
+
+    Zwraca krotkę (wartosc, pasy), gdzie pasy to lista krotek
+    (wysokosc_pasa, [(indeks_typu, obrot, liczba), ...]) od dołu arkusza.
+    """
+    if pamiec is None:
+        pamiec = {}
+    wysokosci = sorted({wymiar for element in wymiary for wymiar in element})
+    if "tablica" not in pamiec or pamiec["tablica"]["najlepsze"].shape[1] <= szerokosc:
+        pamiec.clear()
+        pamiec["tablica"] = _tablica_pasow(max(szerokosc, szerokosc_tablicy or 0), wysokosci,
+                                           wymiary, wartosci, popyt, etapy)
+    if szerokosc not in pamiec:
+        pamiec[szerokosc] = _odczytaj_pasy(pamiec["tablica"], szerokosc)
+    kandydaci = [
+        (h, wartosc, zawartosc)
+        for h, (wartosc, zawartosc) in zip(wysokosci, pamiec[szerokosc])
+        if h <= wysokosc and zawartosc
+    ]
+    if not kandydaci:
+        return 0.0, []
+
+    powtorzenia = []
+    for h, _, zawartosc in kandydaci:
+        limit = wysokosc // h
+        if powtorzenia_wg_popytu:
+            limit = min([limit] + [popyt[k] // liczba for k, _, liczba in zawartosc])
+        powtorzenia.append(limit)
+    wartosc, krotnosci = plecak_ograniczony([k[1] for k in kandydaci], [k[0] for k in kandydaci],
+                                            powtorzenia, wysokosc)
+    pasy = [(h, zawartosc) for (h, _, zawartosc), n in zip(kandydaci, krotnosci) for _ in range(n)]
+    return wartosc, pasy
+
+
+# Waga cen dualnych najlepszego ograniczenia przy ich wygładzaniu w generowaniu kolumn
+WYGLADZANIE = 0.8
+# Liczba przebiegów heurystyki sekwencyjnej z korektą wartości elementów
+PRZEBIEGI_KOREKTY = 5
+
+
+# ==========================
+# Drzewo cięć
+# ==========================
+def _lisc(x, y, szerokosc, wysokosc, element=None):
+    """Liść drzewa cięć: element (indeks) albo odpad (element None)."""
+    return {"x": x, "y": y, "szerokosc": szerokosc, "wysokosc": wysokosc,
+            "ciecia": None, "dzieci": [], "element": element}
+
+
+def _podziel(x, y, szerokosc, wysokosc, ciecia, dzieci, grubosc_krawedzi):
+    """
+    Węzeł dzielony cięciami "poziome" (dzieci jedno nad drugim) albo "pionowe"
+    (dzieci obok siebie). Za każdym dzieckiem biegnie rzaz; materiał za ostatnim
+    rzazem staje się liściem odpadu.
+    """
+    wezel = {"x": x, "y": y, "szerokosc": szerokosc, "wysokosc": wysokosc,
+             "ciecia": ciecia, "dzieci": list(dzieci), "element": None}
+    if ciecia == "poziome":
+        koniec = max(d["y"] + d["wysokosc"] for d in dzieci) + grubosc_krawedzi
+        if koniec < y + wysokosc:
+            wezel["dzieci"].append(_lisc(x, koniec, szerokosc, y + wysokosc - koniec))
+    else:
+        koniec = max(d["x"] + d["szerokosc"] for d in dzieci) + grubosc_krawedzi
+        if koniec < x + szerokosc:
+            wezel["dzieci"].append(_lisc(koniec, y, x + szerokosc - koniec, wysokosc))
+    return wezel
+
+
+def _transponuj_drzewo(wezel):
+    """Odbija drzewo cięć względem przekątnej arkusza (x <-> y, cięcia poziome <-> pionowe)."""
+    kierunek = {"poziome": "pionowe", "pionowe": "poziome", None: None}[wezel["ciecia"]]
+    return {"x": wezel["y"], "y": wezel["x"], "szerokosc": wezel["wysokosc"], "wysokosc": wezel["szerokosc"],
+            "ciecia": kierunek, "dzieci": [_transponuj_drzewo(d) for d in wezel["dzieci"]],
+            "element": wezel["element"]}
+
+
+def przenumeruj_drzewo(wezel, mapa):
+    """
+    Kopia drzewa cięć z indeksami elementów w liściach zamienionymi według słownika mapa;
+    element spoza mapa (np. usunięty z zlecenia) staje się odpadem.
+    """
+    element = None if wezel["element"] is None else mapa.get(wezel["element"])
+    return dict(wezel, dzieci=[przenumeruj_drzewo(d, mapa) for d in wezel["dzieci"]], element=element)
+
+
+def lista_ciec(drzewo):
+    """
+    Cięcia z drzewa w kolejności wykonywania na pile: najpierw wszystkie cięcia
+    pierwszego etapu, potem drugiego itd. Każde cięcie biegnie od krawędzi do krawędzi
+    dzielonego węzła, a rzaz zaczyna się na linii cięcia.
+
+    Zwraca listę słowników {"etap", "kierunek", "x1", "y1", "x2", "y2"}.
+    """
+    ciecia = []
+    poziom, etap = [drzewo], 1
+    while poziom:
+        nastepny = []
+        for wezel in poziom:
+            for dziecko in wezel["dzieci"]:
+                if wezel["ciecia"] == "poziome":
+                    pozycja = dziecko["y"] + dziecko["wysokosc"]
+                    if pozycja < wezel["y"] + wezel["wysokosc"]:
+                        ciecia.append({"etap": etap, "kierunek": "poziome", "x1": wezel["x"], "y1": pozycja,
+                                       "x2": wezel["x"] + wezel["szerokosc"], "y2": pozycja})
+                else:
+                    pozycja = dziecko["x"] + dziecko["szerokosc"]
+                    if pozycja < wezel["x"] + wezel["szerokosc"]:
+                        ciecia.append({"etap": etap, "kierunek": "pionowe", "x1": pozycja, "y1": wezel["y"],
+                                       "x2": pozycja, "y2": wezel["y"] + wezel["wysokosc"]})
+                nastepny.append(dziecko)
+        poziom, etap = nastepny, etap + 1
+    return ciecia
+
+
+def _rozwin_wzorzec(arkusz, transpozycja, pasy, typy_elementow, kolejki, elementy, skala, grubosc_krawedzi):
+    """
+    Zamienia wzorzec na konkretne elementy, ich położenia i drzewo cięć.
+
+    Sztuki ponad popyt (nadprodukcja wzorca) są pomijane, a kolejne elementy pasa
+    dosuwane w lewo. Wzorzec transponowany liczony jest na arkuszu obróconym o 90°,
+    więc na końcu układ i drzewo odbijane są z powrotem.
+    Zwraca krotkę (polozenia, drzewo) albo None, jeśli wzorzec nie zawiera żadnego elementu.
+    """
+    szerokosc, wysokosc = arkusz["width"], arkusz["height"]
+    if transpozycja:
+        szerokosc, wysokosc = wysokosc, szerokosc
+    polozenia = []
+    wezly_pasow = []
+    y = 0
+    for h, zawartosc in pasy:
+        wysokosc_pasa = h * skala - grubosc_krawedzi
+        wezly = []
+        x = 0
+        for k, obrot, liczba in zawartosc:
+            szer, wys = typy_elementow[k]["rozmiar"][::-1] if obrot else typy_elementow[k]["rozmiar"]
+            for _ in range(liczba):
+                if not kolejki[k]:
+                    break
+                i = kolejki[k].pop()
+                polozenia.append((i, x, y, obrot))
+                element = _lisc(x, y, szer, wys, i)
+                if wys < wysokosc_pasa:
+                    # Trzeci etap: docięcie elementu do jego wysokości
+                    element = _podziel(x, y, szer, wysokosc_pasa, "poziome", [element], grubosc_krawedzi)
+                wezly.append(element)
+                x += szer + grubosc_krawedzi
+        if wezly:
+            wezly_pasow.append(_podziel(0, y, szerokosc, wysokosc_pasa, "pionowe", wezly, grubosc_krawedzi))
+            y += wysokosc_pasa + grubosc_krawedzi
+    if not polozenia:
+        return None
+    drzewo = _podziel(0, 0, szerokosc, wysokosc, "poziome", wezly_pasow, grubosc_krawedzi)
+    if transpozycja:
+        polozenia = [(i, y, x, obrot != (elementy[i][0] != elementy[i][1])) for i, x, y, obrot in polozenia]
+        drzewo = _transponuj_drzewo(drzewo)
+    return polozenia, drzewo
+
+
+# ==========================
+# Model pasów
+# ==========================
+def _model_pasow(typy, wymiary, popyt, etapy, ograniczenie, limit_czasu):
+    """
+    Zwarty model CP-SAT wszystkich układów etapowych, niezależny od wygenerowanych wzorców.
+
+    Każda instancja arkusza (w jednej z orientacji) ma tyle miejsc na pasy, ile pasów
+    najniższego elementu zmieści się w jej wysokości. Zmienne całkowite liczą sztuki typu
+    elementu w danej orientacji w pasie; wysokość pasa nie jest mniejsza od wysokości jego
+    elementów (etapy=2 – jest jej równa), elementy pasa mieszczą się w szerokości arkusza,
+    a pasy – w jego wysokości. Model obejmuje każdy układ etapowy, więc INFEASIBLE
+    dowodzi, że takiego układu nie ma. Wymiary jak w najlepszy_wzorzec (z rzazem, przeskalowane).
+
+    Zwraca krotkę (status, wybrane): status CP-SAT oraz listę krotek (typ, transpozycja, pasy)
+    dla użytych arkuszy albo None, jeśli nie znaleziono rozwiązania.
+    """
+    model = cp_model.CpModel()
+    wysokosci = sorted({wymiar for element in wymiary for wymiar in element})
+    liczba_sztuk = sum(popyt)
+    warianty = []  # (typ, transpozycja, pasy); pasy: lista (wysokosc_pasa, {(k, obrot): liczba})
+    instancje_typow = [[] for _ in typy]
+    for t, typ in enumerate(typy):
+        for j in range(min(typ["dostepne"], liczba_sztuk)):
+            orientacje_arkusza = []
+            for szerokosc, wysokosc, transpozycja in typ["orientacje"]:
+                orientacje_elementow = [
+                    (k, obrot, w, h)
+                    for k, (szer, wys) in enumerate(wymiary)
+                    for w, h, obrot in _orientacje(szer, wys)
+                    if w <= szerokosc and h <= wysokosc
+                ]
+                if not orientacje_elementow:
+                    continue
+                uzyty = model.NewBoolVar(f'uzyty_{t}_{j}_{int(transpozycja)}')
+                miejsca = min(liczba_sztuk, wysokosc // min(h for _, _, _, h in orientacje_elementow))
+                dziedzina = cp_model.Domain.FromValues([0] + [h for h in wysokosci if h <= wysokosc])
+                pasy = []
+                for p in range(miejsca):
+                    wysokosc_pasa = model.NewIntVarFromDomain(dziedzina, f'pas_{t}_{j}_{int(transpozycja)}_{p}')
+                    liczby = {}
+                    szerokosci = []
+                    for k, obrot, w, h in orientacje_elementow:
+                        liczba = model.NewIntVar(0, min(popyt[k], szerokosc // w), f'liczba_{k}_{int(obrot)}')
+                        jest = model.NewBoolVar(f'jest_{k}_{int(obrot)}')
+                        model.Add(liczba == 0).OnlyEnforceIf(jest.Not())
+                        if etapy == 2:
+                            model.Add(wysokosc_pasa == h).OnlyEnforceIf(jest)
+                        else:
+                            model.Add(wysokosc_pasa >= h).OnlyEnforceIf(jest)
+                        liczby[(k, obrot)] = liczba
+                        szerokosci.append(liczba * w)
+                    model.Add(sum(szerokosci) <= szerokosc)
+                    if pasy:
+                        # Pasy od najwyższego – bez symetrycznych permutacji
+                        model.Add(wysokosc_pasa <= pasy[-1][0])
+                    pasy.append((wysokosc_pasa, liczby))
+                model.Add(sum(wysokosc_pasa for wysokosc_pasa, _ in pasy) <= wysokosc * uzyty)
+                warianty.append((t, transpozycja, pasy))
+                orientacje_arkusza.append(uzyty)
+            if orientacje_arkusza:
+                instancja = model.NewBoolVar(f'instancja_{t}_{j}')
+                model.Add(sum(orientacje_arkusza) == instancja)
+                instancje_typow[t].append(instancja)
+    # Identyczne instancje typu używane po kolei
+    for instancje in instancje_typow:
+        for a, b in zip(instancje, instancje[1:]):
+            model.Add(a >= b)
+    for k, d in enumerate(popyt):
+        model.Add(sum(liczba for _, _, pasy in warianty for _, liczby in pasy
+                      for (typ_elementu, _), liczba in liczby.items() if typ_elementu == k) == d)
+    koszt_calosciowy = sum(typy[t]["price_int"] * instancja
+                           for t, instancje in enumerate(instancje_typow) for instancja in instancje)
+    model.Add(koszt_calosciowy >= ograniczenie)
+    model.Minimize(koszt_calosciowy)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = limit_czasu
+    status = solver.Solve(model, ZatrzymaniePrzyOgraniczeniu(ograniczenie))
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return status, None
+    wybrane = []
+    for t, transpozycja, pasy in warianty:
+        zawartosci = []
+        for wysokosc_pasa, liczby in pasy:
+            zawartosc = [(k, obrot, solver.Value(liczba)) for (k, obrot), liczba in liczby.items()
+                         if solver.Value(liczba)]
+            if zawartosc:
+                zawartosci.append((solver.Value(wysokosc_pasa), zawartosc))
+        if zawartosci:
+            wybrane.append((t, transpozycja, zawartosci))
+    return status, wybrane
+
+
+# ==========================
+# Generowanie kolumn
+# ==========================
+def rozwiaz_gilotynowo(typy_arkuszy, elementy, grubosc_krawedzi, etapy=3, maks_iteracji=200, limit_czasu=10.0):
+    """
+    Rozwiązuje cięcie gilotynowe arkuszy generowaniem kolumn na wzorcach etapowych.
+
+    Kolumną jest wzorzec jednego arkusza: pasy poziome (pierwszy etap cięć), elementy
+    obok siebie w pasie (drugi etap) i – przy etapy=3 – docięcie elementu do jego
+    wysokości (trzeci etap). Wzorce liczone są też na arkuszu obróconym o 90°, czyli
+    z pierwszymi cięciami pionowymi. Relaksacja LP (GLOP) rozszerzana jest o wzorce
+    z problemu wyceny (najlepszy_wzorzec na cenach dualnych), a na końcu CP-SAT wybiera
+    całkowitą liczbę użyć każdego wzorca. Startuje on z najlepszego z rozwiązań heurystyki
+    sekwencyjnej (kolejne arkusze o najniższej cenie za wyciętą powierzchnię) – na całym
+    popycie oraz na reszcie po zaokrągleniu relaksacji w dół – więc nie jest od nich gorszy.
+    Wszystkie wymiary dzielone są przez ich NWD.
+
+    Parametry:
+      - typy_arkuszy: lista typów arkuszy z "number_of_items" (np. z generuj_typy_arkuszy)
+      - elementy: lista krotek (szerokość, wysokość)
+      - grubosc_krawedzi: grubość cięcia (mm)
+      - etapy: 2 albo 3 – liczba etapów cięcia
+      - maks_iteracji: maksymalna liczba iteracji generowania kolumn
+      - limit_czasu: limit czasu (s) osobno dla generowania kolumn, dla końcowego,
+                     całkowitoliczbowego problemu głównego i – jeśli one nie dały planu –
+                     dla modelu pasów (_model_pasow)
+
+    Zwraca krotkę (uklad, koszt, ograniczenie), gdzie każdy wpis układu ma dodatkowo klucz
+    "drzewo_ciec" (zob. lista_ciec), a ograniczenie to dolne ograniczenie kosztu wśród
+    układów etapowych. Jeśli w limicie czasu nie znaleziono planu, uklad i koszt są None.
+    None zwracane jest tylko wtedy, gdy udowodniono, że układ etapowy nie istnieje: element
+    nie mieści się w żadnym arkuszu, relaksacja LP wymaga zmiennych sztucznych albo CP-SAT
+    wykazał sprzeczność modelu pasów.
+    """
+    if etapy not in (2, 3):
+        raise ValueError(f"Nieobsługiwana liczba etapów: {etapy}")
+    wspolczynnik_skalujacy = 100
+    if not elementy:
+        return [], 0.0, 0.0
+
+    typy_elementow = agreguj_elementy(elementy)
+    popyt = [t["ilosc"] for t in typy_elementow]
+    skala = nwd_wymiarow(typy_arkuszy, elementy, grubosc_krawedzi)
+    wymiary = [((szer + grubosc_krawedzi) // skala, (wys + grubosc_krawedzi) // skala)
+               for szer, wys in (t["rozmiar"] for t in typy_elementow)]
+
+    typy = []
+    for arkusz in typy_arkuszy:
+        szerokosc, wysokosc = arkusz["width"] // skala, arkusz["height"] // skala
+        typy.append({
+            "arkusz": arkusz,
+            "price_int": int(round(arkusz["price"] * wspolczynnik_skalujacy)),
+            "dostepne": arkusz.get("number_of_items", 1),
+            # Pasy poziome na arkuszu wprost i na arkuszu obróconym (pierwsze cięcia pionowe)
+            "orientacje": [(szerokosc, wysokosc, False)] + ([(wysokosc, szerokosc, True)]
+                                                            if szerokosc != wysokosc else []),
+        })
+
+    # Każdy element musi zmieścić się (razem z rzazem) w co najmniej jednym typie arkusza
+    for szer, wys in wymiary:
+        if not any(min(szer, wys) <= min(o[:2]) and max(szer, wys) <= max(o[:2])
+                   for typ in typy for o in typ["orientacje"]):
+            return None
+    # Jedna tablica pasów (najlepszy_wzorzec) obsługuje wszystkie arkusze o szerokości do tej
+    szerokosc_maks = max(o[0] for typ in typy for o in typ["orientacje"])
+
+    def wycen(wartosci):
+        """Najcenniejszy wzorzec każdej orientacji każdego typu arkusza: lista (typ, wartosc, transpozycja, pasy)."""
+        pamiec = {}
+        wyniki = []
+        for t, typ in enumerate(typy):
+            for szerokosc, wysokosc, transpozycja in typ["orientacje"]:
+                wartosc, pasy = najlepszy_wzorzec(szerokosc, wysokosc, wymiary, wartosci, popyt, etapy, pamiec,
+                                                  szerokosc_tablicy=szerokosc_maks)
+                wyniki.append((t, wartosc, transpozycja, pasy))
+        return wyniki
+
+    def wektor_wzorca(pasy):
+        wektor = [0] * len(typy_elementow)
+        for _, zawartosc in pasy:
+            for k, _, liczba in zawartosc:
+                wektor[k] += liczba
+        # Bez obcinania do popytu: wycena liczy każdą sztukę, więc kolumna musi mieć te same
+        # współczynniki (nadwyżka jest pomijana dopiero przy rozwijaniu wzorca)
+        return tuple(wektor)
+
+    powierzchnie = [szer * wys for szer, wys in wymiary]
+
+    def sekwencyjnie(pozostaly_popyt, dostepne, wartosci):
+        """
+        Zachłanne wypełnianie: kolejno arkusz o najniższej cenie za wartość wyciętych elementów.
+
+        Zwraca listę krotek (typ, transpozycja, pasy, wektor wyciętych sztuk) albo None,
+        jeśli zabrakło arkuszy.
+        """
+        pozostaly_popyt, dostepne = list(pozostaly_popyt), list(dostepne)
+        wybrane = []
+        while any(pozostaly_popyt):
+            pamiec = {}
+            najlepszy = None
+            for t, typ in enumerate(typy):
+                if not dostepne[t]:
+                    continue
+                for szerokosc, wysokosc, transpozycja in typ["orientacje"]:
+                    _, pasy = najlepszy_wzorzec(szerokosc, wysokosc, wymiary, wartosci, pozostaly_popyt,
+                                                etapy, pamiec, powtorzenia_wg_popytu=True,
+                                                szerokosc_tablicy=szerokosc_maks)
+                    wyciete = [min(n, d) for n, d in zip(wektor_wzorca(pasy), pozostaly_popyt)]
+                    wartosc = sum(n * v for n, v in zip(wyciete, wartosci))
+                    if not wartosc:
+                        continue
+                    ocena = (typ["price_int"] / wartosc, -wartosc)
+                    if najlepszy is None or ocena < najlepszy[0]:
+                        najlepszy = (ocena, t, transpozycja, pasy, wyciete)
+            if najlepszy is None:
+                return None
+            _, t, transpozycja, pasy, wyciete = najlepszy
+            wybrane.append((t, transpozycja, pasy, wyciete))
+            dostepne[t] -= 1
+            pozostaly_popyt = [d - n for d, n in zip(pozostaly_popyt, wyciete)]
+        return wybrane
+
+    def na_polkach(transpozycja):
+        """
+        Półki First-Fit Decreasing Height: elementy od najwyższego (w niższej orientacji)
+        trafiają na pierwszą półkę, na której się mieszczą (etapy=2 – tej samej wysokości),
+        potem na nową półkę, a w ostateczności na nowy arkusz o najniższej cenie za powierzchnię.
+        Półka to pas wzorca, więc plan jest etapowy; nie marnuje arkuszy na nadmiar sztuk,
+        dlatego zwykle istnieje także przy magazynie, na którym heurystyka sekwencyjna zawodzi.
+
+        Zwraca listę krotek jak sekwencyjnie albo None, jeśli zabrakło arkuszy.
+        """
+        sztuki = sorted(
+            ((k, sorted(_orientacje(*wymiary[k]), key=lambda o: o[1])) for k, d in enumerate(popyt)
+             for _ in range(d)),
+            key=lambda sztuka: -sztuka[1][0][1],
+        )
+        dostepne = [typ["dostepne"] for typ in typy]
+        arkusze = []  # {"typ", "transpozycja", "szerokosc", "wolna_wysokosc", "polki": [[h, wolna_szer, {}]]}
+
+        def umiesc(arkusz, k, orientacje):
+            for w, h, obrot in orientacje:
+                for polka in arkusz["polki"]:
+                    if (h == polka[0] if etapy == 2 else h <= polka[0]) and w <= polka[1]:
+                        polka[1] -= w
+                        polka[2][(k, obrot)] = polka[2].get((k, obrot), 0) + 1
+                        return True
+            for w, h, obrot in orientacje:
+                if w <= arkusz["szerokosc"] and h <= arkusz["wolna_wysokosc"]:
+                    arkusz["polki"].append([h, arkusz["szerokosc"] - w, {(k, obrot): 1}])
+                    arkusz["wolna_wysokosc"] -= h
+                    return True
+            return False
+
+        for k, orientacje in sztuki:
+            if any(umiesc(arkusz, k, orientacje) for arkusz in arkusze):
+                continue
+            kandydaci = [
+                (typ["price_int"] / (szerokosc * wysokosc), -szerokosc * wysokosc, t, szerokosc, wysokosc, transp)
+                for t, typ in enumerate(typy) if dostepne[t]
+                for szerokosc, wysokosc, transp in typ["orientacje"][-1 if transpozycja else 0:][:1]
+                if any(w <= szerokosc and h <= wysokosc for w, h, _ in orientacje)
+            ]
+            if not kandydaci:
+                return None
+            *_, t, szerokosc, wysokosc, transp = min(kandydaci)
+            dostepne[t] -= 1
+            arkusze.append({"typ": t, "transpozycja": transp, "szerokosc": szerokosc,
+                            "wolna_wysokosc": wysokosc, "polki": []})
+            umiesc(arkusze[-1], k, orientacje)
+
+        wybrane = []
+        for arkusz in arkusze:
+            pasy = [(h, [(k, obrot, n) for (k, obrot), n in liczby.items()]) for h, _, liczby in arkusz["polki"]]
+            wybrane.append((arkusz["typ"], arkusz["transpozycja"], pasy, list(wektor_wzorca(pasy))))
+        return wybrane
+
+    # ==========================
+    # Problem główny (relaksacja LP)
+    # ==========================
+    lp = pywraplp.Solver.CreateSolver("GLOP")
+    ograniczenia_popytu = [lp.Constraint(d, lp.infinity()) for d in popyt]
+    ograniczenia_dostepnosci = [lp.Constraint(0, typ["dostepne"]) for typ in typy]
+    cel = lp.Objective()
+    cel.SetMinimization()
+
+    # Zmienne sztuczne – gwarantują dopuszczalność przy ograniczonej dostępności arkuszy.
+    # Rozwiązanie relaksacji bez nich kosztuje najwyżej C = sum(cena * dostępne), więc przy
+    # karze większej niż 2C suma zmiennych sztucznych w optimum przekraczająca 1/2 dowodzi,
+    # że relaksacja (a więc i problem) nie ma rozwiązania
+    kara = 2 * sum(t["price_int"] * t["dostepne"] for t in typy) + 1
+    sztuczne = []
+    for k, ograniczenie in enumerate(ograniczenia_popytu):
+        sztuczna = lp.NumVar(0, lp.infinity(), f'sztuczna_{k}')
+        ograniczenie.SetCoefficient(sztuczna, 1)
+        cel.SetCoefficient(sztuczna, kara)
+        sztuczne.append(sztuczna)
+
+    wzorce = []  # słowniki {"typ", "transpozycja", "pasy", "wektor", "zmienna"}
+    znane = {}  # (typ, wektor) -> indeks wzorca
+
+    def dodaj_kolumne(t, transpozycja, pasy):
+        """Dodaje wzorzec do LP (o ile jest nowy); zwraca krotkę (indeks wzorca, czy_nowy)."""
+        wektor = wektor_wzorca(pasy)
+        if (t, wektor) in znane:
+            return znane[(t, wektor)], False
+        znane[(t, wektor)] = len(wzorce)
+        zmienna = lp.NumVar(0, lp.infinity(), f'wzorzec_{lp.NumVariables()}')
+        wzorce.append({"typ": t, "transpozycja": transpozycja, "pasy": pasy, "wektor": wektor,
+                       "zmienna": zmienna})
+        for k, krotnosc in enumerate(wektor):
+            if krotnosc:
+                ograniczenia_popytu[k].SetCoefficient(zmienna, krotnosc)
+        ograniczenia_dostepnosci[t].SetCoefficient(zmienna, 1)
+        cel.SetCoefficient(zmienna, typy[t]["price_int"])
+        return znane[(t, wektor)], True
+
+    def jako_uzycia(wybrane):
+        """Zamienia listę wybranych wzorców na słownik {indeks wzorca: liczba użyć}."""
+        uzycia = {}
+        for t, transpozycja, pasy in wybrane:
+            p, _ = dodaj_kolumne(t, transpozycja, pasy)
+            uzycia[p] = uzycia.get(p, 0) + 1
+        return uzycia
+
+    def koszt_uzyc(uzycia):
+        return sum(typy[wzorce[p]["typ"]]["price_int"] * n for p, n in uzycia.items())
+
+    # Ceny proporcjonalne do powierzchni elementów: przy nich żaden wzorzec nie ma
+    # dodatniego kosztu zredukowanego, a ograniczenie Lagrange'a jest ciągłym
+    # ograniczeniem powierzchniowym
+    cena_powierzchni = min(typ["price_int"] / (typ["orientacje"][0][0] * typ["orientacje"][0][1])
+                           for typ in typy if typ["dostepne"])
+    ceny_powierzchni = [a * cena_powierzchni for a in powierzchnie]
+
+    # Rozwiązania dopuszczalne z heurystyki sekwencyjnej z korektą wartości: po każdym
+    # przebiegu cena każdego arkusza rozdzielana jest między wycięte z niego elementy
+    # proporcjonalnie do ich wartości, a nowa wartość elementu to średnia z dotychczasowej
+    # i jego udziałów – elementy z marnie wypełnionych arkuszy zyskują pierwszeństwo.
+    # Wzorce heurystyki są też kolumnami startowymi obok wzorców o największym wypełnieniu.
+    rozwiazania = []
+    wartosci = ceny_powierzchni
+    for _ in range(PRZEBIEGI_KOREKTY):
+        wybrane = sekwencyjnie(popyt, [typ["dostepne"] for typ in typy], wartosci)
+        if wybrane is None:
+            break
+        rozwiazania.append(jako_uzycia([(t, transpozycja, pasy) for t, transpozycja, pasy, _ in wybrane]))
+        udzialy = [0.0] * len(popyt)
+        for t, _, _, wyciete in wybrane:
+            wartosc = sum(n * v for n, v in zip(wyciete, wartosci))
+            for k, n in enumerate(wyciete):
+                udzialy[k] += n * typy[t]["price_int"] * wartosci[k] / wartosc
+        wartosci = [(v + u / d) / 2 for v, u, d in zip(wartosci, udzialy, popyt)]
+    # Półki na arkuszach wprost i obróconych
+    for transpozycja in (False, True):
+        wybrane = na_polkach(transpozycja)
+        if wybrane is not None:
+            rozwiazania.append(jako_uzycia([(t, transp, pasy) for t, transp, pasy, _ in wybrane]))
+    for t, _, transpozycja, pasy in wycen(powierzchnie):
+        dodaj_kolumne(t, transpozycja, pasy)
+
+    # Dolne ograniczenie (dla układów etapowych) z relaksacji Lagrange'a ograniczeń popytu:
+    # sum(pi_k * d_k) + sum(U_t * min(0, c_t - V_t)), gdzie V_t to wartość najlepszego
+    # wzorca typu t na cenach dualnych pi, a U_t – liczba dostępnych arkuszy. Jest poprawne
+    # w każdej iteracji, a po zbieżności równe wartości relaksacji LP. Koszt jest sumą cen
+    # arkuszy, więc oba zaokrąglamy w górę do najbliższej takiej sumy; generowanie kończy się,
+    # gdy zaokrąglone ograniczenie zrówna się z zaokrągloną wartością LP.
+    def zaokraglij(wartosc):
+        return zaokraglij_do_kosztu(int(np.ceil(wartosc - 1e-6)), [typ["price_int"] for typ in typy],
+                                    [typ["dostepne"] for typ in typy])
+
+    # Ograniczenia 2D (ograniczenia_plyt) dotyczą wszystkich układów, więc i etapowych
+    ograniczenie = dolne_ograniczenia(typy_arkuszy, elementy, grubosc_krawedzi)[0]
+    wartosci_lp = []
+    # Punkt startowy wygładzania: ceny proporcjonalne do powierzchni elementów
+    najlepsze_ceny = ceny_powierzchni  # ceny dualne najlepszego ograniczenia
+    najlepsze_ograniczenie = sum(pi * d for pi, d in zip(najlepsze_ceny, popyt))
+    start = time.perf_counter()
+    for _ in range(maks_iteracji):
+        if lp.Solve() != pywraplp.Solver.OPTIMAL:
+            # Relaksacja ze zmiennymi sztucznymi zawsze ma rozwiązanie – to błąd numeryczny, nie dowód
+            break
+        wartosci_lp = [w["zmienna"].solution_value() for w in wzorce]
+        wartosc_relaksacji = cel.Value()
+        ceny_lp = [o.dual_value() for o in ograniczenia_popytu]
+        dualne_dostepnosci = [o.dual_value() for o in ograniczenia_dostepnosci]
+
+        # Wygładzanie cen dualnych (Wentges): wycena w punkcie między cenami najlepszego
+        # ograniczenia a bieżącymi tłumi ich oscylacje i skraca „ogon” zbieżności. Gdy
+        # wygładzone ceny nie dają nowej kolumny, wycena jest powtarzana na cenach LP.
+        kandydaci_cen = [[WYGLADZANIE * b + (1 - WYGLADZANIE) * c for b, c in zip(najlepsze_ceny, ceny_lp)],
+                         ceny_lp]
+        for ceny_dualne in kandydaci_cen:
+            # Problem wyceny: dla każdego typu arkusza szukamy wzorców o ujemnym koszcie zredukowanym
+            najlepsze_wartosci = [0.0] * len(typy)
+            dodano = False
+            for t, wartosc, transpozycja, pasy in wycen(ceny_dualne):
+                najlepsze_wartosci[t] = max(najlepsze_wartosci[t], wartosc)
+                koszt_zredukowany = typy[t]["price_int"] - dualne_dostepnosci[t] - sum(
+                    pi * n for pi, n in zip(ceny_lp, wektor_wzorca(pasy)))
+                if koszt_zredukowany < -1e-6:
+                    dodano |= dodaj_kolumne(t, transpozycja, pasy)[1]
+
+            lagrange = sum(pi * d for pi, d in zip(ceny_dualne, popyt)) + sum(
+                typ["dostepne"] * min(0.0, typ["price_int"] - v) for typ, v in zip(typy, najlepsze_wartosci))
+            if lagrange > najlepsze_ograniczenie:
+                najlepsze_ograniczenie, najlepsze_ceny = lagrange, ceny_dualne
+            if dodano:
+                break
+        ograniczenie = max(ograniczenie, zaokraglij(najlepsze_ograniczenie))
+        if not dodano and sum(sztuczna.solution_value() for sztuczna in sztuczne) > 0.5:
+            # Zbieżna relaksacja nadal pokrywa popyt zmiennymi sztucznymi – arkuszy nie starcza
+            return None
+        if (not dodano or ograniczenie >= zaokraglij(wartosc_relaksacji)
+                or time.perf_counter() - start > limit_czasu):
+            break
+
+    # Zaokrąglenie relaksacji: części całkowite użyć wzorców, a resztę popytu pokrywa
+    # heurystyka sekwencyjna
+    zaokraglone = {p: int(x + 1e-6) for p, x in enumerate(wartosci_lp)}
+    zaokraglone = {p: n for p, n in zaokraglone.items() if n}
+    reszta_popytu = list(popyt)
+    reszta_dostepnych = [typ["dostepne"] for typ in typy]
+    for p, n in zaokraglone.items():
+        reszta_dostepnych[wzorce[p]["typ"]] -= n
+        reszta_popytu = [max(0, d - n * w) for d, w in zip(reszta_popytu, wzorce[p]["wektor"])]
+    wybrane = sekwencyjnie(reszta_popytu, reszta_dostepnych, wartosci)
+    if wybrane is not None:
+        for p, n in jako_uzycia([(t, transpozycja, pasy) for t, transpozycja, pasy, _ in wybrane]).items():
+            zaokraglone[p] = zaokraglone.get(p, 0) + n
+        rozwiazania.append(zaokraglone)
+    najlepsze = min(rozwiazania, key=koszt_uzyc, default=None)
+
+    # ==========================
+    # Całkowitoliczbowy problem główny (CP-SAT na wygenerowanych wzorcach)
+    # ==========================
+    model = cp_model.CpModel()
+    uzycia = [
+        model.NewIntVar(0, typy[wzorzec["typ"]]["dostepne"], f'uzycie_wzorca_{p}')
+        for p, wzorzec in enumerate(wzorce)
+    ]
+    for k, d in enumerate(popyt):
+        model.Add(sum(w["wektor"][k] * uzycia[p] for p, w in enumerate(wzorce) if w["wektor"][k]) >= d)
+    for t, typ in enumerate(typy):
+        model.Add(sum(uzycia[p] for p, w in enumerate(wzorce) if w["typ"] == t) <= typ["dostepne"])
+    koszt_calosciowy = sum(typy[w["typ"]]["price_int"] * uzycia[p] for p, w in enumerate(wzorce))
+    model.Add(koszt_calosciowy >= ograniczenie)
+    model.Minimize(koszt_calosciowy)
+    if najlepsze is not None:
+        for p, zmienna in enumerate(uzycia):
+            model.AddHint(zmienna, najlepsze.get(p, 0))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = limit_czasu
+    status = solver.Solve(model, ZatrzymaniePrzyOgraniczeniu(ograniczenie))
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        wynik = {p: solver.Value(zmienna) for p, zmienna in enumerate(uzycia)}
+        if najlepsze is None or koszt_uzyc(wynik) < koszt_uzyc(najlepsze):
+            najlepsze = wynik
+    if najlepsze is None:
+        # Ani heurystyka, ani wygenerowane wzorce nie pokryły popytu (np. przy ciasnym magazynie) –
+        # model pasów obejmuje wszystkie układy etapowe
+        status, wybrane = _model_pasow(typy, wymiary, popyt, etapy, ograniczenie, limit_czasu)
+        if status == cp_model.INFEASIBLE:
+            return None
+        if wybrane is None:
+            return None, None, ograniczenie / wspolczynnik_skalujacy
+        najlepsze = jako_uzycia(wybrane)
+        if status == cp_model.OPTIMAL:
+            ograniczenie = max(ograniczenie, koszt_uzyc(najlepsze))
+
+    # ==========================
+    # Rozwinięcie wzorców w układ na konkretnych arkuszach
+    # ==========================
+    kolejki = [list(reversed(t["indeksy"])) for t in typy_elementow]
+    licznik_instancji = [0] * len(typy)
+    uklad = []
+    for p, wzorzec in enumerate(wzorce):
+        typ = typy[wzorzec["typ"]]
+        for _ in range(najlepsze.get(p, 0)):
+            rozwiniecie = _rozwin_wzorzec(typ["arkusz"], wzorzec["transpozycja"], wzorzec["pasy"],
+                                          typy_elementow, kolejki, elementy, skala, grubosc_krawedzi)
+            if rozwiniecie is None:
+                continue
+            licznik_instancji[wzorzec["typ"]] += 1
+            instancja = typ["arkusz"].copy()
+            instancja["id"] = f'{typ["arkusz"]["id"]}_{licznik_instancji[wzorzec["typ"]]}'
+            polozenia, drzewo = rozwiniecie
+            uklad.append({"arkusz": instancja, "elementy": sorted(polozenia), "drzewo_ciec": drzewo})
+
+    koszt = sum(int(round(wpis["arkusz"]["price"] * wspolczynnik_skalujacy)) for wpis in uklad)
+    return uklad, koszt / wspolczynnik_skalujacy, ograniczenie / wspolczynnik_skalujacy
@@ -0,0 +1,229 @@
+from agregacja_popytu import agreguj_elementy
+
+
+def _typy_listew(oryginalne_listew, grubosc_krawedzi):
+    """
+    Zamienia katalog listew na listę typów z pojemnością (długość + rzaz)
+    i liczbą dostępnych sztuk.
+    """
+    return [
+        {
+            "listwa": listwa,
+            "pojemnosc": listwa["length"] + grubosc_krawedzi,
+            "dostepne": listwa.get("number_of_items", 1),
+        }
+        for listwa in oryginalne_listew
+    ]
+
+
+def _najwieksza_dostepna(typy, pozostalo, waga):
+    """Indeks najdłuższego typu listwy, który jest jeszcze dostępny i mieści kawałek o danej wadze."""
+    kandydaci = [
+        t for t, typ in enumerate(typy)
+        if pozostalo[t] > 0 and waga <= typ["listwa"]["length"]
+    ]
+    if not kandydaci:
+        return None
+    return max(kandydaci, key=lambda t: typy[t]["pojemnosc"])
+
+
+def _pakuj_malejaco(typy, elementy, grubosc_krawedzi, najlepsze_dopasowanie):
+    """
+    Wspólna implementacja first-fit decreasing i best-fit decreasing.
+
+    Kawałki sortowane są malejąco. Każdy trafia do pierwszej (FFD) albo najciaśniej
+    pasującej (BFD) otwartej listwy; gdy żadna nie pasuje, otwierana jest
+    najdłuższa dostępna listwa.
+    """
+    pozostalo = [typ["dostepne"] for typ in typy]
+    otwarte = []  # słowniki {"typ": t, "wolne": ..., "elementy": [...]}
+    for i in sorted(range(len(elementy)), key=lambda i: elementy[i], reverse=True):
+        waga = elementy[i] + grubosc_krawedzi
+        pasujace = [
+            listwa for listwa in otwarte
+            if listwa["wolne"] >= waga and waga <= typy[listwa["typ"]]["listwa"]["length"]
+        ]
+        if pasujace:
+            if najlepsze_dopasowanie:
+                cel = min(pasujace, key=lambda listwa: listwa["wolne"])
+            else:
+                cel = pasujace[0]
+        else:
+            t = _najwieksza_dostepna(typy, pozostalo, waga)
+            if t is None:
+                return None
+            pozostalo[t] -= 1
+            cel = {"typ": t, "wolne": typy[t]["pojemnosc"], "elementy": []}
+            otwarte.append(cel)
+        cel["elementy"].append(i)
+        cel["wolne"] -= waga
+    return otwarte
+
+
+def _zmniejsz_listwy(otwarte, typy, elementy, grubosc_krawedzi):
+    """
+    Po upakowaniu przenosi zawartość każdej listwy na najtańszy dostępny typ,
+    w którym się ona mieści. Listwy przetwarzane są od najbardziej obciążonej.
+    """
+    pozostalo = [typ["dostepne"] for typ in typy]
+    nowe_typy = []
+    for listwa in sorted(otwarte, key=lambda l: typy[l["typ"]]["pojemnosc"] - l["wolne"], reverse=True):
+        zajete = typy[listwa["typ"]]["pojemnosc"] - listwa["wolne"]
+        najdluzszy = max(elementy[i] for i in listwa["elementy"]) + grubosc_krawedzi
+        kandydaci = [
+            t for t, typ in enumerate(typy)
+            if pozostalo[t] > 0 and zajete <= typ["pojemnosc"] and najdluzszy <= typ["listwa"]["length"]
+        ]
+        if not kandydaci:
+            return otwarte
+        t = min(kandydaci, key=lambda t: typy[t]["listwa"]["price"])
+        pozostalo[t] -= 1
+        nowe_typy.append((listwa, t, zajete))
+    return [
+        {"typ": t, "wolne": typy[t]["pojemnosc"] - zajete, "elementy": listwa["elementy"]}
+        for listwa, t, zajete in nowe_typy
+    ]
+
+
+def first_fit_decreasing(oryginalne_listew, elementy, grubosc_krawedzi):
+    """First-fit decreasing z dopasowaniem typów listew do zawartości na końcu."""
+    typy = _typy_listew(oryginalne_listew, grubosc_krawedzi)
+    otwarte = _pakuj_malejaco(typy, elementy, grubosc_krawedzi, najlepsze_dopasowanie=False)
+    if otwarte is None:
+        return None
+    return _uklad(_zmniejsz_listwy(otwarte, typy, elementy, grubosc_krawedzi), typy, elementy, grubosc_krawedzi)
+
+
+def best_fit_decreasing(oryginalne_listew, elementy, grubosc_krawedzi):
+    """Best-fit decreasing z dopasowaniem typów listew do zawartości na końcu."""
+    typy = _typy_listew(oryginalne_listew, grubosc_krawedzi)
+    otwarte = _pakuj_malejaco(typy, elementy, grubosc_krawedzi, najlepsze_dopasowanie=True)
+    if otwarte is None:
+        return None
+    return _uklad(_zmniejsz_listwy(otwarte, typy, elementy, grubosc_krawedzi), typy, elementy, grubosc_krawedzi)
+
+
+def najtansze_wypelnienie(oryginalne_listew, elementy, grubosc_krawedzi):
+    """
+    Heurystyka uwzględniająca koszt.
+
+    Listwy otwierane są pojedynczo. Dla każdego dostępnego typu symulowane jest
+    zachłanne wypełnienie pozostałymi kawałkami (od najdłuższych), po czym wybierany
+    jest typ o najniższej cenie za milimetr faktycznie wykorzystanej długości.
+    Działa na zagregowanym popycie, więc koszt zależy od liczby różnych długości.
+    """
+    typy = _typy_listew(oryginalne_listew, grubosc_krawedzi)
+    typy_elementow = sorted(agreguj_elementy(elementy), key=lambda t: t["rozmiar"], reverse=True)
+    kolejki = [list(reversed(t["indeksy"])) for t in typy_elementow]
+    pozostalo = [typ["dostepne"] for typ in typy]
+
+    def wypelnij(t):
+        wolne = typy[t]["pojemnosc"]
+        liczby = []
+        for k, typ_elementu in enumerate(typy_elementow):
+            waga = typ_elementu["rozmiar"] + grubosc_krawedzi
+            if waga > typy[t]["listwa"]["length"]:
+                liczby.append(0)
+                continue
+            n = min(len(kolejki[k]), wolne // waga)
+            liczby.append(n)
+            wolne -= n * waga
+        return liczby, typy[t]["pojemnosc"] - wolne
+
+    otwarte = []
+    while any(kolejki):
+        najlepszy = None
+        for t in range(len(typy)):
+            if pozostalo[t] == 0:
+                continue
+            liczby, zajete = wypelnij(t)
+            if zajete == 0:
+                continue
+            wskaznik = typy[t]["listwa"]["price"] / zajete
+            if najlepszy is None or wskaznik < najlepszy[0]:
+                najlepszy = (wskaznik, t, liczby, zajete)
+        if najlepszy is None:
+            return None
+        _, t, liczby, zajete = najlepszy
+        pozostalo[t] -= 1
+        na_listwie = []
+        for k, n in enumerate(liczby):
+            na_listwie.extend(kolejki[k].pop() for _ in range(n))
+        otwarte.append({"typ": t, "wolne": typy[t]["pojemnosc"] - zajete, "elementy": na_listwie})
+    return _uklad(otwarte, typy, elementy, grubosc_krawedzi)
+
+
+def _uklad(otwarte, typy, elementy, grubosc_krawedzi):
+    """
+    Zamienia listę otwartych listew na układ w formacie wspólnym dla wszystkich silników:
+    krotkę (uklad, koszt), gdzie pozycje kawałków są wyznaczone kolejno z odstępem rzazu.
+    """
+    wspolczynnik_skalujacy = 100
+    licznik_instancji = [0] * len(typy)
+    uklad = []
+    for listwa in otwarte:
+        t = listwa["typ"]
+        licznik_instancji[t] += 1
+        instancja = typy[t]["listwa"].copy()
+        instancja["id"] = f'{typy[t]["listwa"]["id"]}_{licznik_instancji[t]}'
+        na_listwie = []
+        pozycja = 0
+        for i in sorted(listwa["elementy"], key=lambda i: elementy[i], reverse=True):
+            na_listwie.append((i, pozycja))
+            pozycja += elementy[i] + grubosc_krawedzi
+        uklad.append({"listwa": instancja, "elementy": na_listwie})
+    koszt = sum(int(round(wpis["listwa"]["price"] * wspolczynnik_skalujacy)) for wpis in uklad)
+    return uklad, koszt / wspolczynnik_skalujacy
+
+
+HEURYSTYKI = {
+    "ffd": first_fit_decreasing,
+    "bfd": best_fit_decreasing,
+    "koszt": najtansze_wypelnienie,
+}
+
+
+def rozwiaz_heurystycznie(oryginalne_listew, elementy, grubosc_krawedzi, heurystyka="koszt"):
+    """
+    Szybkie rozwiązanie bez solvera.
+
+    Parametry:
+      - heurystyka: "ffd" (first-fit decreasing), "bfd" (best-fit decreasing),
+                    "koszt" (najtańsze wypełnienie) albo "najlepsza" – uruchamia wszystkie
+                    i zwraca najtańszy wynik
+
+    Zwraca krotkę (uklad, koszt) albo None, jeśli któregoś kawałka nie da się zmieścić
+    w dostępnych listwach.
+    """
+    if heurystyka == "najlepsza":
+        wyniki = [f(oryginalne_listew, elementy, grubosc_krawedzi) for f in HEURYSTYKI.values()]
+        wyniki = [w for w in wyniki if w is not None]
+        return min(wyniki, key=lambda w: w[1]) if wyniki else None
+    if heurystyka not in HEURYSTYKI:
+        raise ValueError(f"Nieznana heurystyka: {heurystyka}")
+    return HEURYSTYKI[heurystyka](oryginalne_listew, elementy, grubosc_krawedzi)
+
+
+def przypisz_do_instancji(uklad, opcje_listew, elementy):
+    """
+    Mapuje listwy z układu heurystycznego na indeksy instancji w opcje_listew
+    (identyczne instancje – ta sama długość i cena – przydzielane są kolejno,
+    od najbardziej obciążonej listwy), tak aby podpowiedź była zgodna
+    z łamaniem symetrii.
+
+    Zwraca listę krotek (indeks_instancji, [(indeks_elementu, pozycja), ...])
+    albo None, jeśli układ używa więcej listew danego typu niż jest instancji.
+    """
+    wolne_instancje = {}
+    for s, opcja in enumerate(opcje_listew):
+        wolne_instancje.setdefault((opcja["length"], opcja["price"]), []).append(s)
+    for kolejka in wolne_instancje.values():
+        kolejka.reverse()
+
+    wynik = []
+    for wpis in sorted(uklad, key=lambda w: sum(elementy[i] for i, _ in w["elementy"]), reverse=True):
+        kolejka = wolne_instancje.get((wpis["listwa"]["length"], wpis["listwa"]["price"]))
+        if not kolejka:
+            return None
+        wynik.append((kolejka.pop(), wpis["elementy"]))
+    return wynik
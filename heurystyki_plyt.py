@@ -0,0 +1,384 @@
+from agregacja_popytu import agreguj_elementy
+
+
+# ==========================
+# Pakowanie jednego arkusza
+# ==========================
+# Każdy sposób pakowania to para funkcji (nowy, wstaw):
+#   - nowy(szerokosc, wysokosc) zwraca stan pustego arkusza,
+#   - wstaw(stan, szer, wys, obrot_dozwolony) szuka miejsca na prostokąt, aktualizuje stan
+#     i zwraca krotkę (x, y, obrot) albo None, jeśli prostokąt się nie mieści.
+# Wymiary prostokątów zawierają już grubość cięcia.
+
+def _maxrects_nowy(szerokosc, wysokosc):
+    """Stan MaxRects: lista maksymalnych wolnych prostokątów (x, y, szer, wys)."""
+    return {"wolne": [(0, 0, szerokosc, wysokosc)]}
+
+
+def _maxrects_wstaw(stan, szer, wys, obrot_dozwolony, ocena):
+    """
+    Wstawia prostokąt w wolny prostokąt o najlepszej ocenie (mniejsza jest lepsza),
+    po czym dzieli wszystkie przecinane wolne prostokąty na maksymalne części.
+    """
+    najlepszy = None
+    orientacje = [(szer, wys, False)] + ([(wys, szer, True)] if obrot_dozwolony else [])
+    for fx, fy, fw, fh in stan["wolne"]:
+        for w, h, obrot in orientacje:
+            if w <= fw and h <= fh:
+                wartosc = ocena(fw, fh, w, h)
+                if najlepszy is None or wartosc < najlepszy[0]:
+                    najlepszy = (wartosc, fx, fy, w, h, obrot)
+    if najlepszy is None:
+        return None
+    _, x, y, w, h, obrot = najlepszy
+    stan["wolne"] = odejmij_prostokat(stan["wolne"], x, y, w, h)
+    return x, y, obrot
+
+
+def odejmij_prostokat(wolne, x, y, w, h):
+    """
+    Dzieli wszystkie wolne prostokąty (x, y, szer, wys) przecinane przez zajęty prostokąt
+    na maksymalne części i zwraca nową listę maksymalnych wolnych prostokątów.
+    """
+    nowe = []
+    for fx, fy, fw, fh in wolne:
+        if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+            nowe.append((fx, fy, fw, fh))
+            continue
+        if x > fx:
+            nowe.append((fx, fy, x - fx, fh))
+        if x + w < fx + fw:
+            nowe.append((x + w, fy, fx + fw - x - w, fh))
+        if y > fy:
+            nowe.append((fx, fy, fw, y - fy))
+        if y + h < fy + fh:
+            nowe.append((fx, y + h, fw, fy + fh - y - h))
+    # Usuwamy prostokąty zawarte w innych (oraz duplikaty)
+    nowe = list(dict.fromkeys(nowe))
+    return [
+        a for a in nowe
+        if not any(b != a and b[0] <= a[0] and b[1] <= a[1]
+                   and a[0] + a[2] <= b[0] + b[2] and a[1] + a[3] <= b[1] + b[3] for b in nowe)
+    ]
+
+
+def _ocena_bssf(fw, fh, w, h):
+    """Best short side fit: najmniejszy krótszy odpad, przy remisie dłuższy."""
+    odpady = (fw - w, fh - h)
+    return min(odpady), max(odpady)
+
+
+def _ocena_baf(fw, fh, w, h):
+    """Best area fit: najmniejszy wolny prostokąt, przy remisie krótszy odpad."""
+    return fw * fh - w * h, min(fw - w, fh - h)
+
+
+def _skyline_nowy(szerokosc, wysokosc):
+    """Stan Skyline: linia horyzontu jako lista odcinków [x, y, szerokość] od lewej."""
+    return {"szerokosc": szerokosc, "wysokosc": wysokosc, "linia": [[0, 0, szerokosc]]}
+
+
+def _skyline_wstaw(stan, szer, wys, obrot_dozwolony):
+    """
+    Skyline bottom-left: prostokąt kładziony jest na linii horyzontu tam, gdzie jego
+    górna krawędź będzie najniżej (przy remisie najbardziej na lewo).
+    """
+    linia = stan["linia"]
+    najlepszy = None
+    orientacje = [(szer, wys, False)] + ([(wys, szer, True)] if obrot_dozwolony else [])
+    for w, h, obrot in orientacje:
+        for j, (x, _, _) in enumerate(linia):
+            if x + w > stan["szerokosc"]:
+                break
+            # Prostokąt leży na najwyższym odcinku, nad którym się znajduje
+            y, k = 0, j
+            while k < len(linia) and linia[k][0] < x + w:
+                y = max(y, linia[k][1])
+                k += 1
+            if y + h <= stan["wysokosc"] and (najlepszy is None or (y + h, x) < najlepszy[0]):
+                najlepszy = ((y + h, x), x, y, w, h, obrot)
+    if najlepszy is None:
+        return None
+    _, x, y, w, h, obrot = najlepszy
+
+    nowa = []
+    for sx, sy, sw in linia:
+        # Części odcinków wystające poza nowy prostokąt zostają
+        if sx < x:
+            nowa.append([sx, sy, min(sw, x - sx)])
+        if sx + sw > x + w:
+            poczatek = max(sx, x + w)
+            nowa.append([poczatek, sy, sx + sw - poczatek])
+    nowa.append([x, y + h, w])
+    nowa.sort()
+    # Sąsiednie odcinki na tej samej wysokości łączymy
+    stan["linia"] = [nowa[0]]
+    for odcinek in nowa[1:]:
+        if odcinek[1] == stan["linia"][-1][1]:
+            stan["linia"][-1][2] += odcinek[2]
+        else:
+            stan["linia"].append(odcinek)
+    return x, y, obrot
+
+
+def _polki_nowy(szerokosc, wysokosc):
+    """Stan pakowania półkowego: półki [y, wysokość, zajęta szerokość] od dołu."""
+    return {"szerokosc": szerokosc, "wysokosc": wysokosc, "polki": []}
+
+
+def _polki_wstaw(stan, szer, wys, obrot_dozwolony, pierwsza_pasujaca):
+    """
+    Pakowanie półkowe. Next fit (NFDH) próbuje tylko ostatniej półki, first fit (FFDH)
+    wszystkich po kolei. Na istniejącej półce wybierana jest orientacja o mniejszej
+    szerokości, nowa półka powstaje w orientacji o mniejszej wysokości.
+    Układ półkowy jest zawsze gilotynowy.
+    """
+    orientacje = [(szer, wys, False)] + ([(wys, szer, True)] if obrot_dozwolony else [])
+    polki = stan["polki"] if pierwsza_pasujaca else stan["polki"][-1:]
+    for polka in polki:
+        pasujace = [o for o in orientacje if o[1] <= polka[1] and polka[2] + o[0] <= stan["szerokosc"]]
+        if pasujace:
+            w, _, obrot = min(pasujace)
+            x = polka[2]
+            polka[2] += w
+            return x, polka[0], obrot
+
+    y = stan["polki"][-1][0] + stan["polki"][-1][1] if stan["polki"] else 0
+    pasujace = [o for o in orientacje if o[0] <= stan["szerokosc"] and y + o[1] <= stan["wysokosc"]]
+    if not pasujace:
+        return None
+    w, h, obrot = min(pasujace, key=lambda o: (o[1], o[0]))
+    stan["polki"].append([y, h, w])
+    return 0, y, obrot
+
+
+# Sposoby pakowania: (nowy, wstaw, klucz sortowania elementów malejąco po wymiarach z rzazem)
+PAKOWANIA = {
+    "maxrects_bssf": (_maxrects_nowy, lambda stan, w, h, o: _maxrects_wstaw(stan, w, h, o, _ocena_bssf),
+                      lambda w, h: (w * h, max(w, h))),
+    "maxrects_baf": (_maxrects_nowy, lambda stan, w, h, o: _maxrects_wstaw(stan, w, h, o, _ocena_baf),
+                     lambda w, h: (w * h, max(w, h))),
+    "skyline": (_skyline_nowy, _skyline_wstaw, lambda w, h: (max(w, h), min(w, h))),
+    "nfdh": (_polki_nowy, lambda stan, w, h, o: _polki_wstaw(stan, w, h, o, False),
+             lambda w, h: (min(w, h), max(w, h))),
+    "ffdh": (_polki_nowy, lambda stan, w, h, o: _polki_wstaw(stan, w, h, o, True),
+             lambda w, h: (min(w, h), max(w, h))),
+}
+
+
+# ==========================
+# Pakowanie wielu arkuszy
+# ==========================
+def _wypelnij_arkusz(typ, kolejka, wymiary, pakowanie):
+    """Wypełnia pusty arkusz danego typu elementami z kolejki (w jej kolejności, z pomijaniem)."""
+    nowy, wstaw, _ = pakowanie
+    stan = nowy(typ["width"], typ["height"])
+    polozenia = []
+    for i in kolejka:
+        szer, wys = wymiary[i]
+        miejsce = wstaw(stan, szer, wys, szer != wys)
+        if miejsce is not None:
+            polozenia.append((i, *miejsce))
+    return polozenia
+
+
+def _pakuj(typy_arkuszy, elementy, grubosc_krawedzi, pakowanie):
+    """
+    Pakuje elementy arkusz po arkuszu z uwzględnieniem kosztu.
+
+    Dla każdego dostępnego typu symulowane jest wypełnienie pustego arkusza pozostałymi
+    elementami; otwierany jest typ o najniższej cenie za mm² faktycznie wyciętych elementów
+    (przy remisie – z większym polem elementów).
+
+    Zwraca listę krotek (indeks_typu, [(indeks_elementu, x, y, obrot), ...]) albo None,
+    jeśli któregoś elementu nie da się umieścić w dostępnych arkuszach.
+    """
+    wymiary = [(szer + grubosc_krawedzi, wys + grubosc_krawedzi) for szer, wys in elementy]
+    kolejka = sorted(range(len(elementy)), key=lambda i: pakowanie[2](*wymiary[i]), reverse=True)
+    pozostalo = [typ.get("number_of_items", 1) for typ in typy_arkuszy]
+    arkusze = []
+    while kolejka:
+        najlepszy = None
+        for t, typ in enumerate(typy_arkuszy):
+            if pozostalo[t] == 0:
+                continue
+            polozenia = _wypelnij_arkusz(typ, kolejka, wymiary, pakowanie)
+            if not polozenia:
+                continue
+            pole = sum(elementy[i][0] * elementy[i][1] for i, *_ in polozenia)
+            klucz = (typ["price"] / pole, -pole)
+            if najlepszy is None or klucz < najlepszy[0]:
+                najlepszy = (klucz, t, polozenia)
+        if najlepszy is None:
+            return None
+        _, t, polozenia = najlepszy
+        pozostalo[t] -= 1
+        umieszczone = {i for i, *_ in polozenia}
+        kolejka = [i for i in kolejka if i not in umieszczone]
+        arkusze.append((t, polozenia))
+    return arkusze
+
+
+def _obrys(polozenia, elementy, grubosc_krawedzi):
+    """Wymiary zajętej części arkusza (szerokość, wysokość) z grubością cięcia."""
+    szerokosc = wysokosc = 0
+    for i, x, y, obrot in polozenia:
+        szer, wys = elementy[i][::-1] if obrot else elementy[i]
+        szerokosc = max(szerokosc, x + szer + grubosc_krawedzi)
+        wysokosc = max(wysokosc, y + wys + grubosc_krawedzi)
+    return szerokosc, wysokosc
+
+
+def _transponuj(polozenia, elementy):
+    """Odbija układ względem przekątnej arkusza (x <-> y, obrót niekwadratowych elementów)."""
+    return [(i, y, x, obrot != (elementy[i][0] != elementy[i][1])) for i, x, y, obrot in polozenia]
+
+
+def _miesci_obrys(arkusz, szerokosc, wysokosc):
+    """Czy obrys mieści się w arkuszu: 0 – wprost, 1 – po transpozycji, None – wcale."""
+    if szerokosc <= arkusz["width"] and wysokosc <= arkusz["height"]:
+        return 0
+    if wysokosc <= arkusz["width"] and szerokosc <= arkusz["height"]:
+        return 1
+    return None
+
+
+def _zmniejsz_arkusze(arkusze, typy_arkuszy, elementy, grubosc_krawedzi):
+    """
+    Po upakowaniu przenosi zawartość każdego arkusza na najtańszy dostępny typ, w którym
+    mieści się zajęta część arkusza (wprost albo po transpozycji całego układu).
+    Arkusze przetwarzane są od najdroższego.
+    """
+    pozostalo = [typ.get("number_of_items", 1) for typ in typy_arkuszy]
+    nowe = []
+    for t, polozenia in sorted(arkusze, key=lambda a: typy_arkuszy[a[0]]["price"], reverse=True):
+        obrys = _obrys(polozenia, elementy, grubosc_krawedzi)
+        kandydaci = [
+            u for u, typ in enumerate(typy_arkuszy)
+            if pozostalo[u] > 0 and _miesci_obrys(typ, *obrys) is not None
+        ]
+        if not kandydaci:
+            return arkusze
+        u = min(kandydaci, key=lambda u: (typy_arkuszy[u]["price"], u != t))
+        pozostalo[u] -= 1
+        if _miesci_obrys(typy_arkuszy[u], *obrys) == 1:
+            polozenia = _transponuj(polozenia, elementy)
+        nowe.append((u, polozenia))
+    return nowe
+
+
+def _uklad(arkusze, typy_arkuszy):
+    """
+    Zamienia listę arkuszy na układ w formacie wspólnym dla wszystkich silników:
+    krotkę (uklad, koszt), gdzie każdy użyty arkusz ma listę (indeks_elementu, x, y, obrot).
+    """
+    wspolczynnik_skalujacy = 100
+    licznik_instancji = [0] * len(typy_arkuszy)
+    uklad = []
+    for t, polozenia in arkusze:
+        licznik_instancji[t] += 1
+        instancja = typy_arkuszy[t].copy()
+        instancja["id"] = f'{typy_arkuszy[t]["id"]}_{licznik_instancji[t]}'
+        uklad.append({"arkusz": instancja, "elementy": sorted(polozenia)})
+    koszt = sum(int(round(wpis["arkusz"]["price"] * wspolczynnik_skalujacy)) for wpis in uklad)
+    return uklad, koszt / wspolczynnik_skalujacy
+
+
+def pakuj(typy_arkuszy, elementy, grubosc_krawedzi, sposob):
+    """
+    Rozwiązanie heurystyczne jednym sposobem pakowania (klucz słownika PAKOWANIA).
+
+    Parametry:
+      - typy_arkuszy: lista typów arkuszy z "number_of_items" (np. z generuj_typy_arkuszy)
+      - elementy: lista krotek (szerokość, wysokość)
+      - grubosc_krawedzi: grubość cięcia (mm), doliczana do obu wymiarów elementu
+
+    Zwraca krotkę (uklad, koszt) albo None.
+    """
+    arkusze = _pakuj(typy_arkuszy, elementy, grubosc_krawedzi, PAKOWANIA[sposob])
+    if arkusze is None:
+        return None
+    return _uklad(_zmniejsz_arkusze(arkusze, typy_arkuszy, elementy, grubosc_krawedzi), typy_arkuszy)
+
+
+def rozwiaz_heurystycznie(typy_arkuszy, elementy, grubosc_krawedzi, heurystyka="najlepsza"):
+    """
+    Szybkie rozwiązanie bez solvera (zwykle w ułamku sekundy).
+
+    Parametry:
+      - typy_arkuszy: lista typów arkuszy z "number_of_items" (np. z generuj_typy_arkuszy)
+      - heurystyka: "maxrects_bssf", "maxrects_baf" (MaxRects z regułą best short side fit
+                    albo best area fit), "skyline" (bottom-left), "nfdh", "ffdh" (półki:
+                    next/first fit decreasing height) albo "najlepsza" – uruchamia wszystkie
+                    i zwraca najtańszy wynik
+
+    Zwraca krotkę (uklad, koszt) albo None, jeśli któregoś elementu nie da się zmieścić
+    w dostępnych arkuszach.
+    """
+    if heurystyka == "najlepsza":
+        wyniki = [pakuj(typy_arkuszy, elementy, grubosc_krawedzi, sposob) for sposob in PAKOWANIA]
+        wyniki = [w for w in wyniki if w is not None]
+        return min(wyniki, key=lambda w: w[1]) if wyniki else None
+    if heurystyka not in PAKOWANIA:
+        raise ValueError(f"Nieznana heurystyka: {heurystyka}")
+    return pakuj(typy_arkuszy, elementy, grubosc_krawedzi, heurystyka)
+
+
+# ==========================
+# Podpowiedź dla CP-SAT
+# ==========================
+def przypisz_do_instancji(uklad, opcje_arkuszy, elementy, grubosc_krawedzi):
+    """
+    Mapuje arkusze z układu heurystycznego na indeksy instancji w opcje_arkuszy.
+
+    Identyczne instancje (te same wymiary i cena) przydzielane są kolejno, od najbardziej
+    obciążonego arkusza, tak aby podpowiedź była zgodna z łamaniem symetrii. Jeśli typu
+    arkusza z heurystyki nie ma wśród opcji (np. odpadł jako zdominowany), układ trafia
+    na najtańszą wolną instancję nie droższą od niego, w której mieści się zajęta część
+    arkusza – w razie potrzeby po transpozycji.
+
+    Zwraca listę krotek (indeks_instancji, [(indeks_elementu, x, y, obrot), ...])
+    albo None, jeśli nie starczy instancji.
+    """
+    wolne_instancje = {}
+    for s, opcja in enumerate(opcje_arkuszy):
+        wolne_instancje.setdefault((opcja["width"], opcja["height"], opcja["price"]), []).append(s)
+    for kolejka in wolne_instancje.values():
+        kolejka.reverse()
+
+    def obciazenie(wpis):
+        return sum(elementy[i][0] * elementy[i][1] for i, *_ in wpis["elementy"])
+
+    wynik = []
+    for wpis in sorted(uklad, key=obciazenie, reverse=True):
+        arkusz = wpis["arkusz"]
+        polozenia = wpis["elementy"]
+        klucz = (arkusz["width"], arkusz["height"], arkusz["price"])
+        if not wolne_instancje.get(klucz):
+            obrys = _obrys(polozenia, elementy, grubosc_krawedzi)
+            kandydaci = [
+                k for k, kolejka in wolne_instancje.items()
+                if kolejka and k[2] <= arkusz["price"]
+                and _miesci_obrys({"width": k[0], "height": k[1]}, *obrys) is not None
+            ]
+            if not kandydaci:
+                return None
+            klucz = min(kandydaci, key=lambda k: (k[2], k[0] * k[1]))
+            if _miesci_obrys({"width": klucz[0], "height": klucz[1]}, *obrys) == 1:
+                polozenia = _transponuj(polozenia, elementy)
+        wynik.append((wolne_instancje[klucz].pop(), polozenia))
+    return wynik
+
+
+def polozenia_elementow(mapowanie, elementy):
+    """
+    Słownik {indeks_elementu: (indeks_instancji, x, y, obrot)} z wyniku przypisz_do_instancji.
+
+    Kopie tego samego elementu są wymienne, więc ich położenia rozdzielane są rosnąco
+    po (instancja, x) – zgodnie z porządkiem kopii w modelu.
+    """
+    polozenia = {i: (s, x, y, obrot) for s, na_arkuszu in mapowanie for i, x, y, obrot in na_arkuszu}
+    for typ in agreguj_elementy(elementy):
+        for i, polozenie in zip(typ["indeksy"], sorted(polozenia[i] for i in typ["indeksy"])):
+            polozenia[i] = polozenie
+    return polozenia
@@ -0,0 +1,360 @@
+import random
+import time
+
+from gilotyna import przenumeruj_drzewo
+from heurystyki_plyt import rozwiaz_heurystycznie
+from ograniczenia_plyt import dolne_ograniczenia
+from rozwiazywanie import PostepRozwiazywania
+from wyniki import Wynik
+
+
+def _typ_instancji(arkusz):
+    """Id typu arkusza z id instancji ("<id typu>_<numer>")."""
+    return arkusz["id"].rsplit("_", 1)[0]
+
+
+def _ponumeruj(uklad):
+    """Kopia układu z instancjami numerowanymi kolejno w obrębie każdego typu."""
+    licznik_instancji = {}
+    nowy = []
+    for wpis in uklad:
+        typ = _typ_instancji(wpis["arkusz"])
+        licznik_instancji[typ] = licznik_instancji.get(typ, 0) + 1
+        nowy.append(dict(wpis, arkusz=dict(wpis["arkusz"], id=f'{typ}_{licznik_instancji[typ]}')))
+    return nowy
+
+
+def _przeindeksuj(uklad, mapa):
+    """Kopia układu z indeksami elementów zamienionymi według mapa."""
+    return [
+        dict(wpis, elementy=[(mapa[i], x, y, obrot) for i, x, y, obrot in wpis["elementy"]])
+        for wpis in uklad
+    ]
+
+
+def _pozostaly_magazyn(typy_arkuszy, uklad):
+    """Typy arkuszy z liczbą sztuk pomniejszoną o arkusze układu; typy bez wolnych sztuk odpadają."""
+    zajete = {}
+    for wpis in uklad:
+        typ = _typ_instancji(wpis["arkusz"])
+        zajete[typ] = zajete.get(typ, 0) + 1
+    return [
+        dict(typ, number_of_items=typ["number_of_items"] - zajete.get(typ["id"], 0))
+        for typ in typy_arkuszy
+        if typ["number_of_items"] > zajete.get(typ["id"], 0)
+    ]
+
+
+def _koszt(uklad):
+    """Koszt układu w groszach."""
+    return sum(int(round(wpis["arkusz"]["price"] * 100)) for wpis in uklad)
+
+
+def _wykorzystanie(wpis, elementy):
+    """Ułamek powierzchni arkusza zajęty przez elementy (bez rzazu)."""
+    pole = sum(elementy[i][0] * elementy[i][1] for i, *_ in wpis["elementy"])
+    return pole / (wpis["arkusz"]["width"] * wpis["arkusz"]["height"])
+
+
+def _koncentracja(uklad, elementy):
+    """Suma kwadratów wykorzystania – rośnie, gdy elementy skupiają się na mniejszej liczbie arkuszy."""
+    return sum(_wykorzystanie(wpis, elementy) ** 2 for wpis in uklad)
+
+
+def _wybierz_arkusze(uklad, elementy, liczba_arkuszy, maks_elementow, strategia, losowosc):
+    """
+    Indeksy arkuszy układu, których elementy zostaną uwolnione.
+
+    Strategia "najgorsze" bierze najsłabiej wykorzystane arkusze i jeden losowy
+    (żeby kolejne sąsiedztwa się różniły), "losowe" – losowe arkusze. Arkusze
+    z elementami ponad limit maks_elementow są pomijane (pierwszy arkusz jest brany zawsze).
+    """
+    kolejnosc = list(range(len(uklad)))
+    losowosc.shuffle(kolejnosc)
+    if strategia == "najgorsze":
+        najgorsze = sorted(kolejnosc, key=lambda s: _wykorzystanie(uklad[s], elementy))[:liczba_arkuszy - 1]
+        kolejnosc = najgorsze + [s for s in kolejnosc if s not in najgorsze]
+    wybrane = []
+    liczba_elementow = 0
+    for s in kolejnosc:
+        if len(wybrane) == liczba_arkuszy:
+            break
+        if wybrane and liczba_elementow + len(uklad[s]["elementy"]) > maks_elementow:
+            continue
+        wybrane.append(s)
+        liczba_elementow += len(uklad[s]["elementy"])
+    return wybrane
+
+
+def rozwiaz_lns(funkcja_rozwiazujaca, typy_arkuszy, grubosc_krawedzi, elementy, limit_czasu=60.0,
+                limit_podproblemu=5.0, liczba_arkuszy=3, maks_elementow=30, wzgledna_luka=None,
+                postep=None, ziarno=0, heurystyka="najlepsza", **parametry):
+    """
+    Przeszukiwanie dużego sąsiedztwa (LNS) dla dużych zleceń arkuszy.
+
+    Zaczyna od rozwiązania heurystycznego (heurystyki_plyt), a potem w pętli uwalnia
+    elementy z kilku arkuszy – na przemian najsłabiej wykorzystanych i losowych – i układa
+    je od nowa modelem CP-SAT (funkcja_rozwiazujaca) na arkuszach, które pozostały
+    w magazynie. Podproblem startuje z dotychczasowego układu tych arkuszy, więc nigdy
+    go nie pogarsza; nowy układ jest przyjmowany, gdy jest tańszy albo – przy równym
+    koszcie – skupia elementy na mniejszej liczbie arkuszy. Liczba uwalnianych arkuszy
+    rośnie, gdy podproblem zostaje rozwiązany optymalnie bez poprawy, i maleje,
+    gdy podproblem nie mieści się w limicie czasu.
+
+    Parametry:
+      - funkcja_rozwiazujaca: rozwiaz z planowanie_plyt (albo planowanie_plyt_gilotine),
+                              wywoływana z rozwiazanie_startowe i silnik="cp_sat"
+      - typy_arkuszy: lista typów arkuszy z "number_of_items" (np. z generuj_typy_arkuszy)
+      - grubosc_krawedzi: grubość cięcia (mm)
+      - elementy: lista krotek (szerokość, wysokość)
+      - limit_czasu: łączny budżet czasu w sekundach
+      - limit_podproblemu: limit czasu solvera dla jednego podproblemu (s)
+      - liczba_arkuszy: początkowa liczba arkuszy uwalnianych w jednej iteracji
+      - maks_elementow: maksymalna liczba elementów w podproblemie
+      - wzgledna_luka: względna luka względem dolnego ograniczenia, przy której LNS kończy pracę
+      - postep: opcjonalny PostepRozwiazywania – dostaje zdarzenie z każdą poprawą,
+                jego parametry solvera przechodzą na podproblemy, a przerwij() przerywa
+                bieżący podproblem i kończy LNS
+      - ziarno: ziarno generatora liczb losowych (powtarzalne przebiegi)
+      - heurystyka: heurystyka rozwiązania startowego (jak w rozwiaz_heurystycznie)
+      - pozostałe parametry (np. formulacja, lamanie_symetrii) trafiają do funkcja_rozwiazujaca
+
+    Zwraca obiekt Wynik z czasami "rozgrzewka" i "rozwiazanie" oraz historią poprawek.
+    """
+    start = time.perf_counter()
+    wspolczynnik_skalujacy = 100
+    losowosc = random.Random(ziarno)
+    czasy = {}
+
+    podpowiedz = rozwiaz_heurystycznie(typy_arkuszy, elementy, grubosc_krawedzi, heurystyka)
+    ograniczenia = dolne_ograniczenia(typy_arkuszy, elementy, grubosc_krawedzi)
+    czasy["rozgrzewka"] = time.perf_counter() - start
+    if ograniczenia is None:
+        return Wynik(status="INFEASIBLE", elementy=list(elementy), czasy=czasy)
+    if podpowiedz is None:
+        # Heurystyka nie zmieściła elementów w magazynie (to nie dowód braku rozwiązania) –
+        # bez układu startowego całe zlecenie trafia do modelu CP-SAT w ramach budżetu
+        return funkcja_rozwiazujaca(typy_arkuszy, False, grubosc_krawedzi, elementy,
+                                    limit_czasu=max(0.0, limit_czasu - (time.perf_counter() - start)),
+                                    wzgledna_luka=wzgledna_luka, silnik="cp_sat", postep=postep, **parametry)
+    ograniczenie = ograniczenia[0]
+    uklad = _ponumeruj(podpowiedz[0])
+    koszt = _koszt(uklad)
+    historia = []
+
+    def zapisz_poprawe():
+        zdarzenie = {
+            "koszt": koszt / wspolczynnik_skalujacy,
+            "ograniczenie": ograniczenie / wspolczynnik_skalujacy,
+            "czas": time.perf_counter() - start,
+        }
+        historia.append(dict(zdarzenie))
+        if postep is not None:
+            postep.historia.append(dict(zdarzenie))
+            if postep.przy_rozwiazaniu is not None:
+                postep.przy_rozwiazaniu(dict(zdarzenie, uklad=uklad))
+
+    def osiagnieto_cel():
+        if koszt <= ograniczenie:
+            return True
+        return wzgledna_luka is not None and koszt - ograniczenie <= wzgledna_luka * koszt
+
+    zapisz_poprawe()
+    strategie = ("najgorsze", "losowe")
+    iteracja = 0
+    while not osiagnieto_cel() and not (postep is not None and postep.przerwano):
+        pozostalo = limit_czasu - (time.perf_counter() - start)
+        if pozostalo <= 0:
+            break
+        wybrane = _wybierz_arkusze(uklad, elementy, liczba_arkuszy, maks_elementow,
+                                   strategie[iteracja % len(strategie)], losowosc)
+        iteracja += 1
+        calosc = len(wybrane) == len(uklad)
+
+        # Podproblem: uwolnione elementy (indeksy lokalne) na arkuszach, które zostały w magazynie
+        indeksy = [i for s in wybrane for i, *_ in uklad[s]["elementy"]]
+        typy_podproblemu = _pozostaly_magazyn(typy_arkuszy,
+                                              [wpis for s, wpis in enumerate(uklad) if s not in wybrane])
+        uklad_startowy = _przeindeksuj([uklad[s] for s in wybrane], {i: n for n, i in enumerate(indeksy)})
+        koszt_startowy = _koszt(uklad_startowy)
+        podproblem = PostepRozwiazywania()
+        if postep is not None:
+            podproblem.parametry = postep.parametry
+            postep.podrzedny = podproblem
+            if postep.przerwano:
+                break
+        wynik = funkcja_rozwiazujaca(typy_podproblemu, False, grubosc_krawedzi, [elementy[i] for i in indeksy],
+                                     limit_czasu=min(limit_podproblemu, pozostalo), silnik="cp_sat",
+                                     rozwiazanie_startowe=(uklad_startowy, koszt_startowy / wspolczynnik_skalujacy),
+                                     postep=podproblem, **parametry)
+        if not wynik.znaleziono:
+            liczba_arkuszy = max(2, liczba_arkuszy - 1)
+            continue
+
+        nowe = _przeindeksuj(wynik.uklad, indeksy)
+        nowy_koszt = _koszt(nowe)
+        poprawa = nowy_koszt < koszt_startowy or (
+            nowy_koszt == koszt_startowy
+            and _koncentracja(nowe, elementy) > _koncentracja([uklad[s] for s in wybrane], elementy) + 1e-9
+        )
+        if poprawa:
+            uklad = _ponumeruj([wpis for s, wpis in enumerate(uklad) if s not in wybrane] + nowe)
+            if nowy_koszt < koszt_startowy:
+                koszt = _koszt(uklad)
+                zapisz_poprawe()
+        if calosc and wynik.status == "OPTIMAL":
+            # Podproblem obejmował całe zlecenie – jego optimum jest optimum zlecenia
+            ograniczenie = max(ograniczenie, koszt)
+            break
+        if wynik.status == "OPTIMAL" and not poprawa:
+            liczba_arkuszy += 1
+        elif wynik.status != "OPTIMAL":
+            liczba_arkuszy = max(2, liczba_arkuszy - 1)
+
+    czasy["rozwiazanie"] = time.perf_counter() - start - czasy["rozgrzewka"]
+    return Wynik(status="OPTIMAL" if koszt <= ograniczenie else "FEASIBLE",
+                 koszt=koszt / wspolczynnik_skalujacy, uklad=uklad, elementy=list(elementy), czasy=czasy,
+                 ograniczenie=ograniczenie / wspolczynnik_skalujacy, historia=historia)
+
+
+def _miesci_sie_w_magazynie(uklad, typy_arkuszy):
+    """Czy arkuszy każdego typu w układzie jest nie więcej niż sztuk tego typu w typy_arkuszy."""
+    dostepne = {typ["id"]: typ["number_of_items"] for typ in typy_arkuszy}
+    zajete = {}
+    for wpis in uklad:
+        typ = _typ_instancji(wpis["arkusz"])
+        zajete[typ] = zajete.get(typ, 0) + 1
+    return all(liczba <= dostepne.get(typ, 0) for typ, liczba in zajete.items())
+
+
+def _dolacz(stale, nowe):
+    """
+    Układ z arkuszy stale (z niezmienionymi id) i nowe, którym nadawane są kolejne
+    wolne numery instancji w obrębie typu.
+    """
+    zajete_numery = {}
+    for wpis in stale:
+        typ, numer = wpis["arkusz"]["id"].rsplit("_", 1)
+        zajete_numery.setdefault(typ, set()).add(numer)
+    uklad = list(stale)
+    for wpis in nowe:
+        typ = _typ_instancji(wpis["arkusz"])
+        numery = zajete_numery.setdefault(typ, set())
+        numer = next(n for n in range(1, len(numery) + 2) if str(n) not in numery)
+        numery.add(str(numer))
+        uklad.append(dict(wpis, arkusz=dict(wpis["arkusz"], id=f'{typ}_{numer}')))
+    return uklad
+
+
+def przelicz_po_zmianie(funkcja_rozwiazujaca, typy_arkuszy, grubosc_krawedzi, poprzedni, usuniete=(), dodane=(),
+                        wyciete=(), limit_czasu=10.0, liczba_arkuszy=2, heurystyka="najlepsza", **parametry):
+    """
+    Ponowna optymalizacja po zmianie zlecenia – tylko na arkuszach, których zmiana dotyczy.
+
+    Nowe zlecenie to elementy poprzedniego bez usuniete (w tej samej kolejności), a po nich
+    dodane. Arkusze już pocięte (wyciete) i arkusze bez zmian zostają w planie bez zmian,
+    z tymi samymi id i położeniami elementów. Od nowa układane są tylko elementy z arkuszy
+    dotkniętych zmianą:
+      - arkuszy, z których usunięto element,
+      - arkuszy typu, którego w nowym magazynie (typy_arkuszy) brakuje – od najsłabiej
+        wykorzystanych,
+      - przy dodanych elementach także liczba_arkuszy najsłabiej wykorzystanych arkuszy,
+        na których wolne miejsce może je zmieścić,
+    razem z dodanymi elementami. Podproblem rozwiązuje funkcja_rozwiazujaca (silnik "cp_sat"),
+    zaczynając od poprzedniego układu tych arkuszy, uzupełnionego heurystycznie o dodane
+    elementy. Jeśli na wolnych arkuszach nie da się ich zmieścić, przeliczane są wszystkie
+    niepocięte arkusze.
+
+    Parametry:
+      - funkcja_rozwiazujaca: rozwiaz z planowanie_plyt (albo planowanie_plyt_gilotine)
+      - typy_arkuszy: nowy magazyn – typy arkuszy z "number_of_items" (np. z generuj_typy_arkuszy)
+      - grubosc_krawedzi: grubość cięcia (mm)
+      - poprzedni: Wynik poprzedniego rozwiązania
+      - usuniete: indeksy usuniętych elementów (w poprzedni.elementy)
+      - dodane: lista krotek (szerokość, wysokość) nowych elementów
+      - wyciete: id instancji arkuszy, które zostały już pocięte
+      - limit_czasu: limit czasu solvera dla podproblemu (s)
+      - pozostałe parametry (np. formulacja, lamanie_symetrii) trafiają do funkcja_rozwiazujaca
+
+    Zwraca obiekt Wynik dla nowej listy elementów (Wynik.elementy).
+    """
+    start = time.perf_counter()
+    wspolczynnik_skalujacy = 100
+    usuniete = set(usuniete)
+    wyciete = set(wyciete)
+    pozostale = [i for i in range(len(poprzedni.elementy)) if i not in usuniete]
+    nowy_indeks = {i: n for n, i in enumerate(pozostale)}
+    elementy = [poprzedni.elementy[i] for i in pozostale] + [tuple(element) for element in dodane]
+    dodane_indeksy = list(range(len(pozostale), len(elementy)))
+
+    ograniczenia = dolne_ograniczenia(typy_arkuszy, elementy, grubosc_krawedzi)
+    if ograniczenia is None:
+        return Wynik(status="INFEASIBLE", elementy=elementy, czasy={"rozwiazanie": time.perf_counter() - start})
+
+    # Poprzedni układ na nowych indeksach; niepocięte arkusze bez elementów odpadają
+    uklad = []
+    dotkniete = set()
+    for wpis in poprzedni.uklad:
+        na_arkuszu = [(nowy_indeks[i], x, y, obrot) for i, x, y, obrot in wpis["elementy"] if i in nowy_indeks]
+        wyciety = wpis["arkusz"]["id"] in wyciete
+        if not na_arkuszu and not wyciety:
+            continue
+        if len(na_arkuszu) < len(wpis["elementy"]) and not wyciety:
+            dotkniete.add(len(uklad))
+        wpis = dict(wpis, elementy=na_arkuszu)
+        if "drzewo_ciec" in wpis:
+            wpis["drzewo_ciec"] = przenumeruj_drzewo(wpis["drzewo_ciec"], nowy_indeks)
+        uklad.append(wpis)
+    wolne = [s for s in range(len(uklad)) if uklad[s]["arkusz"]["id"] not in wyciete]
+
+    def wykorzystanie(s):
+        return _wykorzystanie(uklad[s], elementy)
+
+    # Arkusze typów, których w nowym magazynie jest mniej niż w planie
+    dostepne = {typ["id"]: typ["number_of_items"] for typ in typy_arkuszy}
+    for typ in {_typ_instancji(wpis["arkusz"]) for wpis in uklad}:
+        tego_typu = [s for s in range(len(uklad)) if _typ_instancji(uklad[s]["arkusz"]) == typ]
+        nadmiar = len(tego_typu) - dostepne.get(typ, 0)
+        dotkniete.update(sorted((s for s in tego_typu if s in wolne), key=wykorzystanie)[:max(nadmiar, 0)])
+    # Dodane elementy mogą trafić w wolne miejsca najsłabiej wykorzystanych arkuszy
+    if dodane_indeksy:
+        dotkniete.update(sorted((s for s in wolne if s not in dotkniete), key=wykorzystanie)[:liczba_arkuszy])
+
+    wynik = None
+    proby = [sorted(dotkniete)] + ([wolne] if sorted(dotkniete) != wolne else [])
+    for wybrane in proby:
+        stale = [wpis for s, wpis in enumerate(uklad) if s not in wybrane]
+        indeksy = [i for s in wybrane for i, *_ in uklad[s]["elementy"]] + dodane_indeksy
+        if not indeksy:
+            break
+        magazyn = _pozostaly_magazyn(typy_arkuszy, stale)
+        lokalne = {i: n for n, i in enumerate(indeksy)}
+
+        # Start: poprzedni układ wybranych arkuszy i dodane elementy ułożone heurystycznie na wolnych arkuszach
+        uklad_startowy = _przeindeksuj([uklad[s] for s in wybrane], lokalne)
+        if dodane_indeksy:
+            dolozone = rozwiaz_heurystycznie(_pozostaly_magazyn(magazyn, uklad_startowy),
+                                             [elementy[i] for i in dodane_indeksy], grubosc_krawedzi, heurystyka)
+            przesuniecie = len(indeksy) - len(dodane_indeksy)
+            uklad_startowy = None if dolozone is None else uklad_startowy + _przeindeksuj(
+                dolozone[0], {n: przesuniecie + n for n in range(len(dodane_indeksy))})
+        if uklad_startowy is not None and not _miesci_sie_w_magazynie(uklad_startowy, magazyn):
+            uklad_startowy = None
+        rozwiazanie_startowe = None
+        if uklad_startowy is not None:
+            rozwiazanie_startowe = (uklad_startowy, _koszt(uklad_startowy) / wspolczynnik_skalujacy)
+
+        wynik = funkcja_rozwiazujaca(magazyn, False, grubosc_krawedzi, [elementy[i] for i in indeksy],
+                                     limit_czasu=limit_czasu, silnik="cp_sat",
+                                     rozwiazanie_startowe=rozwiazanie_startowe, **parametry)
+        if wynik.znaleziono:
+            uklad = _dolacz(stale, _przeindeksuj(wynik.uklad, indeksy))
+            break
+    else:
+        return Wynik(status=wynik.status, elementy=elementy, czasy={"rozwiazanie": time.perf_counter() - start})
+
+    koszt = _koszt(uklad)
+    return Wynik(status="OPTIMAL" if koszt <= ograniczenia[0] else "FEASIBLE",
+                 koszt=koszt / wspolczynnik_skalujacy, uklad=uklad, elementy=elementy,
+                 czasy={"rozwiazanie": time.perf_counter() - start},
+                 ograniczenie=ograniczenia[0] / wspolczynnik_skalujacy)
@@ -0,0 +1,110 @@
+def _w_groszach(cena):
+    """Cena zaokrąglona do groszy tak samo jak w funkcji celu modeli ("price_int")."""
+    return int(round(cena * 100))
+
+
+def koszt_osobnych_opcji(typy, elementy, miesci_sie):
+    """
+    Koszt rozwiązania, w którym każdy element leży sam na najtańszej pasującej opcji.
+
+    Takie rozwiązanie jest zawsze dopuszczalne (o ile starcza instancji), więc jego
+    koszt jest górnym ograniczeniem kosztu optymalnego. Elementy z najmniejszą liczbą
+    pasujących typów wybierają pierwsze. Zwraca None, jeśli zachłanny przydział
+    nie znajdzie wolnej instancji dla któregoś elementu.
+    """
+    pozostalo = [typ.get("number_of_items", 1) for typ in typy]
+    pasujace_typy = [[t for t, typ in enumerate(typy) if miesci_sie(element, typ)] for element in elementy]
+    koszt = 0  # w groszach, jak w funkcji celu modeli
+    for pasujace in sorted(pasujace_typy, key=len):
+        wolne = [t for t in pasujace if pozostalo[t] > 0]
+        if not wolne:
+            return None
+        t = min(wolne, key=lambda t: typy[t]["price"])
+        pozostalo[t] -= 1
+        koszt += _w_groszach(typy[t]["price"])
+    return koszt / 100
+
+
+def limity_instancji(typy, elementy, miesci_sie, gorny_koszt=None):
+    """
+    Górne ograniczenie liczby instancji każdego typu w rozwiązaniu optymalnym.
+
+    Magazyn opisany jest typami z dostępną liczbą sztuk ("number_of_items"), ale model
+    potrzebuje tylko tylu instancji, ile kiedykolwiek może zostać użytych:
+      - użyta instancja zawiera co najmniej jeden element, więc nie więcej niż
+        liczba elementów mieszczących się w typie,
+      - liczba * cena typu nie przekracza kosztu dowolnego rozwiązania dopuszczalnego
+        (gorny_koszt albo koszt_osobnych_opcji).
+    Dzięki temu magazyn z 200 sztukami danego typu daje model tej samej wielkości co magazyn z 5.
+
+    Parametry:
+      - typy: lista słowników z kluczami "price" i opcjonalnie "number_of_items"
+      - elementy: lista elementów (długości w 1D, krotki (szerokość, wysokość) w 2D)
+      - miesci_sie: funkcja (element, typ) -> bool
+      - gorny_koszt: koszt znanego rozwiązania (np. z heurystyki) w jednostkach ceny;
+                     porównywany z cenami w groszach, zaokrąglonymi jak w funkcji celu –
+                     inaczej ceny wariantów z ułamkiem grosza (41.53 / 4) dawałyby limit 0
+
+    Zwraca listę liczb instancji w kolejności typów.
+    """
+    if gorny_koszt is None:
+        gorny_koszt = koszt_osobnych_opcji(typy, elementy, miesci_sie)
+    limity = []
+    for typ in typy:
+        limit = min(typ.get("number_of_items", 1), sum(1 for element in elementy if miesci_sie(element, typ)))
+        if gorny_koszt is not None and _w_groszach(typ["price"]) > 0:
+            limit = min(limit, _w_groszach(gorny_koszt) // _w_groszach(typ["price"]))
+        limity.append(limit)
+    return limity
+
+
+def usun_zdominowane(typy, limity, dominuje):
+    """
+    Usuwa typy zdominowane przez inne typy, które mają wystarczający zapas sztuk.
+
+    Typ b dominuje typ a, gdy mieści wszystko, co mieści a (dominuje(b, a)), i nie jest
+    droższy. Każdą użytą instancję a można wtedy zastąpić wolną instancją b bez wzrostu
+    kosztu – o ile takich wolnych instancji starczy. Rozwiązanie optymalne używa co
+    najwyżej limity[b] sztuk typu b, więc zapas b to number_of_items - limity[b].
+    Typ a jest usuwany (limit 0), gdy łączny zapas jego dominatorów pokrywa limity[a];
+    wykorzystany zapas jest rezerwowany, a dominator nie może już zostać usunięty.
+    Typy o identycznych wymiarach i cenie dominują się wzajemnie – zostaje wcześniejszy.
+
+    Parametry:
+      - typy: lista słowników z kluczami "price" i opcjonalnie "number_of_items"
+      - limity: wynik limity_instancji dla tych typów
+      - dominuje: funkcja (typ_b, typ_a) -> bool, czy typ_b mieści wszystko, co typ_a
+
+    Zwraca nową listę limitów (0 dla typów usuniętych).
+    """
+    limity = list(limity)
+    zapas = [typ.get("number_of_items", 1) - limit for typ, limit in zip(typy, limity)]
+    dominatory = set()
+    usuniete = set()
+
+    def zastepuje(b, a):
+        if b == a or b in usuniete or zapas[b] == 0:
+            return False
+        if typy[b]["price"] > typy[a]["price"] or not dominuje(typy[b], typy[a]):
+            return False
+        # Przy wzajemnej dominacji (ten sam rozmiar i cena) zostaje typ wcześniejszy
+        return b < a or typy[b]["price"] < typy[a]["price"] or not dominuje(typy[a], typy[b])
+
+    # Najpierw najdroższe typy – to je najbardziej opłaca się zastąpić
+    for a in sorted(range(len(typy)), key=lambda t: -typy[t]["price"]):
+        if limity[a] == 0 or a in dominatory:
+            continue
+        kandydaci = [b for b in range(len(typy)) if zastepuje(b, a)]
+        if sum(zapas[b] for b in kandydaci) < limity[a]:
+            continue
+        potrzeba = limity[a]
+        for b in sorted(kandydaci, key=lambda t: typy[t]["price"]):
+            wziete = min(potrzeba, zapas[b])
+            zapas[b] -= wziete
+            potrzeba -= wziete
+            dominatory.add(b)
+            if potrzeba == 0:
+                break
+        limity[a] = 0
+        usuniete.add(a)
+    return limity
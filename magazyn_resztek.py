@@ -0,0 +1,220 @@
+import contextlib
+import sqlite3
+import time
+
+from heurystyki_plyt import odejmij_prostokat
+
+
+# ==========================
+# Wolne prostokąty arkusza
+# ==========================
+def wolne_prostokaty(arkusz, polozenia, elementy, grubosc_krawedzi=0):
+    """
+    Maksymalne wolne prostokąty (x, y, szer, wys) arkusza po wycięciu elementów.
+
+    Element zajmuje (szer + grubosc_krawedzi) x (wys + grubosc_krawedzi), tak jak w modelach,
+    więc wolny prostokąt zaczyna się za rzazem. Prostokąty maksymalne mogą na siebie nachodzić.
+
+    Parametry:
+      - arkusz: słownik arkusza ("width", "height")
+      - polozenia: lista (i, x, y, obrot) z układu arkusza
+      - elementy: lista krotek (szerokość, wysokość) elementów
+      - grubosc_krawedzi: grubość krawędzi cięcia (mm)
+    """
+    wolne = [(0, 0, arkusz["width"], arkusz["height"])]
+    for i, x, y, obrot in polozenia:
+        szer, wys = elementy[i]
+        if obrot:
+            szer, wys = wys, szer
+        wolne = odejmij_prostokat(wolne, x, y, szer + grubosc_krawedzi, wys + grubosc_krawedzi)
+    return wolne
+
+
+def resztki_arkusza(arkusz, polozenia, elementy, grubosc_krawedzi=0, minimalny_wymiar=100):
+    """
+    Rozłączne resztki (x, y, szer, wys) arkusza nadające się do ponownego użycia.
+
+    Z maksymalnych wolnych prostokątów wybierany jest zachłannie największy (oba boki co najmniej
+    minimalny_wymiar), a jego obszar wraz z rzazem wzdłuż krawędzi niedotykających brzegu arkusza
+    jest odejmowany od wolnego miejsca – kolejne resztki nie nachodzą więc na siebie
+    i każdą można wyciąć niezależnie.
+    """
+    wolne = wolne_prostokaty(arkusz, polozenia, elementy, grubosc_krawedzi)
+    resztki = []
+    while True:
+        kandydaci = [p for p in wolne if min(p[2], p[3]) >= minimalny_wymiar]
+        if not kandydaci:
+            return resztki
+        x, y, szer, wys = max(kandydaci, key=lambda p: (p[2] * p[3], -p[1], -p[0]))
+        resztki.append((x, y, szer, wys))
+        wolne = odejmij_prostokat(
+            wolne, x, y,
+            min(szer + grubosc_krawedzi, arkusz["width"] - x),
+            min(wys + grubosc_krawedzi, arkusz["height"] - y),
+        )
+
+
+# ==========================
+# Magazyn resztek
+# ==========================
+class MagazynResztek:
+    """
+    Trwały magazyn resztek (odpadów użytkowych) w bazie SQLite.
+
+    Resztka jest zapisywana z materiałem, wymiarami (dłuższy i krótszy bok), ceną za mm²
+    arkusza, z którego pochodzi, oraz jego id. Indeks (material, krotszy, dluzszy) pozwala
+    szybko odpowiadać na pytanie "co zmieści element szer x wys" także przy dziesiątkach
+    tysięcy resztek: prostokąt mieści się w resztce z obrotem wtedy i tylko wtedy, gdy jego
+    krótszy i dłuższy bok nie przekraczają odpowiednio krótszego i dłuższego boku resztki.
+
+    Typowy obieg: arkusze_dla_zlecenia przed rozwiązaniem (resztki dołączane do katalogu
+    arkuszy), po rozwiązaniu zuzyj (usuwa wykorzystane resztki) i dodaj_z_ukladu (zapisuje
+    nowe resztki z pociętych arkuszy).
+    """
+
+    def __init__(self, sciezka="resztki.sqlite", minimalny_wymiar=100):
+        self.sciezka = sciezka
+        self.minimalny_wymiar = minimalny_wymiar
+        with self._polacz() as polaczenie:
+            polaczenie.execute(
+                "CREATE TABLE IF NOT EXISTS resztki ("
+                "id INTEGER PRIMARY KEY, material TEXT NOT NULL, dluzszy INTEGER NOT NULL, "
+                "krotszy INTEGER NOT NULL, cena_mm2 REAL NOT NULL, zrodlo TEXT, dodano REAL NOT NULL)"
+            )
+            polaczenie.execute(
+                "CREATE INDEX IF NOT EXISTS resztki_wymiary ON resztki (material, krotszy, dluzszy)"
+            )
+
+    @contextlib.contextmanager
+    def _polacz(self):
+        """Połączenie z bazą na czas jednej operacji (zatwierdzane na końcu, bezpieczne między wątkami)."""
+        polaczenie = sqlite3.connect(self.sciezka)
+        try:
+            with polaczenie:
+                yield polaczenie
+        finally:
+            polaczenie.close()
+
+    def dodaj(self, szer, wys, material="", cena_mm2=0.0, zrodlo=None):
+        """Zapisuje jedną resztkę i zwraca jej id."""
+        with self._polacz() as polaczenie:
+            return polaczenie.execute(
+                "INSERT INTO resztki (material, dluzszy, krotszy, cena_mm2, zrodlo, dodano) VALUES (?, ?, ?, ?, ?, ?)",
+                (material, max(szer, wys), min(szer, wys), cena_mm2, zrodlo, time.time()),
+            ).lastrowid
+
+    def dodaj_z_ukladu(self, uklad, elementy, grubosc_krawedzi=0, material=None):
+        """
+        Zapisuje resztki wszystkich arkuszy układu (resztki_arkusza) i zwraca listę ich id.
+
+        Materiał jest brany z klucza "material" arkusza, a jeśli go nie ma – z parametru material.
+        Cena za mm² resztki z resztki przechodzi dalej, dzięki czemu wycena zawsze odnosi się
+        do pełnego arkusza, z którego materiał pochodzi.
+        """
+        wiersze = []
+        for wpis in uklad:
+            arkusz = wpis["arkusz"]
+            cena_mm2 = arkusz.get("cena_mm2", arkusz["price"] / (arkusz["width"] * arkusz["height"]))
+            for _, _, szer, wys in resztki_arkusza(
+                arkusz, wpis["elementy"], elementy, grubosc_krawedzi, self.minimalny_wymiar
+            ):
+                wiersze.append((
+                    arkusz.get("material", material or ""), max(szer, wys), min(szer, wys), cena_mm2,
+                    arkusz.get("zrodlo", arkusz["id"]), time.time(),
+                ))
+        with self._polacz() as polaczenie:
+            ids = []
+            for wiersz in wiersze:
+                ids.append(polaczenie.execute(
+                    "INSERT INTO resztki (material, dluzszy, krotszy, cena_mm2, zrodlo, dodano) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", wiersz,
+                ).lastrowid)
+        return ids
+
+    def pasujace(self, szer, wys, material="", limit=None):
+        """
+        Resztki danego materiału, w których mieści się prostokąt szer x wys (z obrotem),
+        od najmniejszej – najlepiej dopasowana jest pierwsza. Zwraca listę słowników
+        {"id", "material", "width", "height", "cena_mm2", "zrodlo"} (width to dłuższy bok).
+        """
+        zapytanie = (
+            "SELECT id, material, dluzszy, krotszy, cena_mm2, zrodlo FROM resztki "
+            "WHERE material = ? AND krotszy >= ? AND dluzszy >= ? ORDER BY dluzszy * krotszy, id"
+        )
+        argumenty = [material, min(szer, wys), max(szer, wys)]
+        if limit is not None:
+            zapytanie += " LIMIT ?"
+            argumenty.append(limit)
+        with self._polacz() as polaczenie:
+            wiersze = polaczenie.execute(zapytanie, argumenty).fetchall()
+        return [
+            {"id": id_, "material": material, "width": dluzszy, "height": krotszy, "cena_mm2": cena_mm2,
+             "zrodlo": zrodlo}
+            for id_, material, dluzszy, krotszy, cena_mm2, zrodlo in wiersze
+        ]
+
+    def arkusze_dla_zlecenia(self, elementy, grubosc_krawedzi=0, material="", maks_resztek=20,
+                             wspolczynnik_ceny=0.0):
+        """
+        Resztki przydatne dla zlecenia jako słowniki arkuszy do dołączenia do oryginalne_arkusze.
+
+        Przydatna jest resztka, w której mieści się (z rzazem) choć jeden element; wybieranych jest
+        maks_resztek największych, żeby model nie rósł z rozmiarem magazynu. Każda resztka to
+        osobny typ z "number_of_items" równym 1 i kluczem "resztka" (id w magazynie) – takich
+        arkuszy generuj_typy_arkuszy nie dzieli na połówki i ćwiartki. Cena to wspolczynnik_ceny
+        razy wartość materiału resztki (0 – resztki są darmowe).
+
+        Parametry:
+          - elementy: lista krotek (szerokość, wysokość) elementów zlecenia
+          - grubosc_krawedzi: grubość krawędzi cięcia (mm)
+          - material: materiał zlecenia
+          - maks_resztek: największa liczba dołączanych resztek
+          - wspolczynnik_ceny: ułamek ceny pełnego arkusza za mm² naliczany za resztkę
+        """
+        if not elementy:
+            return []
+        wymiary = sorted({(min(e) + grubosc_krawedzi, max(e) + grubosc_krawedzi) for e in elementy})
+        # Zapytanie po indeksie z najmniejszymi bokami, dokładne sprawdzenie dla każdego elementu w Pythonie
+        arkusze = []
+        with self._polacz() as polaczenie:
+            wiersze = polaczenie.execute(
+                "SELECT id, dluzszy, krotszy, cena_mm2, zrodlo FROM resztki "
+                "WHERE material = ? AND krotszy >= ? AND dluzszy >= ? ORDER BY dluzszy * krotszy DESC, id",
+                (material, wymiary[0][0], min(d for _, d in wymiary)),
+            )
+            for id_, dluzszy, krotszy, cena_mm2, zrodlo in wiersze:
+                if len(arkusze) >= maks_resztek:
+                    break
+                if not any(k <= krotszy and d <= dluzszy for k, d in wymiary):
+                    continue
+                arkusze.append({
+                    "width": dluzszy,
+                    "height": krotszy,
+                    "price": round(wspolczynnik_ceny * cena_mm2 * dluzszy * krotszy, 2),
+                    "id": f"resztka_{id_}",
+                    "number_of_items": 1,
+                    "resztka": id_,
+                    "material": material,
+                    "cena_mm2": cena_mm2,
+                    "zrodlo": zrodlo,
+                })
+        return arkusze
+
+    def zuzyj(self, uklad):
+        """Usuwa z magazynu resztki użyte w układzie (arkusze z kluczem "resztka") i zwraca ich id."""
+        ids = sorted({wpis["arkusz"]["resztka"] for wpis in uklad if "resztka" in wpis["arkusz"]})
+        with self._polacz() as polaczenie:
+            polaczenie.executemany("DELETE FROM resztki WHERE id = ?", [(id_,) for id_ in ids])
+        return ids
+
+    def liczba(self, material=None):
+        """Liczba resztek w magazynie (wszystkich albo danego materiału)."""
+        with self._polacz() as polaczenie:
+            if material is None:
+                return polaczenie.execute("SELECT COUNT(*) FROM resztki").fetchone()[0]
+            return polaczenie.execute("SELECT COUNT(*) FROM resztki WHERE material = ?", (material,)).fetchone()[0]
+
+    def wyczysc(self):
+        """Usuwa wszystkie resztki."""
+        with self._polacz() as polaczenie:
+            polaczenie.execute("DELETE FROM resztki")
@@ -0,0 +1,63 @@
+FORMULACJE_NAKLADANIA = ("pary", "no_overlap_2d")
+
+
+def dodaj_no_overlap_2d(model, wskazniki_przypisania, opcje_arkuszy, polozenie_x, polozenie_y,
+                        szerokosci_elementow, wysokosci_elementow, grubosc_krawedzi,
+                        max_szerokosc, max_wysokosc):
+    """
+    Zakaz nakładania się elementów w postaci ograniczenia AddNoOverlap2D.
+
+    Dla każdej pary (element, arkusz) tworzony jest opcjonalny prostokąt, obecny
+    dokładnie wtedy, gdy element trafił na ten arkusz. Rozmiar prostokąta to wymiar
+    elementu (po ewentualnym obrocie) powiększony o grubość cięcia – tak samo jak
+    w modelu par lewo/prawo/gora/dol. Zamiast O(n²) zmiennych logicznych na pary
+    solver dostaje jedno globalne ograniczenie na arkusz z silną propagacją.
+
+    Dodatkowo każdy arkusz dostaje dwa nadmiarowe ograniczenia AddCumulative (rzut
+    elementów na oś x i na oś y). Nie zmieniają one zbioru rozwiązań, ale wyraźnie
+    przyspieszają znajdowanie pierwszych rozwiązań przy jednym wątku solvera.
+
+    Parametry:
+      - wskazniki_przypisania: słownik {(indeks_elementu, indeks_arkusza): BoolVar}
+                               (pary niewykonalne mogą być pominięte)
+      - opcje_arkuszy: lista instancji arkuszy (słowniki z "width" i "height")
+      - polozenie_x, polozenie_y: listy IntVar z położeniem lewego dolnego rogu
+      - szerokosci_elementow, wysokosci_elementow: listy IntVar z wymiarami po obrocie
+      - grubosc_krawedzi: grubość cięcia doliczana do każdego wymiaru
+      - max_szerokosc, max_wysokosc: największe wymiary arkuszy (zakresy zmiennych końca)
+    """
+    liczba_elementow = len(polozenie_x)
+
+    # Końce prostokątów są wspólne dla wszystkich arkuszy – element leży tylko na jednym
+    koniec_x = []
+    koniec_y = []
+    for i in range(liczba_elementow):
+        kx = model.NewIntVar(0, max_szerokosc + grubosc_krawedzi, f'koniec_x_{i}')
+        ky = model.NewIntVar(0, max_wysokosc + grubosc_krawedzi, f'koniec_y_{i}')
+        model.Add(kx == polozenie_x[i] + szerokosci_elementow[i] + grubosc_krawedzi)
+        model.Add(ky == polozenie_y[i] + wysokosci_elementow[i] + grubosc_krawedzi)
+        koniec_x.append(kx)
+        koniec_y.append(ky)
+
+    for s, arkusz in enumerate(opcje_arkuszy):
+        na_arkuszu = [i for i in range(liczba_elementow) if (i, s) in wskazniki_przypisania]
+        przedzialy_x = []
+        przedzialy_y = []
+        for i in na_arkuszu:
+            obecny = wskazniki_przypisania[(i, s)]
+            przedzialy_x.append(model.NewOptionalIntervalVar(
+                polozenie_x[i], szerokosci_elementow[i] + grubosc_krawedzi, koniec_x[i], obecny,
+                f'przedzial_x_{i}_{s}'))
+            przedzialy_y.append(model.NewOptionalIntervalVar(
+                polozenie_y[i], wysokosci_elementow[i] + grubosc_krawedzi, koniec_y[i], obecny,
+                f'przedzial_y_{i}_{s}'))
+        model.AddNoOverlap2D(przedzialy_x, przedzialy_y)
+
+        # Rzuty na osie: w każdym pionowym przekroju arkusza suma wysokości elementów
+        # nie przekracza wysokości arkusza (i analogicznie w poziomie)
+        model.AddCumulative(przedzialy_x,
+                            [wysokosci_elementow[i] + grubosc_krawedzi for i in na_arkuszu],
+                            arkusz["height"])
+        model.AddCumulative(przedzialy_y,
+                            [szerokosci_elementow[i] + grubosc_krawedzi for i in na_arkuszu],
+                            arkusz["width"])
@@ -0,0 +1,170 @@
+import math
+
+import numpy as np
+
+from ortools.sat.python import cp_model
+
+from agregacja_popytu import agreguj_elementy
+
+
+def _rozmiary_wzgledne(oryginalne_listew, elementy, grubosc_krawedzi):
+    """
+    Dla każdego typu elementu i typu listwy wyznacza rozmiar względny
+    x = (długość + rzaz) / (długość listwy + rzaz), albo None, jeśli kawałek się nie mieści.
+
+    Zwraca krotkę (typy_elementow, ceny, wzgledne), gdzie wzgledne[k][t] to rozmiar
+    typu k w listwie typu t, a ceny to ceny listew w groszach.
+    """
+    wspolczynnik_skalujacy = 100
+    typy_elementow = agreguj_elementy(elementy)
+    ceny = [int(round(listwa["price"] * wspolczynnik_skalujacy)) for listwa in oryginalne_listew]
+    wzgledne = []
+    for typ in typy_elementow:
+        waga = typ["rozmiar"] + grubosc_krawedzi
+        wzgledne.append([
+            waga / (listwa["length"] + grubosc_krawedzi) if waga <= listwa["length"] else None
+            for listwa in oryginalne_listew
+        ])
+    return typy_elementow, ceny, wzgledne
+
+
+def _ograniczenie_z_funkcji(funkcja, typy_elementow, ceny, wzgledne):
+    """
+    Ograniczenie kosztu z funkcji dualnie dopuszczalnej (DFF) u: [0, 1] -> [0, 1].
+
+    Dla listwy typu t z kawałkami S zachodzi sum u(x_it) <= 1, więc waga
+    w_i = min_t cena_t * u(x_it) spełnia sum_{i in S} w_i <= cena_t. Suma wag
+    wszystkich kawałków jest więc dolnym ograniczeniem kosztu, także przy wielu typach listew.
+    """
+    suma = 0.0
+    for k, typ in enumerate(typy_elementow):
+        wagi = [ceny[t] * funkcja(x) for t, x in enumerate(wzgledne[k]) if x is not None]
+        if not wagi:
+            return math.inf
+        suma += typ["ilosc"] * min(wagi)
+    return suma
+
+
+def ograniczenie_ciagle(oryginalne_listew, elementy, grubosc_krawedzi):
+    """
+    Ograniczenie ciągłe: każdy milimetr kawałka (z rzazem) kosztuje co najmniej
+    tyle, ile milimetr najtańszej listwy, w której ten kawałek się mieści.
+    Zwraca ograniczenie w groszach (float).
+    """
+    return _ograniczenie_z_funkcji(lambda x: x, *_rozmiary_wzgledne(oryginalne_listew, elementy, grubosc_krawedzi))
+
+
+def ograniczenie_l2(oryginalne_listew, elementy, grubosc_krawedzi):
+    """
+    Ograniczenie Martello–Totha L2 w postaci kosztowej.
+
+    L2 odpowiada rodzinie funkcji U^eps (Fekete–Schepers): kawałki większe niż 1 - eps
+    liczą się jak cała listwa, mniejsze niż eps są pomijane, pozostałe liczą się
+    proporcjonalnie. Maksimum brane jest po eps równych rozmiarom kawałków (<= 1/2).
+    Dla jednego typu listwy liczba listew jest dodatkowo zaokrąglana w górę.
+    """
+    typy_elementow, ceny, wzgledne = _rozmiary_wzgledne(oryginalne_listew, elementy, grubosc_krawedzi)
+    kandydaci = {0.0} | {x for wiersz in wzgledne for x in wiersz if x is not None and x <= 0.5}
+
+    najlepsze = 0.0
+    for eps in kandydaci:
+        def funkcja(x, eps=eps):
+            if x > 1 - eps:
+                return 1.0
+            if x < eps:
+                return 0.0
+            return x
+        if len(ceny) == 1:
+            liczba_listew = _ograniczenie_z_funkcji(funkcja, typy_elementow, [1], wzgledne)
+            if math.isinf(liczba_listew):
+                # Kawałek dłuższy niż listwa – zaokrąglenie nieskończoności nie jest możliwe
+                return math.inf
+            wartosc = ceny[0] * math.ceil(liczba_listew - 1e-9)
+        else:
+            wartosc = _ograniczenie_z_funkcji(funkcja, typy_elementow, ceny, wzgledne)
+        najlepsze = max(najlepsze, wartosc)
+    return najlepsze
+
+
+def ograniczenie_dff(oryginalne_listew, elementy, grubosc_krawedzi, maks_k=10):
+    """
+    Ograniczenie z funkcji dualnie dopuszczalnych Fekete–Schepersa:
+    u^(k)(x) = x, jeśli (k + 1) * x jest całkowite, w przeciwnym razie floor((k + 1) * x) / k.
+    Zwraca maksimum po k = 1..maks_k.
+    """
+    typy_elementow, ceny, wzgledne = _rozmiary_wzgledne(oryginalne_listew, elementy, grubosc_krawedzi)
+
+    najlepsze = 0.0
+    for k in range(1, maks_k + 1):
+        def funkcja(x, k=k):
+            iloczyn = (k + 1) * x
+            if abs(iloczyn - round(iloczyn)) < 1e-9:
+                return x
+            return math.floor(iloczyn) / k
+        najlepsze = max(najlepsze, _ograniczenie_z_funkcji(funkcja, typy_elementow, ceny, wzgledne))
+    return najlepsze
+
+
+def dolne_ograniczenie_kosztu(oryginalne_listew, elementy, grubosc_krawedzi):
+    """
+    Najlepsze z ograniczeń (ciągłe, L2, DFF), zaokrąglone w górę do pełnych groszy.
+    Zwraca None, jeśli któryś kawałek nie mieści się w żadnej listwie.
+    """
+    ograniczenie = max(
+        ograniczenie_ciagle(oryginalne_listew, elementy, grubosc_krawedzi),
+        ograniczenie_l2(oryginalne_listew, elementy, grubosc_krawedzi),
+        ograniczenie_dff(oryginalne_listew, elementy, grubosc_krawedzi),
+    )
+    if math.isinf(ograniczenie):
+        return None
+    return math.ceil(ograniczenie - 1e-6)
+
+
+def zaokraglij_do_kosztu(ograniczenie, ceny, dostepne):
+    """
+    Najmniejszy koszt nie mniejszy od ograniczenia, jaki da się złożyć z cen dostępnych sztuk.
+
+    Koszt rozwiązania to suma cen użytych sztuk (listew, arkuszy), więc dolne ograniczenie
+    można podnieść do najbliższej takiej sumy. Sumy osiągalne wyznaczane są jak w plecaku
+    0/1 z rozbiciem binarnym krotności, po podzieleniu cen przez ich NWD.
+
+    Parametry:
+      - ograniczenie: dolne ograniczenie kosztu (w groszach)
+      - ceny: ceny typów w groszach (liczby całkowite)
+      - dostepne: maksymalna liczba sztuk każdego typu
+
+    Zwraca ograniczenie bez zmian, jeśli żadna suma w zasięgu jednej ceny go nie osiąga.
+    """
+    if ograniczenie <= 0 or not ceny:
+        return ograniczenie
+    nwd = math.gcd(*ceny) or 1
+    start = -(-ograniczenie // nwd)
+    limit = start + max(ceny) // nwd
+    osiagalne = np.zeros(limit + 1, dtype=bool)
+    osiagalne[0] = True
+    for cena, liczba in zip(ceny, dostepne):
+        krok = 1
+        while liczba > 0:
+            krotnosc = min(krok, liczba)
+            waga = cena // nwd * krotnosc
+            if 0 < waga <= limit:
+                osiagalne[waga:] |= osiagalne[:limit + 1 - waga].copy()
+            liczba -= krotnosc
+            krok *= 2
+    kandydaci = np.flatnonzero(osiagalne[start:])
+    return int(start + kandydaci[0]) * nwd if len(kandydaci) else ograniczenie
+
+
+class ZatrzymaniePrzyOgraniczeniu(cp_model.CpSolverSolutionCallback):
+    """
+    Callback kończący wyszukiwanie, gdy koszt znalezionego rozwiązania osiągnie
+    dolne ograniczenie – rozwiązanie jest wtedy optymalne i nie trzeba domykać luki.
+    """
+
+    def __init__(self, ograniczenie):
+        super().__init__()
+        self.ograniczenie = ograniczenie
+
+    def on_solution_callback(self):
+        if self.ObjectiveValue() <= self.ograniczenie:
+            self.StopSearch()
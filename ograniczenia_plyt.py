@@ -0,0 +1,151 @@
+import math
+
+import numpy as np
+
+from agregacja_popytu import agreguj_elementy
+from ograniczenia_dolne import zaokraglij_do_kosztu
+
+
+def _rozmiary_wzgledne(typy_arkuszy, elementy, grubosc_krawedzi):
+    """
+    Rozmiary względne elementów w każdym typie arkusza, w obu orientacjach.
+
+    Element z rzazem zajmuje (szer + rzaz) x (wys + rzaz) i mieści się w arkuszu,
+    gdy szer + rzaz <= szerokość i wys + rzaz <= wysokość, więc rozmiar względny
+    to x = (szer + rzaz) / szerokość, y = (wys + rzaz) / wysokość.
+
+    Zwraca krotkę (typy_elementow, ceny, x, y, miesci), gdzie x, y i miesci to tablice
+    o kształcie (liczba_typow_elementow, liczba_typow_arkuszy, 2) – ostatni wymiar to
+    orientacja (bez obrotu, po obrocie) – a ceny to ceny arkuszy w groszach.
+    """
+    wspolczynnik_skalujacy = 100
+    typy_elementow = agreguj_elementy(elementy)
+    ceny = np.array([int(round(arkusz["price"] * wspolczynnik_skalujacy)) for arkusz in typy_arkuszy])
+    wymiary = np.array([t["rozmiar"] for t in typy_elementow], dtype=np.int64).reshape(-1, 2) + grubosc_krawedzi
+    arkusze = np.array([(a["width"], a["height"]) for a in typy_arkuszy], dtype=np.int64).reshape(-1, 2)
+    orientacje = np.stack([wymiary, wymiary[:, ::-1]], axis=1)  # (typ elementu, orientacja, wymiar)
+    x = orientacje[:, None, :, 0] / arkusze[None, :, None, 0]
+    y = orientacje[:, None, :, 1] / arkusze[None, :, None, 1]
+    return typy_elementow, ceny, x, y, (x <= 1) & (y <= 1)
+
+
+def _ograniczenie_z_funkcji(funkcja_x, funkcja_y, typy_elementow, ceny, x, y, miesci):
+    """
+    Ograniczenie kosztu z pary funkcji dualnie dopuszczalnych (DFF) u, v: [0, 1] -> [0, 1].
+
+    Iloczyn u(x) * v(y) jest dwuwymiarową DFF (Fekete–Schepers): dla elementów S
+    ułożonych na arkuszu zachodzi sum u(x_i) * v(y_i) <= 1. Waga elementu
+    w_i = min po typach i orientacjach cena_t * u(x) * v(y) spełnia więc
+    sum_{i in S} w_i <= cena_t, a suma wag wszystkich elementów jest dolnym
+    ograniczeniem kosztu – także przy wielu typach arkuszy i obrotach.
+    """
+    wagi = np.where(miesci, ceny[None, :, None] * funkcja_x(x) * funkcja_y(y), np.inf)
+    wagi = wagi.reshape(len(typy_elementow), -1).min(axis=1)
+    return float(sum(t["ilosc"] * w for t, w in zip(typy_elementow, wagi)))
+
+
+def _funkcje_dff(wartosci, maks_k, maks_eps):
+    """
+    Rodzina DFF dla jednego wymiaru: identyczność, u^(k) dla k = 1..maks_k oraz U^eps
+    dla co najwyżej maks_eps progów eps wybranych spośród rozmiarów nie większych niż 1/2.
+    """
+    def identycznosc(x):
+        return x
+
+    def u_k(k):
+        def funkcja(x):
+            iloczyn = (k + 1) * x
+            return np.where(np.abs(iloczyn - np.round(iloczyn)) < 1e-9, x, np.floor(iloczyn + 1e-9) / k)
+        return funkcja
+
+    def u_eps(eps):
+        def funkcja(x):
+            return np.where(x > 1 - eps + 1e-12, 1.0, np.where(x < eps - 1e-12, 0.0, x))
+        return funkcja
+
+    progi = np.unique(wartosci[wartosci <= 0.5])
+    if len(progi) > maks_eps:
+        progi = progi[np.linspace(0, len(progi) - 1, maks_eps).round().astype(int)]
+    return [identycznosc] + [u_k(k) for k in range(1, maks_k + 1)] + [u_eps(eps) for eps in progi]
+
+
+def ograniczenie_powierzchni(typy_arkuszy, elementy, grubosc_krawedzi):
+    """
+    Ograniczenie powierzchniowe z rzazem: każdy mm² elementu (z rzazem) kosztuje co najmniej
+    tyle, ile mm² najtańszego (za jednostkę powierzchni) arkusza, w którym ten element się mieści.
+    Zwraca ograniczenie w groszach (float).
+    """
+    def identycznosc(x):
+        return x
+    return _ograniczenie_z_funkcji(identycznosc, identycznosc,
+                                   *_rozmiary_wzgledne(typy_arkuszy, elementy, grubosc_krawedzi))
+
+
+def ograniczenie_dff(typy_arkuszy, elementy, grubosc_krawedzi, maks_k=5, maks_eps=10, ceny=None):
+    """
+    Ograniczenie z iloczynów funkcji dualnie dopuszczalnych Fekete–Schepersa.
+
+    Dla każdej pary (u, v) z rodziny _funkcje_dff (osobno dla szerokości i wysokości)
+    liczy _ograniczenie_z_funkcji i zwraca maksimum. Z ceny=1 dla każdego typu
+    wynik jest dolnym ograniczeniem liczby arkuszy (przed zaokrągleniem w górę).
+    """
+    typy_elementow, ceny_arkuszy, x, y, miesci = _rozmiary_wzgledne(typy_arkuszy, elementy, grubosc_krawedzi)
+    if ceny is not None:
+        ceny_arkuszy = np.asarray(ceny)
+    funkcje_x = _funkcje_dff(x[miesci], maks_k, maks_eps)
+    funkcje_y = _funkcje_dff(y[miesci], maks_k, maks_eps)
+    return max(
+        _ograniczenie_z_funkcji(u, v, typy_elementow, ceny_arkuszy, x, y, miesci)
+        for u in funkcje_x for v in funkcje_y
+    )
+
+
+def ograniczenie_duzych(typy_arkuszy, elementy, grubosc_krawedzi):
+    """
+    Zliczanie dużych elementów.
+
+    Element jest duży, gdy w każdym typie arkusza i każdej orientacji, w której się mieści,
+    zajmuje ponad połowę szerokości i ponad połowę wysokości. Dwa duże elementy nie mogą
+    leżeć ani obok siebie, ani jeden nad drugim, więc każdy potrzebuje osobnego arkusza,
+    kosztującego co najmniej tyle, ile najtańszy typ, w którym się mieści.
+
+    Zwraca krotkę (ograniczenie kosztu w groszach, liczba dużych elementów).
+    """
+    typy_elementow, ceny, x, y, miesci = _rozmiary_wzgledne(typy_arkuszy, elementy, grubosc_krawedzi)
+    duze = np.where(miesci, (x > 0.5) & (y > 0.5), True).reshape(len(typy_elementow), -1).all(axis=1)
+    duze &= miesci.reshape(len(typy_elementow), -1).any(axis=1)
+    najtansze = np.where(miesci.any(axis=2), ceny[None, :], np.inf).min(axis=1)
+    koszt = sum(t["ilosc"] * najtansze[k] for k, t in enumerate(typy_elementow) if duze[k])
+    return float(koszt), sum(t["ilosc"] for k, t in enumerate(typy_elementow) if duze[k])
+
+
+def dolne_ograniczenia(typy_arkuszy, elementy, grubosc_krawedzi):
+    """
+    Najlepsze z ograniczeń 2D (powierzchnia z rzazem, DFF, duże elementy).
+
+    Parametry:
+      - typy_arkuszy: lista typów arkuszy z "number_of_items" (np. z generuj_typy_arkuszy)
+      - elementy: lista krotek (szerokość, wysokość)
+      - grubosc_krawedzi: grubość cięcia (mm)
+
+    Zwraca krotkę (koszt, liczba_arkuszy): dolne ograniczenie kosztu w groszach, podniesione
+    do najbliższej sumy cen dostępnych arkuszy, oraz minimalną liczbę użytych arkuszy.
+    Zwraca None, jeśli któryś element nie mieści się w żadnym arkuszu.
+    """
+    if not elementy:
+        return 0, 0
+    koszt_duzych, liczba_duzych = ograniczenie_duzych(typy_arkuszy, elementy, grubosc_krawedzi)
+    koszt = max(
+        ograniczenie_powierzchni(typy_arkuszy, elementy, grubosc_krawedzi),
+        ograniczenie_dff(typy_arkuszy, elementy, grubosc_krawedzi),
+        koszt_duzych,
+    )
+    if math.isinf(koszt):
+        return None
+    liczba_arkuszy = max(
+        math.ceil(ograniczenie_dff(typy_arkuszy, elementy, grubosc_krawedzi, ceny=[1] * len(typy_arkuszy)) - 1e-9),
+        liczba_duzych,
+    )
+    ceny = [int(round(arkusz["price"] * 100)) for arkusz in typy_arkuszy]
+    dostepne = [arkusz.get("number_of_items", 1) for arkusz in typy_arkuszy]
+    return zaokraglij_do_kosztu(math.ceil(koszt - 1e-6), ceny, dostepne), liczba_arkuszy
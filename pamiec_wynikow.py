@@ -0,0 +1,237 @@
+import contextlib
+import hashlib
+import inspect
+import json
+import sqlite3
+import time
+
+from gilotyna import przenumeruj_drzewo
+from wyniki import Wynik
+
+# Wersja silników zapisywana w odcisku – zwiększana przy zmianach modeli lub heurystyk,
+# po których zapisane wyniki przestają odpowiadać temu, co policzyłby solver
+# (2: INFEASIBLE tylko z dowodem, nieudane heurystyki zwracają UNKNOWN)
+WERSJA_SILNIKA = 2
+
+# Ustawienia, które zmieniają sam problem albo jakość wyniku (a nie tylko czas rozwiązywania)
+USTAWIENIA_KLUCZA = ("silnik", "heurystyka", "etapy")
+
+# Statusy, które warto zapamiętać: rozwiązanie albo brak rozwiązania (INFEASIBLE jest
+# dopasowywany po limicie czasu, tak jak FEASIBLE – zob. PamiecWynikow.pobierz)
+STATUSY_ZAPISYWANE = ("OPTIMAL", "FEASIBLE", "INFEASIBLE")
+
+
+def postac_kanoniczna(elementy):
+    """
+    Kanoniczna kolejność i orientacja elementów.
+
+    Element (szer, wys) i (wys, szer) to ten sam prostokąt (modele pozwalają na obrót), więc
+    w postaci kanonicznej dłuższy bok jest pierwszy, a elementy są posortowane. Zwraca krotkę
+    (kanoniczne, kolejnosc, odwrocone): listę kanonicznych wymiarów, indeksy elementów
+    wywołującego w kolejności kanonicznej oraz listę flag, czy element wywołującego
+    ma wymiary zamienione względem postaci kanonicznej.
+    """
+    kanoniczny = [(max(szer, wys), min(szer, wys)) for szer, wys in elementy]
+    kolejnosc = sorted(range(len(elementy)), key=lambda i: kanoniczny[i])
+    odwrocone = [tuple(element) != kanoniczny[i] for i, element in enumerate(elementy)]
+    return [kanoniczny[i] for i in kolejnosc], kolejnosc, odwrocone
+
+
+def odcisk(oryginalne_arkusze, dopuszczalny_podzial, grubosc_krawedzi, elementy, funkcja="", ustawienia=None):
+    """
+    Odcisk (SHA-256) zlecenia niezależny od kolejności elementów i arkuszy w katalogu
+    oraz od orientacji, w jakiej podano wymiary elementów.
+    """
+    dane = {
+        "wersja": WERSJA_SILNIKA,
+        "funkcja": funkcja,
+        "elementy": postac_kanoniczna(elementy)[0],
+        "arkusze": sorted(json.dumps(arkusz, sort_keys=True) for arkusz in oryginalne_arkusze),
+        "grubosc_krawedzi": grubosc_krawedzi,
+        "dopuszczalny_podzial": bool(dopuszczalny_podzial),
+        "ustawienia": ustawienia or {},
+    }
+    return hashlib.sha256(json.dumps(dane, sort_keys=True).encode()).hexdigest()
+
+
+def _przenumeruj_uklad(uklad, mapa, odwrocone):
+    """
+    Kopia układu arkuszy z indeksami elementów zamienionymi według słownika mapa; obrót elementu
+    jest odwracany, jeśli jego wymiary są zamienione (odwrocone[stary indeks]).
+    """
+    nowy = []
+    for wpis in uklad:
+        wpis = dict(wpis, elementy=[
+            (mapa[i], x, y, bool(obrot) != odwrocone[i]) for i, x, y, obrot in wpis["elementy"]
+        ])
+        if "drzewo_ciec" in wpis:
+            wpis["drzewo_ciec"] = przenumeruj_drzewo(wpis["drzewo_ciec"], mapa)
+        nowy.append(wpis)
+    return nowy
+
+
+class PamiecWynikow:
+    """
+    Trwała pamięć wyników zleceń cięcia arkuszy w bazie SQLite.
+
+    Wyniki są zapisywane pod odciskiem zlecenia (odcisk) w postaci kanonicznej, więc
+    to samo zlecenie z elementami w innej kolejności lub orientacji trafia w ten sam wpis,
+    a układ wraca w kolejności elementów wywołującego. Po przekroczeniu maks_wpisow
+    lub maks_rozmiar (bajty zapisanych wyników) usuwane są najdawniej używane wpisy (LRU).
+    Liczniki trafień i chybień są przechowywane w tej samej bazie.
+
+    Parametry:
+      - sciezka: plik bazy danych
+      - maks_wpisow: maksymalna liczba zapisanych wyników (None – bez limitu)
+      - maks_rozmiar: maksymalny łączny rozmiar zapisanych wyników w bajtach (None – bez limitu)
+    """
+
+    def __init__(self, sciezka="wyniki.sqlite", maks_wpisow=1000, maks_rozmiar=None):
+        self.sciezka = sciezka
+        self.maks_wpisow = maks_wpisow
+        self.maks_rozmiar = maks_rozmiar
+        with self._polacz() as polaczenie:
+            polaczenie.execute(
+                "CREATE TABLE IF NOT EXISTS wyniki ("
+                "klucz TEXT PRIMARY KEY, wynik TEXT NOT NULL, status TEXT NOT NULL, "
+                "limit_czasu REAL, wzgledna_luka REAL, rozmiar INTEGER NOT NULL, uzyto REAL NOT NULL)"
+            )
+            polaczenie.execute("CREATE TABLE IF NOT EXISTS statystyki (nazwa TEXT PRIMARY KEY, wartosc INTEGER)")
+
+    @contextlib.contextmanager
+    def _polacz(self):
+        """Połączenie z bazą na czas jednej operacji (zatwierdzane na końcu, bezpieczne między wątkami)."""
+        polaczenie = sqlite3.connect(self.sciezka)
+        try:
+            with polaczenie:
+                yield polaczenie
+        finally:
+            polaczenie.close()
+
+    @staticmethod
+    def _zlicz(polaczenie, nazwa, ile=1):
+        polaczenie.execute(
+            "INSERT INTO statystyki VALUES (?, ?) ON CONFLICT(nazwa) DO UPDATE SET wartosc = wartosc + ?",
+            (nazwa, ile, ile),
+        )
+
+    def pobierz(self, klucz, elementy, limit_czasu=None, wzgledna_luka=None):
+        """
+        Wynik zapisany pod kluczem, z układem przeniesionym na kolejność i orientację elementy,
+        albo None (chybienie).
+
+        Wynik optymalny pasuje do każdego wywołania; wyniki FEASIBLE i INFEASIBLE – tylko
+        jeśli policzono je z limitem czasu nie mniejszym niż limit_czasu (None – bez limitu),
+        bo INFEASIBLE z przerwanego albo heurystycznego rozwiązywania nie musi być dowodem.
+        Wynik z luką optymalności pasuje, gdy nie była większa niż wzgledna_luka.
+        Czas odczytu trafia do czasy["pamiec"].
+        """
+        start = time.perf_counter()
+        with self._polacz() as polaczenie:
+            wiersz = polaczenie.execute(
+                "SELECT wynik, status, limit_czasu, wzgledna_luka FROM wyniki WHERE klucz = ?", (klucz,)
+            ).fetchone()
+            pasuje = wiersz is not None and (wiersz[3] or 0) <= (wzgledna_luka or 0) and (
+                wiersz[1] == "OPTIMAL"
+                or wiersz[2] is None
+                or limit_czasu is not None and wiersz[2] >= limit_czasu
+            )
+            self._zlicz(polaczenie, "trafienia" if pasuje else "chybienia")
+            if not pasuje:
+                return None
+            polaczenie.execute("UPDATE wyniki SET uzyto = ? WHERE klucz = ?", (time.time(), klucz))
+
+        dane = json.loads(wiersz[0])
+        _, kolejnosc, odwrocone = postac_kanoniczna(elementy)
+        # Indeks kanoniczny p odpowiada elementowi kolejnosc[p] wywołującego
+        odwrocone_kanoniczne = [odwrocone[i] for i in kolejnosc]
+        return Wynik(
+            status=dane["status"],
+            koszt=dane["koszt"],
+            uklad=_przenumeruj_uklad(dane["uklad"], dict(enumerate(kolejnosc)), odwrocone_kanoniczne),
+            elementy=list(elementy),
+            czasy={"pamiec": time.perf_counter() - start},
+            ograniczenie=dane["ograniczenie"],
+            historia=dane["historia"],
+        )
+
+    def zapisz(self, klucz, wynik, limit_czasu=None, wzgledna_luka=None):
+        """
+        Zapisuje wynik (w postaci kanonicznej) pod kluczem, zastępując poprzedni, i usuwa
+        najdawniej używane wpisy ponad limity. Wyniki bez rozwiązania i bez dowodu
+        (np. UNKNOWN po upływie limitu) nie są zapisywane.
+        """
+        if wynik.status not in STATUSY_ZAPISYWANE:
+            return
+        _, kolejnosc, odwrocone = postac_kanoniczna(wynik.elementy)
+        pozycja = {i: p for p, i in enumerate(kolejnosc)}
+        tekst = json.dumps({
+            "status": wynik.status,
+            "koszt": wynik.koszt,
+            "uklad": _przenumeruj_uklad(wynik.uklad, pozycja, odwrocone),
+            "ograniczenie": wynik.ograniczenie,
+            "historia": wynik.historia,
+        })
+        with self._polacz() as polaczenie:
+            polaczenie.execute(
+                "INSERT OR REPLACE INTO wyniki VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (klucz, tekst, wynik.status, limit_czasu, wzgledna_luka, len(tekst), time.time()),
+            )
+            self._usun_nadmiar(polaczenie)
+
+    def _usun_nadmiar(self, polaczenie):
+        """Usuwa najdawniej używane wpisy, dopóki liczba i rozmiar wpisów przekraczają limity."""
+        while True:
+            liczba, rozmiar = polaczenie.execute("SELECT COUNT(*), COALESCE(SUM(rozmiar), 0) FROM wyniki").fetchone()
+            if liczba <= 1 or ((self.maks_wpisow is None or liczba <= self.maks_wpisow)
+                               and (self.maks_rozmiar is None or rozmiar <= self.maks_rozmiar)):
+                return
+            polaczenie.execute("DELETE FROM wyniki WHERE klucz = (SELECT klucz FROM wyniki ORDER BY uzyto LIMIT 1)")
+            self._zlicz(polaczenie, "usuniete")
+
+    def statystyki(self):
+        """Słownik {"trafienia", "chybienia", "usuniete", "wpisy", "rozmiar"}."""
+        with self._polacz() as polaczenie:
+            statystyki = {"trafienia": 0, "chybienia": 0, "usuniete": 0}
+            statystyki.update(polaczenie.execute("SELECT nazwa, wartosc FROM statystyki").fetchall())
+            statystyki["wpisy"], statystyki["rozmiar"] = polaczenie.execute(
+                "SELECT COUNT(*), COALESCE(SUM(rozmiar), 0) FROM wyniki"
+            ).fetchone()
+        return statystyki
+
+    def wyczysc(self):
+        """Usuwa wszystkie wpisy i zeruje statystyki."""
+        with self._polacz() as polaczenie:
+            polaczenie.execute("DELETE FROM wyniki")
+            polaczenie.execute("DELETE FROM statystyki")
+
+
+def rozwiaz_z_pamiecia(pamiec, funkcja_rozwiazujaca, oryginalne_arkusze, dopuszczalny_podzial, grubosc_krawedzi,
+                       elementy, **ustawienia):
+    """
+    Zwraca wynik z pamięci albo rozwiązuje zlecenie funkcja_rozwiazujaca i zapisuje wynik.
+
+    Parametry:
+      - pamiec: PamiecWynikow
+      - funkcja_rozwiazujaca: np. planowanie_plyt.rozwiaz albo planowanie_plyt_gilotine.rozwiaz
+      - pozostałe parametry jak w funkcja_rozwiazujaca (limit_czasu i wzgledna_luka decydują,
+        czy zapisany wynik jest wystarczający)
+
+    Ustawienia z USTAWIENIA_KLUCZA (z wartościami domyślnymi funkcji) są częścią odcisku.
+    """
+    domyslne = {
+        nazwa: parametr.default for nazwa, parametr in inspect.signature(funkcja_rozwiazujaca).parameters.items()
+        if nazwa in USTAWIENIA_KLUCZA and parametr.default is not inspect.Parameter.empty
+    }
+    klucz = odcisk(oryginalne_arkusze, dopuszczalny_podzial, grubosc_krawedzi, elementy,
+                   f"{funkcja_rozwiazujaca.__module__}.{funkcja_rozwiazujaca.__qualname__}",
+                   {nazwa: ustawienia.get(nazwa, wartosc) for nazwa, wartosc in domyslne.items()})
+    limit_czasu = ustawienia.get("limit_czasu")
+    wzgledna_luka = ustawienia.get("wzgledna_luka")
+
+    wynik = pamiec.pobierz(klucz, elementy, limit_czasu, wzgledna_luka)
+    if wynik is None:
+        wynik = funkcja_rozwiazujaca(oryginalne_arkusze, dopuszczalny_podzial, grubosc_krawedzi, elementy,
+                                     **ustawienia)
+        pamiec.zapisz(klucz, wynik, limit_czasu, wzgledna_luka)
+    return wynik
@@ -1,132 +1,448 @@
-import matplotlib
-# Ustawienie backendu na TkAgg – pozwala uniknąć problemów z wyświetlaniem wykresów
-matplotlib.use('TkAgg')
-
-import matplotlib.pyplot as plt
 from ortools.sat.python import cp_model
 import os
+import time
+
+from agregacja_popytu import agreguj_elementy, dodaj_porzadek_kopii
+from generowanie_kolumn import rozwiaz_generowaniem_kolumn
+from heurystyki_listew import przypisz_do_instancji, rozwiaz_heurystycznie
+from magazyn import limity_instancji
+from ograniczenia_dolne import dolne_ograniczenie_kosztu
+from przypisanie import dodaj_przypisanie, indeksy_opcji, opcja_elementu
+from rozwiazywanie import PostepRozwiazywania
+from symetria import dodaj_lamanie_symetrii
+from wyniki import Wynik
 
-def generuj_opcje_listew(oryginalne_listew):
+def generuj_opcje_listew(oryginalne_listew, elementy=None, grubosc_krawedzi=0, gorny_koszt=None):
     """
     Generuje dostępne opcje listew.
     Dla każdej listwy oryginalnej (ze zdefiniowanym kluczem "number_of_items")
-    tworzy tyle instancji, ile wynosi ta wartość.
+    tworzy tyle instancji, ile wynosi ta wartość. Jeśli podano elementy, liczba
+    instancji jest ograniczona przez magazyn.limity_instancji (gorny_koszt to koszt
+    znanego rozwiązania, np. heurystycznego), więc duże stany magazynowe nie
+    powiększają modelu.
     """
+    if elementy is None:
+        limity = [listwa.get("number_of_items", 1) for listwa in oryginalne_listew]
+    else:
+        limity = limity_instancji(oryginalne_listew, elementy,
+                                  lambda d, listwa: d + grubosc_krawedzi <= listwa["length"], gorny_koszt)
     opcje_listew = []
-    for listwa in oryginalne_listew:
-        liczba_instancji = listwa.get("number_of_items", 1)
+    for listwa, liczba_instancji in zip(oryginalne_listew, limity):
         for idx in range(liczba_instancji):
             instancja = listwa.copy()
             instancja["id"] = f'{listwa["id"]}_{idx+1}'
             opcje_listew.append(instancja)
     return opcje_listew
 
-def main(oryginalne_listew, dopuszczalny_podzial, grubosc_krawedzi, elementy):
+def rozwiaz_cp_sat(oryginalne_listew, grubosc_krawedzi, elementy, lamanie_symetrii=True, podpowiedz=None,
+                   model_uproszczony=False, limit_czasu=None, wzgledna_luka=None, postep=None):
     """
-    Główna funkcja budująca i rozwiązująca model jednowymiarowego cięcia listew.
+    Buduje i rozwiązuje model CP-SAT z przypisaniem każdego elementu do instancji listwy.
+    Przy lamanie_symetrii=True identyczne instancje listew są uporządkowane
+    (użycie i obciążenie nierosnące w obrębie grupy). Jeśli podano podpowiedz
+    (wynik heurystyki w formacie (uklad, koszt)), trafia ona do modelu jako AddHint,
+    dzięki czemu solver startuje od dobrego rozwiązania.
 
-    Parametry:
-      - oryginalne_listew: lista słowników z danymi listew (długość, cena, id, number_of_items)
-      - dopuszczalny_podzial: bool, czy generować dodatkowe warianty listew (tutaj nieużywany)
-      - grubosc_krawedzi: grubość cięcia (mm)
-      - elementy: lista długości elementów do wycięcia (w mm)
+    Przy model_uproszczony=True model nie zawiera zmiennych pozycji ani stałych
+    zmiennych długości – o wykonalności decyduje samo ograniczenie sumy długości,
+    a kawałki układane są na listwie kolejno dopiero po rozwiązaniu.
+
+    limit_czasu i wzgledna_luka ograniczają pracę solvera – po ich osiągnięciu zwracane
+    jest najlepsze dotąd rozwiązanie. Opcjonalny postep (PostepRozwiazywania) otrzymuje
+    kolejne rozwiązania i po zakończeniu przechowuje status solvera.
+
+    Zwraca krotkę (uklad, koszt) w tym samym formacie co rozwiaz_generowaniem_kolumn.
+    Jeśli solver nie znajdzie rozwiązania tańszego od podpowiedzi, zwracana jest podpowiedź;
+    None oznacza, że rozwiązania nie ma albo nie znaleziono go w limicie czasu (bez podpowiedzi).
     """
     wspolczynnik_skalujacy = 100
-    opcje_listew = generuj_opcje_listew(oryginalne_listew)
+
+    # Dolne ograniczenie kosztu (ciągłe / L2 / DFF); None oznacza kawałek dłuższy niż każda listwa
+    ograniczenie = dolne_ograniczenie_kosztu(oryginalne_listew, elementy, grubosc_krawedzi)
+    if ograniczenie is None:
+        return None
+
+    # Tylko instancje, które mogą wystąpić w rozwiązaniu nie droższym niż podpowiedź
+    opcje_listew = generuj_opcje_listew(oryginalne_listew, elementy, grubosc_krawedzi,
+                                        podpowiedz[1] if podpowiedz else None)
+    if not opcje_listew and elementy:
+        # Każdy kawałek mieści się w którejś listwie (ograniczenie nie jest None), więc pusta
+        # lista opcji nie jest dowodem braku rozwiązania – opcje bez limitów z górnego kosztu
+        opcje_listew = generuj_opcje_listew(oryginalne_listew, elementy, grubosc_krawedzi)
+    if not opcje_listew:
+        # Nie ma czego ciąć
+        return [], 0.0
     for listwa in opcje_listew:
         listwa["price_int"] = int(round(listwa["price"] * wspolczynnik_skalujacy))
 
     model = cp_model.CpModel()
 
-    przypisanie_elementu = [
-        model.NewIntVar(0, len(opcje_listew) - 1, f'przypisanie_{i}')
-        for i in range(len(elementy))
-    ]
+    przypisane, listwa_uzyta = dodaj_przypisanie(model, len(elementy), len(opcje_listew),
+                                                 'przypisany', 'listwa_uzyta')
 
-    pozycja = [
-        model.NewIntVar(0, max(listwa["length"] for listwa in opcje_listew), f'pozycja_{i}')
-        for i in range(len(elementy))
-    ]
+    if not model_uproszczony:
+        pozycja = [
+            model.NewIntVar(0, max(listwa["length"] for listwa in opcje_listew), f'pozycja_{i}')
+            for i in range(len(elementy))
+        ]
 
-    dlugosci_elementow = []
-    for i, d in enumerate(elementy):
-        dl = model.NewIntVar(0, max(elementy), f'dlugosc_{i}')
-        model.Add(dl == d)
-        dlugosci_elementow.append(dl)
+        dlugosci_elementow = []
+        for i, d in enumerate(elementy):
+            dl = model.NewIntVar(0, max(elementy), f'dlugosc_{i}')
+            model.Add(dl == d)
+            dlugosci_elementow.append(dl)
 
-    przypisane = {}
     for i in range(len(elementy)):
         for s in range(len(opcje_listew)):
-            var = model.NewBoolVar(f'przypisany_{i}_{s}')
-            przypisane[(i, s)] = var
-            model.Add(przypisanie_elementu[i] == s).OnlyEnforceIf(var)
-            model.Add(przypisanie_elementu[i] != s).OnlyEnforceIf(var.Not())
+            var = przypisane[(i, s)]
             listwa = opcje_listew[s]
-            model.Add(pozycja[i] + dlugosci_elementow[i] + grubosc_krawedzi <= listwa["length"]).OnlyEnforceIf(var)
+            if not model_uproszczony:
+                model.Add(pozycja[i] + dlugosci_elementow[i] + grubosc_krawedzi <= listwa["length"]).OnlyEnforceIf(var)
+            elif elementy[i] + grubosc_krawedzi > listwa["length"]:
+                # Bez pozycji wystarczy zabronić przypisania kawałka, który się nie mieści
+                model.Add(var == 0)
 
+    # Kopie elementów o tej samej długości są wymienne – porządkujemy je po indeksie listwy
+    dodaj_porzadek_kopii(model, agreguj_elementy(elementy),
+                         indeksy_opcji(przypisane, len(elementy), len(opcje_listew)))
+
+    sumy_dlugosci = []
     for s in range(len(opcje_listew)):
         suma_dlugosci = model.NewIntVar(0, 100000, f'suma_dlugosci_{s}')
         model.Add(suma_dlugosci == sum(elementy[i] * przypisane[(i, s)] for i in range(len(elementy))))
         liczba_elem_na_listwie = sum(przypisane[(i, s)] for i in range(len(elementy)))
         model.Add(suma_dlugosci + (liczba_elem_na_listwie - 1) * grubosc_krawedzi <= opcje_listew[s]["length"])
+        sumy_dlugosci.append(suma_dlugosci)
 
-    listwa_uzyta = []
-    for s in range(len(opcje_listew)):
-        uzyta = model.NewBoolVar(f'listwa_uzyta_{s}')
-        listwa_uzyta.append(uzyta)
+    if lamanie_symetrii:
+        dodaj_lamanie_symetrii(model, opcje_listew, listwa_uzyta, ("length", "price_int"), sumy_dlugosci)
 
-    for s in range(len(opcje_listew)):
-        wskazniki = [przypisane[(i, s)] for i in range(len(elementy))]
-        model.Add(sum(wskazniki) <= len(elementy) * listwa_uzyta[s])
-        model.Add(listwa_uzyta[s] <= sum(wskazniki))
+    # Rozgrzewka: rozwiązanie heurystyczne jako podpowiedź dla solvera
+    mapowanie = przypisz_do_instancji(podpowiedz[0], opcje_listew, elementy) if podpowiedz else None
+    if mapowanie is not None:
+        listwa_elementu = {}
+        pozycja_elementu = {}
+        for s, na_listwie in mapowanie:
+            for i, pos in na_listwie:
+                listwa_elementu[i] = s
+                pozycja_elementu[i] = min(pos, opcje_listew[s]["length"] - elementy[i] - grubosc_krawedzi)
+        # Kopie tej samej długości dostają listwy rosnąco – zgodnie z porządkiem kopii
+        for typ in agreguj_elementy(elementy):
+            pary = sorted((listwa_elementu[i], pozycja_elementu[i]) for i in typ["indeksy"])
+            for i, (s, pos) in zip(typ["indeksy"], pary):
+                listwa_elementu[i] = s
+                pozycja_elementu[i] = pos
+        for i in range(len(elementy)):
+            if not model_uproszczony:
+                model.AddHint(pozycja[i], pozycja_elementu[i])
+            for s in range(len(opcje_listew)):
+                model.AddHint(przypisane[(i, s)], listwa_elementu[i] == s)
+        for s in range(len(opcje_listew)):
+            model.AddHint(listwa_uzyta[s], s in listwa_elementu.values())
 
     koszt_calosciowy = model.NewIntVar(0, sum(listwa["price_int"] for listwa in opcje_listew), 'koszt_calosciowy')
     model.Add(koszt_calosciowy == sum(opcje_listew[s]["price_int"] * listwa_uzyta[s] for s in range(len(opcje_listew))))
+    model.Add(koszt_calosciowy >= ograniczenie)
     model.Minimize(koszt_calosciowy)
 
-    solver = cp_model.CpSolver()
-    status = solver.Solve(model)
+    def odczytaj_uklad(wartosci):
+        """Układ listew z wartości zmiennych (solver albo callback z bieżącym rozwiązaniem)."""
+        uklad = []
+        listwa_elementu = [opcja_elementu(wartosci, przypisane, i, len(opcje_listew)) for i in range(len(elementy))]
+        for s_idx in sorted(set(listwa_elementu)):
+            na_listwie = [i for i in range(len(elementy)) if listwa_elementu[i] == s_idx]
+            if model_uproszczony:
+                # Pozycje wyznaczane po rozwiązaniu: kawałki kolejno, z odstępem równym rzazowi
+                pozycje = []
+                pozycja_biezaca = 0
+                for i in na_listwie:
+                    pozycje.append(pozycja_biezaca)
+                    pozycja_biezaca += elementy[i] + grubosc_krawedzi
+            else:
+                pozycje = [wartosci.Value(pozycja[i]) for i in na_listwie]
+            uklad.append({"listwa": opcje_listew[s_idx], "elementy": list(zip(na_listwie, pozycje))})
+        return uklad
+
+    # Wyszukiwanie kończy się, gdy tylko koszt rozwiązania osiągnie dolne ograniczenie
+    if postep is None:
+        postep = PostepRozwiazywania()
+    postep.ograniczenie = ograniczenie
+    postep.skala = wspolczynnik_skalujacy
+    postep.odczytaj = odczytaj_uklad
+    solver, status = postep.rozwiaz(model, limit_czasu, wzgledna_luka)
 
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        uzyte_listwy = {solver.Value(przypisanie_elementu[i]) for i in range(len(elementy))}
-        liczba_uzytych_listew = len(uzyte_listwy)
-
-        katalog_wykresow = "wykresy"
-        os.makedirs(katalog_wykresow, exist_ok=True)
-
-        fig, axes = plt.subplots(nrows=liczba_uzytych_listew, figsize=(10, 2 * liczba_uzytych_listew), sharex=True)
-        if liczba_uzytych_listew == 1:
-            axes = [axes]  # Jeśli tylko jeden subplot, zamień na listę
-
-        for ax, s_idx in zip(axes, uzyte_listwy):
-            lista = opcje_listew[s_idx]
-            ax.hlines(0, 0, lista["length"], colors='black', linewidth=4)
-            ax.set_xlim(0, lista["length"] + 50)
-            ax.set_ylim(-0.6, 1.5)
-            ax.set_xlabel("Długość (mm)")
-            ax.set_yticks([])
-            ax.grid(True, axis='x')
-
-            ax.text(lista["length"] + 10, 0, f"{lista['length']} mm", fontsize=12,
-                    color='red', backgroundcolor='white', va='center', ha='left')
-
-            for i in range(len(elementy)):
-                if solver.Value(przypisanie_elementu[i]) == s_idx:
-                    pos = solver.Value(pozycja[i])
-                    dl = solver.Value(dlugosci_elementow[i])
-                    rect = plt.Rectangle((pos, -0.3), dl, 0.6, edgecolor='blue',
-                                         facecolor='cyan', alpha=0.5)
-                    ax.add_patch(rect)
-                    etykieta = f"P{i} ({elementy[i]} mm)"
-                    ax.text(pos + dl / 2, 0.7, etykieta, color="black",
-                            fontsize=10, ha='center', va='bottom', rotation=90)
-                    ax.vlines([pos, pos + dl], -0.3, 0.3, colors='red', linestyles='dotted')
-
-        plt.tight_layout()
-        sciezka = os.path.join(katalog_wykresow, "wszystkie_listwy.png")
-        fig.savefig(sciezka, dpi=300, bbox_inches='tight')
-        print(f'Wykres wszystkich listew zapisany jako: {sciezka}')
+        koszt = solver.Value(koszt_calosciowy) / wspolczynnik_skalujacy
+        if podpowiedz is None or koszt <= podpowiedz[1]:
+            return odczytaj_uklad(solver), koszt
+    # Solver nie znalazł (tańszego) rozwiązania przed upływem limitu czasu – zostaje podpowiedź heurystyczna
+    return podpowiedz
+
+def rozwiaz_cp_sat_zagregowany(oryginalne_listew, grubosc_krawedzi, elementy, lamanie_symetrii=True,
+                               podpowiedz=None, limit_czasu=None, wzgledna_luka=None, postep=None):
+    """
+    Buduje i rozwiązuje model CP-SAT na zagregowanym popycie.
+
+    Zamiast zmiennej przypisania dla każdego elementu model ma całkowitą
+    zmienną licznikową dla każdej pary (typ elementu, instancja listwy),
+    więc jego rozmiar zależy od liczby różnych długości, a nie liczby sztuk.
+    Pozycje kawałków wyznaczane są po rozwiązaniu – kolejno, z odstępem
+    równym grubości cięcia.
+
+    Parametry lamanie_symetrii, podpowiedz, limit_czasu, wzgledna_luka i postep
+    działają jak w rozwiaz_cp_sat.
+    Zwraca krotkę (uklad, koszt) albo None – tak samo jak rozwiaz_cp_sat.
+    """
+    wspolczynnik_skalujacy = 100
+
+    # Dolne ograniczenie kosztu (ciągłe / L2 / DFF); None oznacza kawałek dłuższy niż każda listwa
+    ograniczenie = dolne_ograniczenie_kosztu(oryginalne_listew, elementy, grubosc_krawedzi)
+    if ograniczenie is None:
+        return None
+
+    # Tylko instancje, które mogą wystąpić w rozwiązaniu nie droższym niż podpowiedź
+    opcje_listew = generuj_opcje_listew(oryginalne_listew, elementy, grubosc_krawedzi,
+                                        podpowiedz[1] if podpowiedz else None)
+    if not opcje_listew and elementy:
+        # Każdy kawałek mieści się w którejś listwie (ograniczenie nie jest None), więc pusta
+        # lista opcji nie jest dowodem braku rozwiązania – opcje bez limitów z górnego kosztu
+        opcje_listew = generuj_opcje_listew(oryginalne_listew, elementy, grubosc_krawedzi)
+    if not opcje_listew:
+        # Nie ma czego ciąć
+        return [], 0.0
+    for listwa in opcje_listew:
+        listwa["price_int"] = int(round(listwa["price"] * wspolczynnik_skalujacy))
+    typy_elementow = agreguj_elementy(elementy)
+    typ_elementu = {i: k for k, typ in enumerate(typy_elementow) for i in typ["indeksy"]}
+
+    model = cp_model.CpModel()
+
+    # Zmienne: ile sztuk typu k wycinamy z listwy s (tylko gdy kawałek mieści się w listwie)
+    liczba = {}
+    for k, typ in enumerate(typy_elementow):
+        waga = typ["rozmiar"] + grubosc_krawedzi
+        for s, listwa in enumerate(opcje_listew):
+            if waga <= listwa["length"]:
+                maks = min(typ["ilosc"], (listwa["length"] + grubosc_krawedzi) // waga)
+                liczba[(k, s)] = model.NewIntVar(0, maks, f'liczba_{k}_{s}')
+
+    # Popyt: każdy typ musi zostać wycięty w wymaganej liczbie sztuk
+    for k, typ in enumerate(typy_elementow):
+        model.Add(sum(liczba[(k, s)] for s in range(len(opcje_listew)) if (k, s) in liczba) == typ["ilosc"])
+
+    listwa_uzyta = [model.NewBoolVar(f'listwa_uzyta_{s}') for s in range(len(opcje_listew))]
+
+    # Pojemność: suma długości z rzazami mieści się w listwie, o ile listwa jest użyta
+    for s, listwa in enumerate(opcje_listew):
+        model.Add(
+            sum((typ["rozmiar"] + grubosc_krawedzi) * liczba[(k, s)]
+                for k, typ in enumerate(typy_elementow) if (k, s) in liczba)
+            <= (listwa["length"] + grubosc_krawedzi) * listwa_uzyta[s]
+        )
+
+    if lamanie_symetrii:
+        obciazenie = [
+            sum(typ["rozmiar"] * liczba[(k, s)] for k, typ in enumerate(typy_elementow) if (k, s) in liczba)
+            for s in range(len(opcje_listew))
+        ]
+        dodaj_lamanie_symetrii(model, opcje_listew, listwa_uzyta, ("length", "price_int"), obciazenie)
+
+    # Rozgrzewka: liczby sztuk z rozwiązania heurystycznego jako podpowiedź
+    mapowanie = przypisz_do_instancji(podpowiedz[0], opcje_listew, elementy) if podpowiedz else None
+    if mapowanie is not None:
+        liczby_startowe = {}
+        for s, na_listwie in mapowanie:
+            for i, _ in na_listwie:
+                klucz = (typ_elementu[i], s)
+                liczby_startowe[klucz] = liczby_startowe.get(klucz, 0) + 1
+        for klucz, zmienna in liczba.items():
+            model.AddHint(zmienna, liczby_startowe.get(klucz, 0))
+        uzyte_startowe = {s for s, _ in mapowanie}
+        for s in range(len(opcje_listew)):
+            model.AddHint(listwa_uzyta[s], s in uzyte_startowe)
+
+    koszt_calosciowy = model.NewIntVar(0, sum(listwa["price_int"] for listwa in opcje_listew), 'koszt_calosciowy')
+    model.Add(koszt_calosciowy == sum(opcje_listew[s]["price_int"] * listwa_uzyta[s] for s in range(len(opcje_listew))))
+    model.Add(koszt_calosciowy >= ograniczenie)
+    model.Minimize(koszt_calosciowy)
+
+    def odczytaj_uklad(wartosci):
+        """Układ listew z wartości liczników (solver albo callback z bieżącym rozwiązaniem)."""
+        kolejki = [list(reversed(typ["indeksy"])) for typ in typy_elementow]
+        uklad = []
+        for s, listwa in enumerate(opcje_listew):
+            na_listwie = []
+            pozycja = 0
+            for k, typ in enumerate(typy_elementow):
+                if (k, s) not in liczba:
+                    continue
+                for _ in range(wartosci.Value(liczba[(k, s)])):
+                    na_listwie.append((kolejki[k].pop(), pozycja))
+                    pozycja += typ["rozmiar"] + grubosc_krawedzi
+            if na_listwie:
+                uklad.append({"listwa": listwa, "elementy": na_listwie})
+        return uklad
+
+    # Wyszukiwanie kończy się, gdy tylko koszt rozwiązania osiągnie dolne ograniczenie
+    if postep is None:
+        postep = PostepRozwiazywania()
+    postep.ograniczenie = ograniczenie
+    postep.skala = wspolczynnik_skalujacy
+    postep.odczytaj = odczytaj_uklad
+    solver, status = postep.rozwiaz(model, limit_czasu, wzgledna_luka)
+
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        koszt = solver.Value(koszt_calosciowy) / wspolczynnik_skalujacy
+        if podpowiedz is None or koszt <= podpowiedz[1]:
+            return odczytaj_uklad(solver), koszt
+    # Solver nie znalazł (tańszego) rozwiązania przed upływem limitu czasu – zostaje podpowiedź heurystyczna
+    return podpowiedz
+
+def rozwiaz(oryginalne_listew, grubosc_krawedzi, elementy, silnik="cp_sat", agregacja=False,
+            lamanie_symetrii=True, heurystyka="najlepsza", rozgrzewka=True, model_uproszczony=False,
+            limit_czasu=None, wzgledna_luka=None, postep=None):
+    """
+    Rozwiązuje zlecenie cięcia listew bez wypisywania i rysowania.
+
+    Parametry jak w main, a ponadto postep – opcjonalny PostepRozwiazywania, który
+    otrzymuje kolejne rozwiązania CP-SAT (np. ze strumien_rozwiazan).
+
+    Zwraca obiekt Wynik z układem listew, kosztem, statusem i czasami etapów
+    ("rozgrzewka", "rozwiazanie", "lacznie"). Status "OPTIMAL" oznacza, że koszt osiągnął
+    dolne ograniczenie albo solver CP-SAT udowodnił optymalność; po upływie limitu
+    czasu zwracane jest najlepsze dotąd rozwiązanie ze statusem "FEASIBLE". Jeśli nie znaleziono
+    żadnego rozwiązania, status to "INFEASIBLE" tylko przy dowodzie jego braku, a poza tym "UNKNOWN".
+    """
+    start = time.perf_counter()
+    czasy = {}
+    if postep is None:
+        postep = PostepRozwiazywania()
+    if silnik == "generowanie_kolumn":
+        if limit_czasu is not None:
+            wynik = rozwiaz_generowaniem_kolumn(oryginalne_listew, elementy, grubosc_krawedzi,
+                                                limit_czasu=limit_czasu)
+        else:
+            wynik = rozwiaz_generowaniem_kolumn(oryginalne_listew, elementy, grubosc_krawedzi)
+    elif silnik == "szybki":
+        wynik = rozwiaz_heurystycznie(oryginalne_listew, elementy, grubosc_krawedzi, heurystyka)
+    elif silnik == "cp_sat":
+        podpowiedz = None
+        if rozgrzewka:
+            podpowiedz = rozwiaz_heurystycznie(oryginalne_listew, elementy, grubosc_krawedzi, heurystyka)
+            czasy["rozgrzewka"] = time.perf_counter() - start
+        if agregacja:
+            wynik = rozwiaz_cp_sat_zagregowany(oryginalne_listew, grubosc_krawedzi, elementy,
+                                               lamanie_symetrii, podpowiedz, limit_czasu, wzgledna_luka, postep)
+        else:
+            wynik = rozwiaz_cp_sat(oryginalne_listew, grubosc_krawedzi, elementy, lamanie_symetrii, podpowiedz,
+                                   model_uproszczony, limit_czasu, wzgledna_luka, postep)
+    else:
+        raise ValueError(f"Nieznany silnik: {silnik}")
+    czasy["rozwiazanie"] = time.perf_counter() - start - czasy.get("rozgrzewka", 0.0)
+    czasy["lacznie"] = time.perf_counter() - start
+
+    ograniczenie = dolne_ograniczenie_kosztu(oryginalne_listew, elementy, grubosc_krawedzi)
+    if wynik is None:
+        # Heurystyka bez miejsca w magazynie albo przerwane generowanie kolumn nie dowodzą braku
+        # rozwiązania – dowodem jest kawałek dłuższy niż każda listwa albo wynik solvera CP-SAT
+        if ograniczenie is None or (silnik == "cp_sat" and postep.status == "INFEASIBLE"):
+            status = "INFEASIBLE"
+        else:
+            status = "UNKNOWN"
+        return Wynik(status=status, elementy=list(elementy), czasy=czasy, historia=postep.historia)
+    uklad, koszt = wynik
+    if silnik == "cp_sat" and postep.status in ("OPTIMAL", "FEASIBLE"):
+        # Przy wzgledna_luka solver kończy ze statusem OPTIMAL przed dowodem optymalności,
+        # więc o statusie decyduje porównanie kosztu z ograniczeniem solvera (w groszach)
+        ograniczenie = max(ograniczenie, postep.solver.BestObjectiveBound())
+    status = "OPTIMAL" if int(round(koszt * 100)) <= ograniczenie + 1e-9 else "FEASIBLE"
+    return Wynik(status=status, koszt=koszt, uklad=uklad, elementy=list(elementy), czasy=czasy,
+                 ograniczenie=min(ograniczenie / 100, koszt), historia=postep.historia)
+
+def rysuj_listwy(uklad, elementy, katalog_wykresow="wykresy", pokaz=True):
+    """
+    Rysuje wszystkie użyte listwy na jednym wykresie i zapisuje go do pliku.
+
+    Parametry:
+      - uklad: lista słowników {"listwa": instancja listwy, "elementy": [(indeks_elementu, pozycja), ...]}
+      - elementy: lista długości elementów do wycięcia (w mm)
+      - katalog_wykresow: katalog, w którym zapisywany jest wykres
+      - pokaz: bool, czy wyświetlić wykres w oknie (plt.show)
+    """
+    # matplotlib importowany dopiero tutaj, aby samo rozwiązywanie go nie wymagało
+    import matplotlib.pyplot as plt
+
+    liczba_uzytych_listew = len(uklad)
+    os.makedirs(katalog_wykresow, exist_ok=True)
+
+    fig, axes = plt.subplots(nrows=liczba_uzytych_listew, figsize=(10, 2 * liczba_uzytych_listew), sharex=True)
+    if liczba_uzytych_listew == 1:
+        axes = [axes]  # Jeśli tylko jeden subplot, zamień na listę
+
+    for ax, wpis in zip(axes, uklad):
+        lista = wpis["listwa"]
+        ax.hlines(0, 0, lista["length"], colors='black', linewidth=4)
+        ax.set_xlim(0, lista["length"] + 50)
+        ax.set_ylim(-0.6, 1.5)
+        ax.set_xlabel("Długość (mm)")
+        ax.set_yticks([])
+        ax.grid(True, axis='x')
+
+        ax.text(lista["length"] + 10, 0, f"{lista['length']} mm", fontsize=12,
+                color='red', backgroundcolor='white', va='center', ha='left')
+
+        for i, pos in wpis["elementy"]:
+            dl = elementy[i]
+            rect = plt.Rectangle((pos, -0.3), dl, 0.6, edgecolor='blue',
+                                 facecolor='cyan', alpha=0.5)
+            ax.add_patch(rect)
+            etykieta = f"P{i} ({elementy[i]} mm)"
+            ax.text(pos + dl / 2, 0.7, etykieta, color="black",
+                    fontsize=10, ha='center', va='bottom', rotation=90)
+            ax.vlines([pos, pos + dl], -0.3, 0.3, colors='red', linestyles='dotted')
+
+    plt.tight_layout()
+    sciezka = os.path.join(katalog_wykresow, "wszystkie_listwy.png")
+    fig.savefig(sciezka, dpi=300, bbox_inches='tight')
+    print(f'Wykres wszystkich listew zapisany jako: {sciezka}')
+    if pokaz:
         plt.show()
+    plt.close(fig)
+
+def main(oryginalne_listew, dopuszczalny_podzial, grubosc_krawedzi, elementy, silnik="cp_sat",
+         agregacja=False, lamanie_symetrii=True, heurystyka="najlepsza", rozgrzewka=True,
+         model_uproszczony=False, limit_czasu=None, wzgledna_luka=None):
+    """
+    Główna funkcja budująca i rozwiązująca model jednowymiarowego cięcia listew.
+
+    Parametry:
+      - oryginalne_listew: lista słowników z danymi listew (długość, cena, id, number_of_items)
+      - dopuszczalny_podzial: bool, czy generować dodatkowe warianty listew (tutaj nieużywany)
+      - grubosc_krawedzi: grubość cięcia (mm)
+      - elementy: lista długości elementów do wycięcia (w mm)
+      - silnik: "cp_sat" (model przypisań element–listwa),
+                "generowanie_kolumn" (wzorce cięcia Gilmore–Gomory, dla dużych zleceń) lub
+                "szybki" (heurystyka bez solvera – wynik w milisekundach, np. do wycen)
+      - agregacja: bool, czy model CP-SAT ma operować na typach elementów (długość, ilość)
+                   zamiast na pojedynczych sztukach
+      - lamanie_symetrii: bool, czy porządkować identyczne instancje listew (domyślnie włączone)
+      - heurystyka: "ffd", "bfd", "koszt" lub "najlepsza" – używana w trybie "szybki" i do rozgrzewki
+      - rozgrzewka: bool, czy przekazać wynik heurystyki do CP-SAT jako podpowiedź (AddHint)
+      - model_uproszczony: bool, czy budować model CP-SAT bez zmiennych pozycji
+                           (pozycje kawałków wyznaczane są kolejno po rozwiązaniu)
+      - limit_czasu: maksymalny czas pracy solvera w sekundach (None – bez limitu);
+                     po jego upływie zwracane jest najlepsze dotąd rozwiązanie
+      - wzgledna_luka: względna luka optymalności, przy której solver kończy pracę (np. 0.01)
+    """
+    wynik = rozwiaz(oryginalne_listew, grubosc_krawedzi, elementy, silnik, agregacja,
+                    lamanie_symetrii, heurystyka, rozgrzewka, model_uproszczony, limit_czasu, wzgledna_luka)
+
+    if wynik.znaleziono:
+        print(f"Łączny koszt: {wynik.koszt:.2f}")
+        # Ustawienie backendu na TkAgg – pozwala uniknąć problemów z wyświetlaniem wykresów
+        import matplotlib
+        matplotlib.use('TkAgg')
+        rysuj_listwy(wynik.uklad, elementy)
     else:
         print("Nie znaleziono rozwiązania.")
 
@@ -4,20 +4,54 @@ matplotlib.use('TkAgg')
 
 import matplotlib.pyplot as plt
 from ortools.sat.python import cp_model
+import numpy as np
 import os
 
-def main(sciany, dostepne_listwy, minimalny_kawalek):
+from agregacja_popytu import agreguj_elementy
+
+def rozwiaz_dekompozycja(sciany, dostepne_listwy, minimalny_kawalek):
     """
-    Rozwiązuje problem cięcia ścian przy użyciu dostępnych listew.
+    Rozwiązuje każdą ścianę niezależnie – wybór (t, n, r) nie wiąże ścian ze sobą.
 
-    Parametry:
-      - sciany: lista długości ścian do pokrycia (w mm)
-      - dostepne_listwy: lista słowników opisujących dostępne listwy.
-            Każdy słownik musi zawierać:
-                "length" – długość listwy (mm)
-                "price"  – cena listwy
-                "id"     – unikalny identyfikator typu listwy
-      - minimalny_kawalek: najkrótszy kawałek, który można użyć (w mm)
+    Dla listwy o długości L równanie (n - 1) * L + r = ściana z warunkiem
+    minimalny_kawalek <= r <= L ma co najwyżej jedno rozwiązanie:
+    n = ceil(ściana / L), r = ściana - (n - 1) * L (typ odpada, gdy r < minimalny_kawalek).
+    Wystarczy więc dla każdej ściany wybrać najtańszy dopuszczalny typ. Obliczenia
+    wykonywane są naraz dla wszystkich różnych długości ścian i wszystkich typów
+    (macierz NumPy), więc nawet tysiące ścian liczą się w milisekundach.
+
+    Zwraca listę pokryć – dla każdej ściany listę kawałków [(indeks_typu, wykorzystana_dlugosc), ...] –
+    albo None, jeśli którejś ściany nie da się pokryć.
+    """
+    scale_factor = 100
+    typy_scian = agreguj_elementy(sciany)
+
+    dlugosci_scian = np.array([typ["rozmiar"] for typ in typy_scian], dtype=np.int64)[:, None]
+    board_lengths = np.array([d["length"] for d in dostepne_listwy], dtype=np.int64)[None, :]
+    scaled_prices = np.array([int(round(d["price"] * scale_factor)) for d in dostepne_listwy], dtype=np.int64)
+
+    n = -(-dlugosci_scian // board_lengths)
+    r = dlugosci_scian - (n - 1) * board_lengths
+    brak = np.iinfo(np.int64).max
+    koszty = np.where(r >= minimalny_kawalek, n * scaled_prices[None, :], brak)
+    najlepszy_typ = koszty.argmin(axis=1)
+    wiersze = np.arange(len(typy_scian))
+    if (koszty[wiersze, najlepszy_typ] == brak).any():
+        return None
+
+    pokrycia = [None] * len(sciany)
+    for k, typ in enumerate(typy_scian):
+        t = int(najlepszy_typ[k])
+        n_val = int(n[k, t])
+        pokrycie = [(t, dostepne_listwy[t]["length"])] * (n_val - 1) + [(t, int(r[k, t]))]
+        for j in typ["indeksy"]:
+            pokrycia[j] = pokrycie
+    return pokrycia
+
+
+def rozwiaz_cp_sat(sciany, dostepne_listwy, minimalny_kawalek):
+    """
+    Rozwiązuje wszystkie ściany w jednym modelu CP-SAT.
 
     Dla każdej ściany model decyduje:
       - t_j: typ listwy (indeks z dostepne_listwy)
@@ -27,12 +61,25 @@ def main(sciany, dostepne_listwy, minimalny_kawalek):
     Ograniczenie: (n_j - 1) * L[t_j] + r_j = długość ściany_j.
     Koszt ściany: n_j * cena[t_j].
     Celem jest minimalizacja łącznego kosztu.
+
+    Ściany o tej samej długości mają identyczne optymalne pokrycie, dlatego
+    zmienne tworzone są raz dla każdej różnej długości, a koszt mnożony przez liczbę ścian.
+    Model przydaje się, gdy ściany zostaną ze sobą powiązane (np. wspólny magazyn listew).
+
+    Zwraca listę pokryć w formacie pokrycie_sciany albo None.
     """
     model = cp_model.CpModel()
 
     num_scian = len(sciany)
     num_typow = len(dostepne_listwy)
 
+    # Agregacja: różne długości ścian i indeks typu dla każdej ściany
+    typy_scian = agreguj_elementy(sciany)
+    typ_sciany = [0] * num_scian
+    for k, typ in enumerate(typy_scian):
+        for j in typ["indeksy"]:
+            typ_sciany[j] = k
+
     # Tablice długości i cen dostępnych listew
     board_lengths = [d["length"] for d in dostepne_listwy]
     board_prices = [d["price"] for d in dostepne_listwy]
@@ -50,12 +97,13 @@ def main(sciany, dostepne_listwy, minimalny_kawalek):
     z_vars = []     # pomocnicza: z = delta * L[t]
     cost_vars = []  # koszt dla ściany
 
-    for j in range(num_scian):
+    for j, typ in enumerate(typy_scian):
+        sciana = typ["rozmiar"]
         # Wybór typu listwy: wartość od 0 do num_typow-1
         t = model.NewIntVar(0, num_typow - 1, f'type_{j}')
         type_vars.append(t)
         # Maksymalna liczba listew użytych do ściany j:
-        max_n = sciany[j] // minimalny_kawalek + 1
+        max_n = sciana // minimalny_kawalek + 1
         n = model.NewIntVar(1, max_n, f'n_{j}')
         n_vars.append(n)
         # Delta: n = delta + 1
@@ -84,7 +132,7 @@ def main(sciany, dostepne_listwy, minimalny_kawalek):
         model.AddMultiplicationEquality(z, [delta, board_length])
 
         # Równanie: z + r = długość ściany
-        model.Add(z + r == sciany[j])
+        model.Add(z + r == sciana)
 
         # Koszt ściany: n * board_price
         cost_j = model.NewIntVar(0, max_n * max(scaled_prices), f'cost_{j}')
@@ -95,7 +143,7 @@ def main(sciany, dostepne_listwy, minimalny_kawalek):
     upper_bound_total = sum((sciany[j] // minimalny_kawalek + 1) * max(scaled_prices) for j in range(num_scian))
 
     total_cost = model.NewIntVar(0, upper_bound_total, 'total_cost')
-    model.Add(total_cost == sum(cost_vars))
+    model.Add(total_cost == sum(typ["ilosc"] * cost_vars[k] for k, typ in enumerate(typy_scian)))
     model.Minimize(total_cost)
 
     # Rozwiązywanie modelu
@@ -103,69 +151,201 @@ def main(sciany, dostepne_listwy, minimalny_kawalek):
     status = solver.Solve(model)
 
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        print("Znaleziono rozwiązanie!")
-        total = solver.Value(total_cost) / scale_factor
-        print("Łączny koszt:", total)
-        print("-" * 40)
-        # Dla każdej ściany wypisujemy szczegółowy wynik
+        pokrycia = []
         for j in range(num_scian):
-            t_val = solver.Value(type_vars[j])
-            n_val = solver.Value(n_vars[j])
-            r_val = solver.Value(r_vars[j])
-            wall = sciany[j]
-            board_len = board_lengths[t_val]
+            t_val = solver.Value(type_vars[typ_sciany[j]])
+            n_val = solver.Value(n_vars[typ_sciany[j]])
+            r_val = solver.Value(r_vars[typ_sciany[j]])
+            pokrycia.append([(t_val, board_lengths[t_val])] * (n_val - 1) + [(t_val, r_val)])
+        return pokrycia
+    return None
+
+
+def dodaj_sciane_liniowo(model, sciana, dostepne_listwy, minimalny_kawalek, wiele_typow=False, prefiks='sciana'):
+    """
+    Dodaje do modelu liniowe pokrycie jednej ściany (bez AddElement i mnożeń).
+
+    Dla każdego typu listwy t tworzone są:
+      - wybor_t: BoolVar – czy typ t jest użyty na ścianie,
+      - pelne_t: IntVar – liczba pełnych listew typu t,
+      - ostatnia_t: BoolVar – czy ostatni (docinany) kawałek pochodzi z listwy typu t.
+
+    Ograniczenia (wszystkie liniowe):
+      - dokładnie jedna ostatnia listwa: sum_t ostatnia_t = 1,
+      - sum_t L[t] * pelne_t + r = długość ściany,
+      - minimalny_kawalek <= r <= sum_t L[t] * ostatnia_t,
+      - pelne_t <= maks_t * wybor_t oraz ostatnia_t => wybor_t.
+
+    Przy wiele_typow=False dokładnie jeden selektor wybor_t jest prawdziwy (jak w rozwiaz_cp_sat).
+    Zwraca krotkę (pelne, ostatnia, koszt), gdzie koszt to wyrażenie liniowe w groszach.
+    """
+    scale_factor = 100
+    typy = range(len(dostepne_listwy))
+    board_lengths = [d["length"] for d in dostepne_listwy]
+    scaled_prices = [int(round(d["price"] * scale_factor)) for d in dostepne_listwy]
+
+    wybor = [model.NewBoolVar(f'{prefiks}_wybor_{t}') for t in typy]
+    pelne = [model.NewIntVar(0, sciana // board_lengths[t], f'{prefiks}_pelne_{t}') for t in typy]
+    ostatnia = [model.NewBoolVar(f'{prefiks}_ostatnia_{t}') for t in typy]
+    for t in typy:
+        model.Add(pelne[t] <= (sciana // board_lengths[t]) * wybor[t])
+        model.AddImplication(ostatnia[t], wybor[t])
+
+    model.AddExactlyOne(ostatnia)
+    if not wiele_typow:
+        model.AddExactlyOne(wybor)
+
+    r = model.NewIntVar(minimalny_kawalek, max(board_lengths), f'{prefiks}_r')
+    model.Add(r <= sum(board_lengths[t] * ostatnia[t] for t in typy))
+    model.Add(sum(board_lengths[t] * pelne[t] for t in typy) + r == sciana)
+    koszt = sum(scaled_prices[t] * (pelne[t] + ostatnia[t]) for t in typy)
+    return pelne, ostatnia, koszt
+
+
+def rozwiaz_liniowo(sciany, dostepne_listwy, minimalny_kawalek, wiele_typow=False):
+    """
+    Rozwiązuje ściany liniowym modelem CP-SAT (dodaj_sciane_liniowo).
+
+    Ściany nie są ze sobą powiązane, więc dla każdej różnej długości ściany
+    budowany jest osobny, mały model – każdy rozwiązuje się w milisekundach,
+    a relaksacja LP jest dużo mocniejsza niż w modelu z mnożeniami.
+    Przy wiele_typow=False wynik jest taki sam jak w rozwiaz_cp_sat; przy
+    wiele_typow=True na jednej ścianie można łączyć różne typy listew.
+
+    Zwraca listę pokryć w formacie rozwiaz_dekompozycja albo None.
+    """
+    board_lengths = [d["length"] for d in dostepne_listwy]
+    pokrycia = [None] * len(sciany)
+    for typ in agreguj_elementy(sciany):
+        model = cp_model.CpModel()
+        pelne, ostatnia, koszt = dodaj_sciane_liniowo(model, typ["rozmiar"], dostepne_listwy,
+                                                       minimalny_kawalek, wiele_typow)
+        model.Minimize(koszt)
+
+        solver = cp_model.CpSolver()
+        status = solver.Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None
+
+        pokrycie = []
+        for t, dlugosc in enumerate(board_lengths):
+            pokrycie.extend([(t, dlugosc)] * solver.Value(pelne[t]))
+        t_ostatniej = next(t for t in range(len(board_lengths)) if solver.Value(ostatnia[t]))
+        pokrycie.append((t_ostatniej, typ["rozmiar"] - sum(dl for _, dl in pokrycie)))
+        for indeks in typ["indeksy"]:
+            pokrycia[indeks] = pokrycie
+    return pokrycia
+
+
+def wypisz_wynik(sciany, dostepne_listwy, pokrycia):
+    """
+    Wypisuje łączny koszt i szczegółowy podział każdej ściany na listwy.
+    """
+    scale_factor = 100
+    scaled_prices = [int(round(d["price"] * scale_factor)) for d in dostepne_listwy]
+    print("Znaleziono rozwiązanie!")
+    total = sum(scaled_prices[t] for pokrycie in pokrycia for t, _ in pokrycie) / scale_factor
+    print("Łączny koszt:", total)
+    print("-" * 40)
+    # Dla każdej ściany wypisujemy szczegółowy wynik
+    for wall, pokrycie in zip(sciany, pokrycia):
+        n_val = len(pokrycie)
+        t_last, r_val = pokrycie[-1]
+        typy = list(dict.fromkeys(t for t, _ in pokrycie))
+        print(f"Ściana o długości {wall} mm:")
+        if len(typy) == 1:
+            t_val = typy[0]
+            board_len = dostepne_listwy[t_val]["length"]
             board_prc = scaled_prices[t_val] / scale_factor
-            print(f"Ściana o długości {wall} mm:")
             print(f"  Wybrany typ listwy: {dostepne_listwy[t_val]['id']} (długość: {board_len} mm, cena: {board_prc} jednostek)")
-            print(f"  Liczba użytych listew: {n_val}")
-            print(f"  Wykorzystana długość z ostatniej listwy: {r_val} mm")
-            pelna = (n_val - 1) * board_len
-            print(f"  Długość z pełnych listew: {pelna} mm")
-            print("  Szczegółowy podział na instancje:")
-            # Dla k = 1 do n-1 – pełne listwy
-            for k in range(1, n_val):
-                print(f"    Listwa {dostepne_listwy[t_val]['id']}_nr_{k}: użyj całości (0-{board_len} mm)")
-            # Ostatnia instancja – użyty fragment
-            print(f"    Listwa {dostepne_listwy[t_val]['id']}_nr_{n_val}: użyj fragmentu (0-{r_val} mm)")
-            print("-" * 40)
-
-        # Wizualizacja – dla każdej ściany tworzymy osobny wykres 1D
-        katalog_wykresow = "wykresy_scian"
-        os.makedirs(katalog_wykresow, exist_ok=True)
-        for j in range(num_scian):
-            wall = sciany[j]
-            fig, ax = plt.subplots(figsize=(10, 2))
-            ax.hlines(0, 0, wall, colors='black', linewidth=4)
-            ax.set_xlim(0, wall + 100)
-            ax.set_ylim(-0.5, 0.5)
-            ax.set_xlabel("Długość ściany (mm)")
-            ax.set_yticks([])
-            ax.grid(True, axis='x')
-            ax.text(10, 0.3, f"Ściana: {wall} mm", fontsize=12,
-                    color='red', backgroundcolor='white', va='center', ha='left')
-
-            n_val = solver.Value(n_vars[j])
-            pos = 0
-            # Rysujemy pełne listwy
-            for k in range(n_val - 1):
-                rect = plt.Rectangle((pos, -0.3), board_len, 0.6, edgecolor='blue',
-                                     facecolor='cyan', alpha=0.5)
-                ax.add_patch(rect)
-                ax.text(pos + board_len/2, 0, f"Listwa {k+1}", color="black",
-                        fontsize=10, ha='center', va='center', rotation=90)
-                pos += board_len
-            # Rysujemy ostatni fragment
-            r_val = solver.Value(r_vars[j])
-            if n_val >= 1:
-                rect = plt.Rectangle((pos, -0.3), r_val, 0.6, edgecolor='blue',
-                                     facecolor='cyan', alpha=0.5)
-                ax.add_patch(rect)
-                ax.text(pos + r_val/2, 0, f"Listwa {n_val}\n(użyto {r_val} mm)", color="black",
-                        fontsize=10, ha='center', va='center', rotation=90)
-            sciezka = os.path.join(katalog_wykresow, f"sciana_{j+1}.png")
-            fig.savefig(sciezka, dpi=300, bbox_inches='tight')
-            print(f'Wykres ściany {j+1} zapisany jako: {sciezka}')
-            plt.show()
+        else:
+            print(f"  Wybrane typy listew: {', '.join(dostepne_listwy[t]['id'] for t in typy)}")
+        print(f"  Liczba użytych listew: {n_val}")
+        print(f"  Wykorzystana długość z ostatniej listwy: {r_val} mm")
+        pelna = sum(dl for _, dl in pokrycie[:-1])
+        print(f"  Długość z pełnych listew: {pelna} mm")
+        print("  Szczegółowy podział na instancje:")
+        numery = {}
+        for k, (t, dl) in enumerate(pokrycie, start=1):
+            numery[t] = numery.get(t, 0) + 1
+            nazwa = f"{dostepne_listwy[t]['id']}_nr_{numery[t]}"
+            if k < n_val:
+                # Pełne listwy
+                print(f"    Listwa {nazwa}: użyj całości (0-{dl} mm)")
+            else:
+                # Ostatnia instancja – użyty fragment
+                print(f"    Listwa {nazwa}: użyj fragmentu (0-{dl} mm)")
+        print("-" * 40)
+
+
+def rysuj_sciany(sciany, pokrycia, katalog_wykresow="wykresy_scian"):
+    """
+    Wizualizacja – dla każdej ściany tworzy osobny wykres 1D i zapisuje go do pliku.
+    """
+    os.makedirs(katalog_wykresow, exist_ok=True)
+    for j, (wall, pokrycie) in enumerate(zip(sciany, pokrycia)):
+        fig, ax = plt.subplots(figsize=(10, 2))
+        ax.hlines(0, 0, wall, colors='black', linewidth=4)
+        ax.set_xlim(0, wall + 100)
+        ax.set_ylim(-0.5, 0.5)
+        ax.set_xlabel("Długość ściany (mm)")
+        ax.set_yticks([])
+        ax.grid(True, axis='x')
+        ax.text(10, 0.3, f"Ściana: {wall} mm", fontsize=12,
+                color='red', backgroundcolor='white', va='center', ha='left')
+
+        n_val = len(pokrycie)
+        pos = 0
+        # Rysujemy pełne listwy
+        for k, (_, board_len) in enumerate(pokrycie[:-1]):
+            rect = plt.Rectangle((pos, -0.3), board_len, 0.6, edgecolor='blue',
+                                 facecolor='cyan', alpha=0.5)
+            ax.add_patch(rect)
+            ax.text(pos + board_len/2, 0, f"Listwa {k+1}", color="black",
+                    fontsize=10, ha='center', va='center', rotation=90)
+            pos += board_len
+        # Rysujemy ostatni fragment
+        _, r_val = pokrycie[-1]
+        rect = plt.Rectangle((pos, -0.3), r_val, 0.6, edgecolor='blue',
+                             facecolor='cyan', alpha=0.5)
+        ax.add_patch(rect)
+        ax.text(pos + r_val/2, 0, f"Listwa {n_val}\n(użyto {r_val} mm)", color="black",
+                fontsize=10, ha='center', va='center', rotation=90)
+        sciezka = os.path.join(katalog_wykresow, f"sciana_{j+1}.png")
+        fig.savefig(sciezka, dpi=300, bbox_inches='tight')
+        print(f'Wykres ściany {j+1} zapisany jako: {sciezka}')
+        plt.show()
+
+
+def main(sciany, dostepne_listwy, minimalny_kawalek, silnik="dekompozycja", wiele_typow=False):
+    """
+    Rozwiązuje problem cięcia ścian przy użyciu dostępnych listew.
+
+    Parametry:
+      - sciany: lista długości ścian do pokrycia (w mm)
+      - dostepne_listwy: lista słowników opisujących dostępne listwy.
+            Każdy słownik musi zawierać:
+                "length" – długość listwy (mm)
+                "price"  – cena listwy
+                "id"     – unikalny identyfikator typu listwy
+      - minimalny_kawalek: najkrótszy kawałek, który można użyć (w mm)
+      - silnik: "dekompozycja" (każda ściana osobno, w postaci zamkniętej – domyślnie),
+                "liniowy" (model liniowy z selektorami typów) lub
+                "cp_sat" (model z AddElement i AddMultiplicationEquality)
+      - wiele_typow: bool, czy w silniku "liniowy" dopuścić różne typy listew na jednej ścianie
+    """
+    if silnik == "dekompozycja":
+        pokrycia = rozwiaz_dekompozycja(sciany, dostepne_listwy, minimalny_kawalek)
+    elif silnik == "liniowy":
+        pokrycia = rozwiaz_liniowo(sciany, dostepne_listwy, minimalny_kawalek, wiele_typow)
+    elif silnik == "cp_sat":
+        pokrycia = rozwiaz_cp_sat(sciany, dostepne_listwy, minimalny_kawalek)
+    else:
+        raise ValueError(f"Nieznany silnik: {silnik}")
+
+    if pokrycia is not None:
+        wypisz_wynik(sciany, dostepne_listwy, pokrycia)
+        rysuj_sciany(sciany, pokrycia)
     else:
         print("Nie znaleziono rozwiązania.")
 
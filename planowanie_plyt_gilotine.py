@@ -1,129 +1,249 @@
-import matplotlib
-# Ustawienie backendu na TkAgg – pozwala uniknąć problemów z wyświetlaniem wykresów
-matplotlib.use('TkAgg')
-
-import matplotlib.pyplot as plt
 from ortools.sat.python import cp_model
 import os
-
-def generuj_opcje_arkuszy(oryginalne_arkusze, dopuszczalny_podzial=True):
+import time
+
+from agregacja_popytu import agreguj_elementy, dodaj_liczniki_typow, dodaj_porzadek_kopii
+from dopasowanie import arkusz_miesci, dodaj_wymuszone_obroty, macierz_dopasowania
+from gilotyna import lista_ciec, rozwiaz_gilotynowo
+from heurystyki_plyt import polozenia_elementow, przypisz_do_instancji, rozwiaz_heurystycznie
+from lns_plyt import przelicz_po_zmianie, rozwiaz_lns
+from magazyn import limity_instancji, usun_zdominowane
+from nakladanie_2d import FORMULACJE_NAKLADANIA, dodaj_no_overlap_2d
+from ograniczenia_plyt import dolne_ograniczenia
+from pamiec_wynikow import rozwiaz_z_pamiecia
+from przypisanie import dodaj_przypisanie, dodaj_wspolna_opcje, indeksy_opcji, opcja_elementu
+from renderowanie import renderuj_arkusze
+from rozwiazywanie import PostepRozwiazywania
+from siatka import dziedziny_polozen, nwd_wymiarow
+from symetria import dodaj_lamanie_symetrii
+from wyniki import Wynik
+
+def generuj_typy_arkuszy(oryginalne_arkusze, dopuszczalny_podzial=True):
     """
-    Generuje dostępne opcje arkuszy:
-      - Dla każdego arkusza oryginalnego (z kluczem "number_of_items")
-        tworzy tyle instancji, ile wynosi "number_of_items".
-      - Jeśli dopuszczalny_podzial=True, dla każdej instancji tworzone są dodatkowe
-        warianty: arkusz podzielony na pół (po szerokości lub wysokości) oraz wersja ćwiartkowa.
+    Generuje typy arkuszy z dostępną liczbą sztuk ("number_of_items"):
+      - Każdy arkusz oryginalny jest typem.
+      - Jeśli dopuszczalny_podzial=True, dla każdego arkusza dochodzą typy wariantów:
+        arkusz podzielony na pół (po szerokości lub wysokości) oraz wersja ćwiartkowa,
+        z tą samą liczbą sztuk co arkusz oryginalny.
       - Ceny wariantów są obliczane jako:
             - 1/2 ceny oryginalnej dla wariantów "half_width" i "half_height"
             - 1/4 ceny oryginalnej dla wariantu "quarter"
+      - Resztki z magazynu resztek (arkusze z kluczem "resztka") nie są dzielone.
     """
-    opcje_arkuszy = []
+    typy_arkuszy = []
     for arkusz in oryginalne_arkusze:
         liczba_instancji = arkusz.get("number_of_items", 1)
-        for idx in range(liczba_instancji):
-            # Oryginalny arkusz – tworzymy instancję
-            instancja = arkusz.copy()
-            instancja["id"] = f'{arkusz["id"]}_{idx+1}'
-            opcje_arkuszy.append(instancja)
+        typy_arkuszy.append(dict(arkusz, number_of_items=liczba_instancji))
+
+        if dopuszczalny_podzial and "resztka" not in arkusz:
+            # Arkusz podzielony na pół (po szerokości)
+            polowa_szerokosci = {
+                "width": arkusz["width"] // 2,
+                "height": arkusz["height"],
+                "price": arkusz["price"] / 2,  # 1/2 ceny oryginalnej
+                "id": f'{arkusz["id"]}_half_width',
+                "number_of_items": liczba_instancji
+            }
+            # Arkusz podzielony na pół (po wysokości)
+            polowa_wysokosci = {
+                "width": arkusz["width"],
+                "height": arkusz["height"] // 2,
+                "price": arkusz["price"] / 2,  # 1/2 ceny oryginalnej
+                "id": f'{arkusz["id"]}_half_height',
+                "number_of_items": liczba_instancji
+            }
+            # Arkusz w ćwiartce (podział obu wymiarów)
+            cwiartka = {
+                "width": arkusz["width"] // 2,
+                "height": arkusz["height"] // 2,
+                "price": arkusz["price"] / 4,  # 1/4 ceny oryginalnej
+                "id": f'{arkusz["id"]}_quarter',
+                "number_of_items": liczba_instancji
+            }
+            typy_arkuszy.extend([polowa_szerokosci, polowa_wysokosci, cwiartka])
+
+    return typy_arkuszy
+
+
+def generuj_opcje_arkuszy(oryginalne_arkusze, dopuszczalny_podzial=True,
+                          elementy=None, grubosc_krawedzi=0, gorny_koszt=None):
+    """
+    Generuje dostępne opcje arkuszy (instancje typów z generuj_typy_arkuszy).
+
+    Bez elementów każdy typ daje tyle instancji, ile wynosi "number_of_items".
+    Jeśli podano elementy, liczba instancji typu jest ograniczona przez
+    magazyn.limity_instancji – model nie rośnie z liczbą sztuk na magazynie,
+    a tylko z liczbą arkuszy, które mogą zostać użyte. Typy, które nigdy nie
+    wystąpią w planie optymalnym (magazyn.usun_zdominowane), są pomijane.
+    gorny_koszt to koszt znanego rozwiązania (np. z heurystyki), który zaostrza limity.
+    """
+    typy_arkuszy = generuj_typy_arkuszy(oryginalne_arkusze, dopuszczalny_podzial)
+    if elementy is None:
+        limity = [typ["number_of_items"] for typ in typy_arkuszy]
+    else:
+        # Element mieści się w typie arkusza (z grubością cięcia), bez obrotu albo po obrocie
+        def miesci_sie(element, typ):
+            szer, wys = element
+            return any(
+                a + grubosc_krawedzi <= typ["width"] and b + grubosc_krawedzi <= typ["height"]
+                for a, b in ((szer, wys), (wys, szer))
+            )
+        limity = limity_instancji(typy_arkuszy, elementy, miesci_sie, gorny_koszt)
 
-            if dopuszczalny_podzial:
-                # Arkusz podzielony na pół (po szerokości)
-                polowa_szerokosci = {
-                    "width": arkusz["width"] // 2,
-                    "height": arkusz["height"],
-                    "price": arkusz["price"] / 2,  # 1/2 ceny oryginalnej
-                    "id": f'{arkusz["id"]}_half_width_{idx+1}'
-                }
-                # Arkusz podzielony na pół (po wysokości)
-                polowa_wysokosci = {
-                    "width": arkusz["width"],
-                    "height": arkusz["height"] // 2,
-                    "price": arkusz["price"] / 2,  # 1/2 ceny oryginalnej
-                    "id": f'{arkusz["id"]}_half_height_{idx+1}'
-                }
-                # Arkusz w ćwiartce (podział obu wymiarów)
-                cwiartka = {
-                    "width": arkusz["width"] // 2,
-                    "height": arkusz["height"] // 2,
-                    "price": arkusz["price"] / 4,  # 1/4 ceny oryginalnej
-                    "id": f'{arkusz["id"]}_quarter_{idx+1}'
-                }
-                opcje_arkuszy.extend([polowa_szerokosci, polowa_wysokosci, cwiartka])
+        # Typy zdominowane (nie większe i nie tańsze od typu z wolnymi sztukami) odpadają
+        limity = usun_zdominowane(typy_arkuszy, limity, arkusz_miesci)
+
+    opcje_arkuszy = []
+    for typ, limit in zip(typy_arkuszy, limity):
+        for idx in range(limit):
+            instancja = typ.copy()
+            instancja["id"] = f'{typ["id"]}_{idx+1}'
+            opcje_arkuszy.append(instancja)
 
     return opcje_arkuszy
 
 
-def rysuj_wykres(arkusz, elementy, przypisanie_elementu,
-                 polozenie_x, polozenie_y,
-                 szerokosci_elementow, wysokosci_elementow,
-                 solver):
+def rozwiaz(oryginalne_arkusze,
+            dopuszczalny_podzial,
+            grubosc_krawedzi,
+            elementy,
+            lamanie_symetrii=True,
+            limit_czasu=None,
+            wzgledna_luka=None,
+            postep=None,
+            formulacja="pary",
+            silnik="cp_sat",
+            heurystyka="najlepsza",
+            rozgrzewka=True,
+            etapy=3,
+            rozwiazanie_startowe=None):
     """
-    Funkcja pomocnicza do wizualizacji rozmieszczenia elementów
-    na jednym, konkretnym arkuszu.
+    Buduje i rozwiązuje model cięcia arkuszy bez wypisywania i rysowania.
+
+    Parametry jak w main, a ponadto:
+      - postep: opcjonalny PostepRozwiazywania, który otrzymuje kolejne rozwiązania
+                (np. ze strumien_rozwiazan)
+      - rozwiazanie_startowe: opcjonalna krotka (uklad, koszt) używana zamiast heurystyki
+                              jako rozgrzewka i górne ograniczenie (np. przez LNS)
+
+    Zwraca obiekt Wynik, w którego układzie każdy użyty arkusz ma listę krotek
+    (indeks_elementu, x, y, obrot), oraz czasy "rozgrzewka", "budowa" i "rozwiazanie".
+    Po upływie limitu czasu wynik zawiera najlepsze dotąd znalezione rozwiązanie
+    (status FEASIBLE) – co najmniej tak dobre jak rozwiązanie heurystyczne z rozgrzewki.
+    W silniku "gilotyna" status OPTIMAL oznacza optimum wśród układów etapowych, a każdy
+    wpis układu ma dodatkowo "drzewo_ciec"; INFEASIBLE jest tam zwracane tylko z dowodem,
+    a plan nieznaleziony w limicie czasu ma status UNKNOWN.
+    Dolne ograniczenia 2D (ograniczenia_plyt) zawężają dziedzinę kosztu i kończą wyszukiwanie,
+    gdy tylko rozwiązanie je osiągnie; rozwiązanie heurystyczne, które je osiąga, jest
+    zwracane jako optymalne bez budowy modelu.
     """
-    fig, ax = plt.subplots()
-    ax.set_title(f"Arkusz {arkusz['id']} ({arkusz['width']}x{arkusz['height']} mm)")
-    ax.set_xlim(0, arkusz["width"])
-    ax.set_ylim(0, arkusz["height"])
-    ax.set_xticks(range(0, arkusz["width"] + 1, 500))
-    ax.set_yticks(range(0, arkusz["height"] + 1, 500))
-    ax.set_aspect('equal')  # Ustawienie identycznej skali dla obu osi
-    ax.grid(True)
-
-    # Rysujemy obrys arkusza
-    ax.add_patch(plt.Rectangle((0, 0), arkusz["width"], arkusz["height"],
-                               edgecolor='black', facecolor='none', lw=2))
-
-    # Rysujemy elementy przypisane do danego arkusza
-    for i in range(len(elementy)):
-        # Jeżeli przypisanie_elementu[i] == identyfikator arkusza, to rysujemy:
-        # Uwaga: W modelu przypisanie_elementu to indeks arkusza w tablicy opcje_arkuszy,
-        # a tutaj sprawdzamy solver.Value(...) i porównujemy z arkuszem['id'].
-        #
-        # Jednak w Twoim kodzie 'przypisanie_elementu' to int (index w liście),
-        # a 'arkusz["id"]' to string. Aby sprawdzić, czy to ten sam arkusz,
-        # musielibyśmy mieć jakieś odwzorowanie index -> arkusz["id"].
-        #
-        # Jeżeli chcesz użyć porównania:
-        #   if solver.Value(przypisanie_elementu[i]) == arkusz["id"]:
-        # to przypisanie_elementu[i] musiałoby przechowywać ID (string) zamiast int.
-        #
-        # Najczęściej w modelu: solver.Value(przypisanie_elementu[i]) daje s_idx,
-        # a s_idx to index w liście opcje_arkuszy. Dlatego zazwyczaj
-        # porównujemy z indexem, np. if solver.Value(przypisanie_elementu[i]) == s_idx.
-        pass
-
-    plt.show()
-
-
-def main(oryginalne_arkusze,
-         dopuszczalny_podzial,
-         grubosc_krawedzi,
-         elementy,
-         guillotine_cutting=False):
-    """
-    Główna funkcja budująca i rozwiązująca model cięcia arkuszy.
-
-    Parametry:
-      - oryginalne_arkusze: lista słowników z danymi arkuszy (wymiary, cena, id, number_of_items)
-      - dopuszczalny_podzial: bool, czy generować dodatkowe opcje arkuszy (1/2 i 1/4)
-      - grubosc_krawedzi: grubość krawędzi cięcia (mm)
-      - elementy: lista krotek (szerokość, wysokość) elementów do wycięcia
-      - guillotine_cutting: bool, czy wymuszać „gilotynowe” cięcia (True/False)
-    """
-
-    # --- Opcjonalnie: w tym miejscu można wprowadzić dodatkowe ograniczenia
-    # wymuszające "gilotynowy" sposób cięcia, zależnie od guillotine_cutting. ---
-    if guillotine_cutting:
-        print("[INFO] Guillotine cutting (gilotynowe cięcie) jest WŁĄCZONE.")
-    else:
-        print("[INFO] Guillotine cutting (gilotynowe cięcie) jest WYŁĄCZONE.")
+    if formulacja not in FORMULACJE_NAKLADANIA:
+        raise ValueError(f"Nieznana formulacja: {formulacja}")
+    if silnik not in ("cp_sat", "szybki", "gilotyna", "lns"):
+        raise ValueError(f"Nieznany silnik: {silnik}")
+    if silnik == "lns":
+        # Przeszukiwanie dużego sąsiedztwa: podproblemy rozwiązuje ta sama funkcja (silnik "cp_sat")
+        return rozwiaz_lns(rozwiaz,
+                           generuj_typy_arkuszy(oryginalne_arkusze, dopuszczalny_podzial),
+                           grubosc_krawedzi,
+                           elementy,
+                           60.0 if limit_czasu is None else limit_czasu,
+                           wzgledna_luka=wzgledna_luka,
+                           postep=postep,
+                           heurystyka=heurystyka,
+                           lamanie_symetrii=lamanie_symetrii,
+                           formulacja=formulacja)
+    start = time.perf_counter()
 
     # Współczynnik skalujący ceny (aby traktować je jako liczby całkowite)
     wspolczynnik_skalujacy = 100
 
-    # Generowanie wszystkich opcji arkuszy
-    opcje_arkuszy = generuj_opcje_arkuszy(oryginalne_arkusze, dopuszczalny_podzial)
+    czasy = {}
+    if silnik == "gilotyna":
+        # Cięcie gilotynowe: generowanie kolumn na wzorcach etapowych zamiast modelu położeń
+        parametry = {} if limit_czasu is None else {"limit_czasu": limit_czasu}
+        rozwiazanie = rozwiaz_gilotynowo(generuj_typy_arkuszy(oryginalne_arkusze, dopuszczalny_podzial),
+                                         elementy, grubosc_krawedzi, etapy, **parametry)
+        czasy["rozwiazanie"] = time.perf_counter() - start
+        if rozwiazanie is None:
+            return Wynik(status="INFEASIBLE", elementy=list(elementy), czasy=czasy)
+        uklad, koszt, ograniczenie = rozwiazanie
+        if uklad is None:
+            # Nie znaleziono planu w limicie czasu, ale nie udowodniono, że go nie ma
+            return Wynik(status="UNKNOWN", elementy=list(elementy), czasy=czasy, ograniczenie=ograniczenie)
+        return Wynik(status="OPTIMAL" if koszt <= ograniczenie + 1e-9 else "FEASIBLE",
+                     koszt=koszt,
+                     uklad=uklad,
+                     elementy=list(elementy),
+                     czasy=czasy,
+                     ograniczenie=ograniczenie)
+
+    # Rozwiązanie heurystyczne: wynik trybu "szybki" albo punkt startowy dla CP-SAT
+    podpowiedz = rozwiazanie_startowe
+    if podpowiedz is None and (silnik == "szybki" or rozgrzewka):
+        podpowiedz = rozwiaz_heurystycznie(
+            generuj_typy_arkuszy(oryginalne_arkusze, dopuszczalny_podzial),
+            elementy,
+            grubosc_krawedzi,
+            heurystyka
+        )
+        czasy["rozgrzewka"] = time.perf_counter() - start
+    if silnik == "szybki":
+        if podpowiedz is None:
+            # Heurystyka nie zmieściła elementów w magazynie – to dowód braku rozwiązania
+            # tylko wtedy, gdy któryś element nie mieści się w żadnym arkuszu
+            niemozliwe = dolne_ograniczenia(
+                generuj_typy_arkuszy(oryginalne_arkusze, dopuszczalny_podzial),
+                elementy,
+                grubosc_krawedzi
+            ) is None
+            return Wynik(status="INFEASIBLE" if niemozliwe else "UNKNOWN",
+                         elementy=list(elementy),
+                         czasy=czasy)
+        return Wynik(status="FEASIBLE" if elementy else "OPTIMAL",
+                     koszt=podpowiedz[1],
+                     uklad=podpowiedz[0],
+                     elementy=list(elementy),
+                     czasy=czasy)
+    start = time.perf_counter()
+
+    # Dolne ograniczenia 2D (powierzchnia z rzazem, DFF, duże elementy):
+    # koszt w groszach i minimalna liczba arkuszy;
+    # None oznacza element większy niż każdy arkusz
+    ograniczenia = dolne_ograniczenia(
+        generuj_typy_arkuszy(oryginalne_arkusze, dopuszczalny_podzial),
+        elementy,
+        grubosc_krawedzi
+    )
+    if ograniczenia is None:
+        czasy.update({"budowa": time.perf_counter() - start, "rozwiazanie": 0.0})
+        return Wynik(status="INFEASIBLE", elementy=list(elementy), czasy=czasy)
+    ograniczenie, minimalna_liczba_arkuszy = ograniczenia
+    if podpowiedz and int(round(podpowiedz[1] * wspolczynnik_skalujacy)) <= ograniczenie:
+        # Rozwiązanie heurystyczne osiąga dolne ograniczenie
+        # – jest optymalne bez budowy modelu
+        czasy.update({"budowa": time.perf_counter() - start, "rozwiazanie": 0.0})
+        return Wynik(status="OPTIMAL",
+                     koszt=podpowiedz[1],
+                     uklad=podpowiedz[0],
+                     elementy=list(elementy),
+                     czasy=czasy,
+                     ograniczenie=podpowiedz[1])
+
+    # Generowanie opcji arkuszy (tylko instancje, które mogą wystąpić
+    # w rozwiązaniu nie droższym niż podpowiedź)
+    opcje_arkuszy = generuj_opcje_arkuszy(oryginalne_arkusze, dopuszczalny_podzial,
+                                          elementy, grubosc_krawedzi,
+                                          podpowiedz[1] if podpowiedz else None)
+    if not opcje_arkuszy and elementy:
+        # Każdy element mieści się w którymś arkuszu (dolne_ograniczenia), więc pusta lista
+        # opcji nie jest dowodem braku rozwiązania – opcje bez limitów z górnego kosztu
+        opcje_arkuszy = generuj_opcje_arkuszy(oryginalne_arkusze, dopuszczalny_podzial,
+                                              elementy, grubosc_krawedzi)
+    if not opcje_arkuszy:
+        # Nie ma czego ciąć
+        czasy.update({"budowa": time.perf_counter() - start, "rozwiazanie": 0.0})
+        return Wynik(status="OPTIMAL", koszt=0.0, elementy=[], czasy=czasy, ograniczenie=0.0)
 
     # Obliczamy "price_int" (koszt całkowity w liczbach całkowitych)
     for arkusz in opcje_arkuszy:
@@ -137,26 +257,64 @@ def main(oryginalne_arkusze,
     # ==========================
     model = cp_model.CpModel()
 
-    # Zmienna (dla każdego elementu): index arkusza, do którego jest przypisany
-    przypisanie_elementu = [
-        model.NewIntVar(0, liczba_opcji - 1, f'przypisanie_{i}')
-        for i in range(liczba_elementow)
-    ]
+    # Wykonalne trójki (element, arkusz, obrót) z uwzględnieniem grubości cięcia
+    dopasowanie = macierz_dopasowania(elementy, opcje_arkuszy, grubosc_krawedzi)
+
+    # Zmienne: przypisanie elementów do arkuszy (dokładnie jeden arkusz na element)
+    # oraz informacja, czy dany arkusz (instancja) został w ogóle użyty;
+    # wskaźniki powstają tylko tam, gdzie element mieści się w którejś orientacji
+    wskazniki_przypisania, arkusz_uzyty = dodaj_przypisanie(
+        model,
+        liczba_elementow,
+        liczba_opcji,
+        'przypisany',
+        'arkusz_uzyty',
+        dopasowanie.any(axis=2)
+    )
 
     # Zmienna (dla każdego elementu): czy element zostanie obrócony
     obrocony = [model.NewBoolVar(f'obrocony_{i}') for i in range(liczba_elementow)]
+    # Obroty wymuszone przez wymiary (element kwadratowy, tylko jedna pasująca orientacja)
+    dodaj_wymuszone_obroty(model, dopasowanie, elementy, wskazniki_przypisania, obrocony)
+
+    # Geometria modelu: wszystkie wymiary podzielone przez ich NWD
+    # (położenia w układzie mnożymy z powrotem przez skalę przy odczycie)
+    skala = nwd_wymiarow(opcje_arkuszy, elementy, grubosc_krawedzi)
+    arkusze_modelu = [
+        dict(arkusz,
+             width=arkusz["width"] // skala,
+             height=arkusz["height"] // skala)
+        for arkusz in opcje_arkuszy
+    ]
+    elementy_modelu = [(szer // skala, wys // skala) for szer, wys in elementy]
+    rzaz = grubosc_krawedzi // skala
 
     # Maksymalne wymiary, potrzebne do ograniczenia położenia elementów
-    max_szerokosc = max(arkusz["width"] for arkusz in opcje_arkuszy)
-    max_wysokosc = max(arkusz["height"] for arkusz in opcje_arkuszy)
-
-    # Zmienne: pozycja (x, y) dla każdego elementu
+    max_szerokosc = max(arkusz["width"] for arkusz in arkusze_modelu)
+    max_wysokosc = max(arkusz["height"] for arkusz in arkusze_modelu)
+
+    # Rozgrzewka: układ heurystyczny przeniesiony na instancje z opcje_arkuszy
+    mapowanie = None
+    if podpowiedz:
+        mapowanie = przypisz_do_instancji(podpowiedz[0], opcje_arkuszy, elementy, grubosc_krawedzi)
+    polozenia_startowe = polozenia_elementow(mapowanie, elementy) if mapowanie is not None else {}
+
+    # Zmienne: pozycja (x, y) dla każdego elementu – tylko w zredukowanych punktach rastra
+    # (sumach wymiarów elementów z rzazem); każdy układ da się do nich dosunąć.
+    # Dochodzą położenia z podpowiedzi, aby była ona dopuszczalna.
+    dziedziny_x, dziedziny_y = dziedziny_polozen(
+        elementy_modelu,
+        [arkusz["width"] for arkusz in arkusze_modelu],
+        [arkusz["height"] for arkusz in arkusze_modelu],
+        rzaz,
+        {i: (x // skala, y // skala) for i, (_, x, y, _) in polozenia_startowe.items()}
+    )
     polozenie_x = [
-        model.NewIntVar(0, max_szerokosc, f'x_{i}')
+        model.NewIntVarFromDomain(dziedziny_x[i], f'x_{i}')
         for i in range(liczba_elementow)
     ]
     polozenie_y = [
-        model.NewIntVar(0, max_wysokosc, f'y_{i}')
+        model.NewIntVarFromDomain(dziedziny_y[i], f'y_{i}')
         for i in range(liczba_elementow)
     ]
 
@@ -164,7 +322,7 @@ def main(oryginalne_arkusze,
     szerokosci_elementow = []
     wysokosci_elementow = []
 
-    for i, (szer, wys) in enumerate(elementy):
+    for i, (szer, wys) in enumerate(elementy_modelu):
         szerokosc_e = model.NewIntVar(0, max_szerokosc, f'szer_{i}')
         wysokosc_e = model.NewIntVar(0, max_wysokosc, f'wys_{i}')
 
@@ -180,177 +338,418 @@ def main(oryginalne_arkusze,
         wysokosci_elementow.append(wysokosc_e)
 
     # --- Ograniczenia: element musi się mieścić w arkuszu, do którego został przypisany ---
-    wskazniki_przypisania = {}
-    for i in range(liczba_elementow):
-        for s in range(liczba_opcji):
-            wskaznik = model.NewBoolVar(f'przypisany_{i}_{s}')
-            wskazniki_przypisania[(i, s)] = wskaznik
-
-            # Jeśli przypisanie_elementu[i] == s, to wskaźnik = True
-            model.Add(przypisanie_elementu[i] == s).OnlyEnforceIf(wskaznik)
-            model.Add(przypisanie_elementu[i] != s).OnlyEnforceIf(wskaznik.Not())
-
-            # Jeżeli dany element przypisujemy do arkusza s, to musi się w nim zmieścić
-            arkusz = opcje_arkuszy[s]
-            model.Add(
-                polozenie_x[i] + szerokosci_elementow[i] + grubosc_krawedzi <= arkusz["width"]
-            ).OnlyEnforceIf(wskaznik)
-            model.Add(
-                polozenie_y[i] + wysokosci_elementow[i] + grubosc_krawedzi <= arkusz["height"]
-            ).OnlyEnforceIf(wskaznik)
+    for (i, s), wskaznik in wskazniki_przypisania.items():
+        # Jeżeli dany element przypisujemy do arkusza s, to musi się w nim zmieścić
+        arkusz = arkusze_modelu[s]
+        model.Add(
+            polozenie_x[i] + szerokosci_elementow[i] + rzaz <= arkusz["width"]
+        ).OnlyEnforceIf(wskaznik)
+        model.Add(
+            polozenie_y[i] + wysokosci_elementow[i] + rzaz <= arkusz["height"]
+        ).OnlyEnforceIf(wskaznik)
+
+    # --- Agregacja popytu: identyczne elementy tworzą jeden typ (rozmiar, ilość) ---
+    typy_elementow = agreguj_elementy(elementy)
+    liczba_na_arkuszu = dodaj_liczniki_typow(model, typy_elementow, wskazniki_przypisania, liczba_opcji)
+    # Kopie tego samego typu są wymienne – porządkujemy je po (arkusz, x)
+    dodaj_porzadek_kopii(model, typy_elementow,
+                         indeksy_opcji(wskazniki_przypisania, liczba_elementow, liczba_opcji),
+                         polozenie_x, max_szerokosc)
 
     # --- Ograniczenie: elementy nie mogą nachodzić na siebie w obrębie tego samego arkusza ---
-    for i in range(liczba_elementow):
-        for j in range(i + 1, liczba_elementow):
-            # Zmienna logiczna: "ten_sam_arkusz" (True, jeśli elementy i, j przypisane do tego samego arkusza)
-            ten_sam_arkusz = model.NewBoolVar(f'ten_sam_arkusz_{i}_{j}')
-
-            model.Add(przypisanie_elementu[i] == przypisanie_elementu[j]).OnlyEnforceIf(ten_sam_arkusz)
-            model.Add(przypisanie_elementu[i] != przypisanie_elementu[j]).OnlyEnforceIf(ten_sam_arkusz.Not())
-
-            # Zmienne logiczne do rozdzielenia elementów w poziomie/pionie:
-            lewo = model.NewBoolVar(f'lewo_{i}_{j}')
-            prawo = model.NewBoolVar(f'prawo_{i}_{j}')
-            gora = model.NewBoolVar(f'gora_{i}_{j}')
-            dol = model.NewBoolVar(f'dol_{i}_{j}')
-
-            # i jest "z lewej strony" j
-            model.Add(
-                polozenie_x[i] + szerokosci_elementow[i] + grubosc_krawedzi <= polozenie_x[j]
-            ).OnlyEnforceIf(lewo)
-
-            # i jest "z prawej strony" j
-            model.Add(
-                polozenie_x[j] + szerokosci_elementow[j] + grubosc_krawedzi <= polozenie_x[i]
-            ).OnlyEnforceIf(prawo)
-
-            # i jest "poniżej" j
-            model.Add(
-                polozenie_y[i] + wysokosci_elementow[i] + grubosc_krawedzi <= polozenie_y[j]
-            ).OnlyEnforceIf(dol)
-
-            # i jest "powyżej" j
-            model.Add(
-                polozenie_y[j] + wysokosci_elementow[j] + grubosc_krawedzi <= polozenie_y[i]
-            ).OnlyEnforceIf(gora)
-
-            # Jeśli elementy w tym samym arkuszu -> muszą być rozdzielone (jedno z powyższych True)
-            model.AddBoolOr([lewo, prawo, gora, dol]).OnlyEnforceIf(ten_sam_arkusz)
-
-    # --- Zmienne: czy dany arkusz (instancja) został w ogóle użyty ---
-    arkusz_uzyty = []
-    for s in range(liczba_opcji):
-        a_used = model.NewBoolVar(f'arkusz_uzyty_{s}')
-        arkusz_uzyty.append(a_used)
-
-    # Powiązanie arkusza_uzyty ze wskaźnikami przypisania elementów
+    if formulacja == "pary":
+        for i in range(liczba_elementow):
+            for j in range(i + 1, liczba_elementow):
+                # Zmienna logiczna: "ten_sam_arkusz" (musi być True, jeśli elementy i, j są na tym samym arkuszu)
+                ten_sam_arkusz = dodaj_wspolna_opcje(
+                    model,
+                    wskazniki_przypisania,
+                    i, j,
+                    liczba_opcji,
+                    f'ten_sam_arkusz_{i}_{j}'
+                )
+                if ten_sam_arkusz is None:
+                    # Elementy nie zmieszczą się na żadnym wspólnym arkuszu
+                    continue
+
+                # Zmienne logiczne do rozdzielenia elementów w poziomie/pionie:
+                lewo = model.NewBoolVar(f'lewo_{i}_{j}')
+                prawo = model.NewBoolVar(f'prawo_{i}_{j}')
+                gora = model.NewBoolVar(f'gora_{i}_{j}')
+                dol = model.NewBoolVar(f'dol_{i}_{j}')
+
+                # i jest "z lewej strony" j
+                model.Add(
+                    polozenie_x[i] + szerokosci_elementow[i] + rzaz <= polozenie_x[j]
+                ).OnlyEnforceIf(lewo)
+
+                # i jest "z prawej strony" j
+                model.Add(
+                    polozenie_x[j] + szerokosci_elementow[j] + rzaz <= polozenie_x[i]
+                ).OnlyEnforceIf(prawo)
+
+                # i jest "poniżej" j
+                model.Add(
+                    polozenie_y[i] + wysokosci_elementow[i] + rzaz <= polozenie_y[j]
+                ).OnlyEnforceIf(dol)
+
+                # i jest "powyżej" j
+                model.Add(
+                    polozenie_y[j] + wysokosci_elementow[j] + rzaz <= polozenie_y[i]
+                ).OnlyEnforceIf(gora)
+
+                # Jeśli elementy w tym samym arkuszu -> muszą być rozdzielone (jedno z powyższych True)
+                model.AddBoolOr([lewo, prawo, gora, dol]).OnlyEnforceIf(ten_sam_arkusz)
+    elif formulacja == "no_overlap_2d":
+        # Opcjonalne prostokąty na każdym arkuszu i jedno ograniczenie AddNoOverlap2D
+        dodaj_no_overlap_2d(model, wskazniki_przypisania, arkusze_modelu,
+                            polozenie_x, polozenie_y,
+                            szerokosci_elementow, wysokosci_elementow,
+                            rzaz,
+                            max_szerokosc, max_wysokosc)
+
+    # Pojemność powierzchniowa: łączne pole elementów na arkuszu nie przekracza pola arkusza
+    pole_na_arkuszu = [
+        sum(typ["rozmiar"][0] * typ["rozmiar"][1] * liczba_na_arkuszu[(k, s)]
+            for k, typ in enumerate(typy_elementow))
+        for s in range(liczba_opcji)
+    ]
     for s in range(liczba_opcji):
-        wskazniki = [wskazniki_przypisania[(i, s)] for i in range(liczba_elementow)]
-        # Jeśli arkusz jest użyty, to ma >= 1 przypisany element
-        model.Add(sum(wskazniki) <= liczba_elementow * arkusz_uzyty[s])
-        model.Add(arkusz_uzyty[s] <= sum(wskazniki))
+        model.Add(pole_na_arkuszu[s] <= opcje_arkuszy[s]["width"] * opcje_arkuszy[s]["height"] * arkusz_uzyty[s])
+
+    # --- Łamanie symetrii: identyczne instancje arkuszy są używane i obciążane po kolei ---
+    if lamanie_symetrii:
+        dodaj_lamanie_symetrii(model, opcje_arkuszy, arkusz_uzyty,
+                               ("width", "height", "price_int"), pole_na_arkuszu)
+
+    # --- Rozgrzewka: rozwiązanie heurystyczne jako podpowiedź dla solvera ---
+    if polozenia_startowe:
+        for i, (s_idx, x, y, obrot) in polozenia_startowe.items():
+            model.AddHint(polozenie_x[i], x // skala)
+            model.AddHint(polozenie_y[i], y // skala)
+            model.AddHint(obrocony[i], obrot)
+        for (i, s), wskaznik in wskazniki_przypisania.items():
+            model.AddHint(wskaznik, polozenia_startowe[i][0] == s)
+        uzyte_startowe = {s_idx for s_idx, _ in mapowanie}
+        for s in range(liczba_opcji):
+            model.AddHint(arkusz_uzyty[s], s in uzyte_startowe)
 
     # --- Cel: minimalizacja łącznego kosztu użytych arkuszy ---
-    koszt_calosciowy = model.NewIntVar(0,
-                                       sum(a["price_int"] for a in opcje_arkuszy),
+    # Dziedzina kosztu zaczyna się od dolnego ograniczenia,
+    # a liczba użytych arkuszy od minimalnej
+    maks_koszt = sum(a["price_int"] for a in opcje_arkuszy)
+    koszt_calosciowy = model.NewIntVar(min(ograniczenie, maks_koszt),
+                                       maks_koszt,
                                        'koszt_calosciowy')
     model.Add(
         koszt_calosciowy == sum(opcje_arkuszy[s]["price_int"] * arkusz_uzyty[s]
                                 for s in range(liczba_opcji))
     )
+    model.Add(sum(arkusz_uzyty) >= minimalna_liczba_arkuszy)
     model.Minimize(koszt_calosciowy)
 
     # ==========================
     # Rozwiązywanie modelu
     # ==========================
-    solver = cp_model.CpSolver()
-    status = solver.Solve(model)
+    # Układ: dla każdego użytego arkusza lista (indeks, x, y, obrót);
+    # wartosci to solver albo callback z bieżącym rozwiązaniem
+    def odczytaj_uklad(wartosci):
+        uklad = []
+        arkusz_elementu = [
+            opcja_elementu(wartosci, wskazniki_przypisania, i, liczba_opcji)
+            for i in range(liczba_elementow)
+        ]
+        for s_idx in sorted(set(arkusz_elementu)):
+            na_arkuszu = [
+                (i,
+                 wartosci.Value(polozenie_x[i]) * skala,
+                 wartosci.Value(polozenie_y[i]) * skala,
+                 bool(wartosci.Value(obrocony[i])))
+                for i in range(liczba_elementow)
+                if arkusz_elementu[i] == s_idx
+            ]
+            uklad.append({"arkusz": opcje_arkuszy[s_idx], "elementy": na_arkuszu})
+        return uklad
+
+    czas_budowy = time.perf_counter() - start
+    if postep is None:
+        postep = PostepRozwiazywania()
+    postep.skala = wspolczynnik_skalujacy
+    postep.odczytaj = odczytaj_uklad
+    # Wyszukiwanie kończy się, gdy tylko koszt rozwiązania osiągnie dolne ograniczenie
+    postep.ograniczenie = ograniczenie
+    solver, status = postep.rozwiaz(model, limit_czasu, wzgledna_luka)
+    czasy.update({"budowa": czas_budowy, "rozwiazanie": solver.WallTime()})
+
+    znaleziono = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    if znaleziono:
+        ograniczenie = max(ograniczenie, solver.BestObjectiveBound())
+    if podpowiedz and (not znaleziono
+                       or solver.Value(koszt_calosciowy) / wspolczynnik_skalujacy > podpowiedz[1]):
+        # Solver nie poprawił rozwiązania heurystycznego przed upływem limitu czasu
+        optymalne = int(round(podpowiedz[1] * wspolczynnik_skalujacy)) <= ograniczenie
+        return Wynik(status="OPTIMAL" if optymalne else "FEASIBLE",
+                     koszt=podpowiedz[1],
+                     uklad=podpowiedz[0],
+                     elementy=list(elementy),
+                     czasy=czasy,
+                     ograniczenie=ograniczenie / wspolczynnik_skalujacy,
+                     historia=postep.historia)
+    if not znaleziono:
+        return Wynik(status=solver.StatusName(status), elementy=list(elementy), czasy=czasy)
+
+    # Koszt równy dolnemu ograniczeniu dowodzi optymalności
+    # także po przerwaniu wyszukiwania
+    koszt = solver.Value(koszt_calosciowy)
+    return Wynik(status="OPTIMAL" if koszt <= ograniczenie else solver.StatusName(status),
+                 koszt=koszt / wspolczynnik_skalujacy,
+                 uklad=odczytaj_uklad(solver),
+                 elementy=list(elementy),
+                 czasy=czasy,
+                 ograniczenie=ograniczenie / wspolczynnik_skalujacy,
+                 historia=postep.historia)
+
+
+def przelicz(oryginalne_arkusze,
+             dopuszczalny_podzial,
+             grubosc_krawedzi,
+             poprzedni,
+             usuniete=(),
+             dodane=(),
+             wyciete=(),
+             limit_czasu=10.0,
+             lamanie_symetrii=True,
+             formulacja="pary"):
+    """
+    Ponowna optymalizacja po zmianie zlecenia (lns_plyt.przelicz_po_zmianie): arkusze pocięte
+    i niedotknięte zmianą zostają w planie bez zmian (także z drzewem cięć), a od nowa
+    układane są tylko elementy z arkuszy, których zmiana dotyczy, razem z dodanymi.
 
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        print("Znaleziono rozwiązanie!\n")
-        # Wyświetlenie przyporządkowań elementów
-        for i in range(liczba_elementow):
-            s_idx = solver.Value(przypisanie_elementu[i])
-            arkusz = opcje_arkuszy[s_idx]
-            obrot = solver.Value(obrocony[i])
+    Parametry:
+      - oryginalne_arkusze, dopuszczalny_podzial, grubosc_krawedzi: jak w main – magazyn
+        po zmianie (np. z mniejszą liczbą sztuk)
+      - poprzedni: Wynik poprzedniego rozwiązania (np. z rozwiaz)
+      - usuniete: indeksy elementów usuniętych z poprzedni.elementy
+      - dodane: lista krotek (szerokość, wysokość) nowych elementów
+      - wyciete: id instancji arkuszy, które zostały już pocięte
+      - limit_czasu: limit czasu solvera dla przeliczanej części (s)
+
+    Zwraca obiekt Wynik dla nowej listy elementów: pozostałe elementy w dotychczasowej
+    kolejności, a po nich dodane. Przeliczone arkusze powstają w modelu CP-SAT,
+    więc nie mają drzewa cięć.
+    """
+    return przelicz_po_zmianie(rozwiaz,
+                               generuj_typy_arkuszy(oryginalne_arkusze, dopuszczalny_podzial),
+                               grubosc_krawedzi,
+                               poprzedni,
+                               usuniete,
+                               dodane,
+                               wyciete,
+                               limit_czasu,
+                               lamanie_symetrii=lamanie_symetrii,
+                               formulacja=formulacja)
+
+
+def wypisz_wynik(wynik):
+    """Wypisuje przyporządkowanie elementów do arkuszy oraz łączny koszt."""
+    print("Znaleziono rozwiązanie!\n")
+    polozenia = {}
+    for wpis in wynik.uklad:
+        for i, x, y, obrot in wpis["elementy"]:
+            polozenia[i] = (wpis["arkusz"], x, y, obrot)
+
+    # Wyświetlenie przyporządkowań elementów
+    for i in sorted(polozenia):
+        arkusz, x, y, obrot = polozenia[i]
+        print(
+            f"Element {i} {wynik.elementy[i]} "
+            f"(obrót: {obrot}) -> Arkusz {arkusz['id']} "
+            f"({arkusz['width']}x{arkusz['height']}), pozycja: "
+            f"({x}, {y})"
+        )
+    # Kolejność cięć gilotynowych (jeśli układ je zawiera)
+    for wpis in wynik.uklad:
+        if "drzewo_ciec" in wpis:
+            print(f"\nCięcia arkusza {wpis['arkusz']['id']}:")
+            for ciecie in lista_ciec(wpis["drzewo_ciec"]):
+                print(f"  etap {ciecie['etap']}, {ciecie['kierunek']}: "
+                      f"({ciecie['x1']}, {ciecie['y1']}) -> ({ciecie['x2']}, {ciecie['y2']})")
+    # Wyświetlenie kosztu w jednostkach pieniężnych
+    print(f"\nŁączny koszt: {wynik.koszt:.2f}")
+
+
+def rysuj_arkusze(uklad, elementy, katalog_wykresow="wykresy", pokaz=True):
+    """
+    Rysuje każdy użyty arkusz na osobnym wykresie i zapisuje go do pliku PNG.
 
-            # Obliczamy wymiary (jeśli obrócony, zamiana szer <-> wys)
+    Parametry:
+      - uklad: lista słowników {"arkusz": instancja arkusza, "elementy": [(indeks, x, y, obrot), ...]}
+      - elementy: lista krotek (szerokość, wysokość) elementów do wycięcia
+      - katalog_wykresow: katalog, w którym zapisywane są wykresy
+      - pokaz: bool, czy wyświetlić każdy wykres w oknie (plt.show)
+    """
+    # matplotlib importowany dopiero tutaj, aby samo rozwiązywanie go nie wymagało
+    import matplotlib.pyplot as plt
+
+    os.makedirs(katalog_wykresow, exist_ok=True)
+
+    # Dla każdego użytego arkusza - rysunek
+    for wpis in uklad:
+        arkusz = wpis["arkusz"]
+        fig, ax = plt.subplots()
+        ax.set_aspect('equal')   # ustawienie równych osi
+        ax.set_title(f"Arkusz {arkusz['id']} "
+                     f"({arkusz['width']}x{arkusz['height']} mm)")
+        ax.set_xlim(0, arkusz["width"])
+        ax.set_ylim(0, arkusz["height"])
+        ax.set_xticks(range(0, arkusz["width"] + 1, 500))
+        ax.set_yticks(range(0, arkusz["height"] + 1, 500))
+        ax.grid(True)
+
+        # Rysowanie granic arkusza
+        ax.add_patch(plt.Rectangle((0, 0),
+                                   arkusz["width"],
+                                   arkusz["height"],
+                                   edgecolor='black',
+                                   facecolor='none',
+                                   lw=2))
+
+        # Informacja o wymiarach arkusza
+        ax.text(10,
+                arkusz["height"] - 30,
+                f"{arkusz['width']}x{arkusz['height']} mm",
+                fontsize=12,
+                color='red',
+                backgroundcolor='white')
+
+        # Rysowanie elementów przypisanych do danego arkusza
+        for i, rx, ry, obrot in wpis["elementy"]:
             wymiary_elem = (elementy[i][1], elementy[i][0]) if obrot else elementy[i]
+            rw, rh = wymiary_elem
+
+            rect = plt.Rectangle((rx, ry), rw, rh,
+                                 edgecolor='blue',
+                                 facecolor='cyan',
+                                 alpha=0.5)
+            ax.add_patch(rect)
+
+            # Tekst / etykieta wewnątrz prostokąta
+            etykieta = f"P{i} {wymiary_elem}"
+            ax.text(rx + 5, ry + 5, etykieta, color="black", fontsize=10)
+
+        # Linie cięć gilotynowych (silnik "gilotyna")
+        if "drzewo_ciec" in wpis:
+            for ciecie in lista_ciec(wpis["drzewo_ciec"]):
+                ax.plot([ciecie["x1"], ciecie["x2"]], [ciecie["y1"], ciecie["y2"]],
+                        color='red', lw=0.8, linestyle='--')
+
+        # Zapis wykresu do pliku
+        sciezka_pliku = os.path.join(katalog_wykresow, f"arkusz_{arkusz['id']}.png")
+        fig.savefig(sciezka_pliku, dpi=300, bbox_inches='tight')
+        print(f'Wykres arkusza {arkusz["id"]} zapisany jako: {sciezka_pliku}')
+        if pokaz:
+            plt.show()
+        plt.close(fig)
 
-            print(
-                f"Element {i} {elementy[i]} "
-                f"(obrót: {bool(obrot)}) -> Arkusz {arkusz['id']} "
-                f"({arkusz['width']}x{arkusz['height']}), pozycja: "
-                f"({solver.Value(polozenie_x[i])}, {solver.Value(polozenie_y[i])})"
-            )
-        # Wyświetlenie kosztu w jednostkach pieniężnych
-        print(f"\nŁączny koszt: {solver.Value(koszt_calosciowy) / wspolczynnik_skalujacy:.2f}")
-
-        # ==========================
-        # Wizualizacja i zapis wykresów
-        # ==========================
-        katalog_wykresow = "wykresy"
-        os.makedirs(katalog_wykresow, exist_ok=True)
-
-        # Indeksy użytych arkuszy (wg solvera)
-        uzyte_arkusze = {solver.Value(przypisanie_elementu[i]) for i in range(liczba_elementow)}
-
-        # Dla każdego użytego arkusza - rysunek
-        for s_idx in uzyte_arkusze:
-            arkusz = opcje_arkuszy[s_idx]
-            fig, ax = plt.subplots()
-            ax.set_aspect('equal')   # ustawienie równych osi
-            # Tytuł wykresu
-            ax.set_title(f"Arkusz {arkusz['id']} "
-                         f"({arkusz['width']}x{arkusz['height']} mm)")
-            ax.set_xlim(0, arkusz["width"])
-            ax.set_ylim(0, arkusz["height"])
-            ax.set_xticks(range(0, arkusz["width"] + 1, 500))
-            ax.set_yticks(range(0, arkusz["height"] + 1, 500))
-            ax.grid(True)
-
-            # Rysowanie granic arkusza
-            ax.add_patch(plt.Rectangle((0, 0),
-                                       arkusz["width"],
-                                       arkusz["height"],
-                                       edgecolor='black',
-                                       facecolor='none',
-                                       lw=2))
-
-            # Informacja o wymiarach arkusza
-            ax.text(10,
-                    arkusz["height"] - 30,
-                    f"{arkusz['width']}x{arkusz['height']} mm",
-                    fontsize=12,
-                    color='red',
-                    backgroundcolor='white')
-
-            # Rysowanie elementów przypisanych do danego arkusza
-            for i in range(liczba_elementow):
-                if solver.Value(przypisanie_elementu[i]) == s_idx:
-                    rx = solver.Value(polozenie_x[i])
-                    ry = solver.Value(polozenie_y[i])
-                    rw = solver.Value(szerokosci_elementow[i])
-                    rh = solver.Value(wysokosci_elementow[i])
-
-                    rect = plt.Rectangle((rx, ry), rw, rh,
-                                         edgecolor='blue',
-                                         facecolor='cyan',
-                                         alpha=0.5)
-                    ax.add_patch(rect)
-
-                    # Tekst / etykieta wewnątrz prostokąta
-                    wymiary_elem = (elementy[i][1], elementy[i][0]) if solver.Value(obrocony[i]) else elementy[i]
-                    etykieta = f"P{i} {wymiary_elem}"
-                    ax.text(rx + 5, ry + 5, etykieta, color="black", fontsize=10)
-
-            # Zapis wykresu do pliku
-            sciezka_pliku = os.path.join(katalog_wykresow, f"arkusz_{arkusz['id']}.png")
-            fig.savefig(sciezka_pliku, dpi=300, bbox_inches='tight')
-            print(f'Wykres arkusza {arkusz["id"]} zapisany jako: {sciezka_pliku}')
 
-            plt.show()
+def main(oryginalne_arkusze,
+         dopuszczalny_podzial,
+         grubosc_krawedzi,
+         elementy,
+         guillotine_cutting=False,
+         lamanie_symetrii=True,
+         pokaz=False,
+         limit_czasu=None,
+         wzgledna_luka=None,
+         formulacja="pary",
+         silnik="cp_sat",
+         heurystyka="najlepsza",
+         rozgrzewka=True,
+         etapy=3,
+         pamiec=None,
+         resztki=None,
+         material=""):
+    """
+    Główna funkcja budująca i rozwiązująca model cięcia arkuszy.
+
+    Parametry:
+      - oryginalne_arkusze: lista słowników z danymi arkuszy (wymiary, cena, id, number_of_items)
+      - dopuszczalny_podzial: bool, czy generować dodatkowe opcje arkuszy (1/2 i 1/4)
+      - grubosc_krawedzi: grubość krawędzi cięcia (mm)
+      - elementy: lista krotek (szerokość, wysokość) elementów do wycięcia
+      - guillotine_cutting: bool, czy wymuszać „gilotynowe” cięcia (True/False) – skrót
+                            dla silnik="gilotyna"
+      - lamanie_symetrii: bool, czy porządkować identyczne instancje arkuszy (domyślnie włączone)
+      - pokaz: bool, czy wyświetlać arkusze w oknach (TkAgg); domyślnie wykresy są tylko
+               zapisywane do plików, bez ekranu i w puli procesów
+      - limit_czasu: maksymalny czas pracy solvera w sekundach (None – bez limitu)
+      - wzgledna_luka: względna luka optymalności, przy której solver kończy pracę (np. 0.01)
+      - formulacja: zakaz nakładania elementów – "pary" (zmienne lewo/prawo/gora/dol dla każdej
+                    pary elementów) lub "no_overlap_2d" (opcjonalne prostokąty i AddNoOverlap2D
+                    na każdym arkuszu; zalecane dla zleceń od kilkudziesięciu elementów)
+      - silnik: "cp_sat" (model dokładny), "szybki" (heurystyka bez solvera – wynik
+                w ułamku sekundy, np. do wycen), "gilotyna" (wyłącznie cięcia gilotynowe
+                od krawędzi do krawędzi, generowanie kolumn na wzorcach etapowych) lub "lns"
+                (przeszukiwanie dużego sąsiedztwa: CP-SAT układa od nowa elementy z kilku arkuszy
+                naraz – dla zleceń od kilkudziesięciu do kilkuset elementów; limit_czasu to łączny
+                budżet, domyślnie 60 s)
+      - heurystyka: "maxrects_bssf", "maxrects_baf", "skyline", "nfdh", "ffdh" lub "najlepsza" –
+                    używana w trybie "szybki" i do rozgrzewki
+      - rozgrzewka: bool, czy przekazać wynik heurystyki do CP-SAT jako podpowiedź (AddHint)
+      - etapy: liczba etapów cięcia gilotynowego (silnik "gilotyna"): 2 – pasy z elementami
+               tej samej wysokości, 3 – elementy w pasie docinane do swojej wysokości
+      - pamiec: opcjonalna PamiecWynikow (pamiec_wynikow) – powtarzające się zlecenia, także
+                z elementami w innej kolejności, wracają z pamięci bez rozwiązywania
+      - resztki: opcjonalny MagazynResztek (magazyn_resztek) – pasujące resztki są dołączane
+                 do katalogu jako darmowe arkusze, a po rozwiązaniu zużyte resztki są usuwane
+                 z magazynu i zapisywane są nowe, odcięte z arkuszy planu
+      - material: materiał zlecenia (wybór resztek i opis nowych resztek)
+    """
+    if guillotine_cutting:
+        print("[INFO] Guillotine cutting (gilotynowe cięcie) jest WŁĄCZONE.")
+        silnik = "gilotyna"
+    else:
+        print("[INFO] Guillotine cutting (gilotynowe cięcie) jest WYŁĄCZONE.")
 
+    if resztki is not None:
+        oryginalne_arkusze = oryginalne_arkusze + resztki.arkusze_dla_zlecenia(elementy,
+                                                                               grubosc_krawedzi,
+                                                                               material)
+
+    ustawienia = dict(lamanie_symetrii=lamanie_symetrii,
+                      limit_czasu=limit_czasu,
+                      wzgledna_luka=wzgledna_luka,
+                      formulacja=formulacja,
+                      silnik=silnik,
+                      heurystyka=heurystyka,
+                      rozgrzewka=rozgrzewka,
+                      etapy=etapy)
+    if pamiec is None:
+        wynik = rozwiaz(oryginalne_arkusze, dopuszczalny_podzial, grubosc_krawedzi, elementy, **ustawienia)
+    else:
+        wynik = rozwiaz_z_pamiecia(pamiec,
+                                   rozwiaz,
+                                   oryginalne_arkusze,
+                                   dopuszczalny_podzial,
+                                   grubosc_krawedzi,
+                                   elementy,
+                                   **ustawienia)
+
+    if wynik.znaleziono:
+        wypisz_wynik(wynik)
+        if resztki is not None:
+            zuzyte = resztki.zuzyj(wynik.uklad)
+            nowe = resztki.dodaj_z_ukladu(wynik.uklad, elementy, grubosc_krawedzi, material)
+            print(f"Resztki: zużyto {len(zuzyte)}, dodano {len(nowe)}")
+
+        if pokaz:
+            # Ustawienie backendu na TkAgg – pozwala uniknąć problemów z wyświetlaniem wykresów
+            import matplotlib
+            matplotlib.use('TkAgg')
+            rysuj_arkusze(wynik.uklad, elementy)
+        else:
+            for sciezka_pliku in renderuj_arkusze(wynik.uklad, elementy, dpi=300):
+                print(f"Wykres zapisany jako: {sciezka_pliku}")
     else:
         print("Nie znaleziono rozwiązania.")
 
@@ -390,7 +789,7 @@ if __name__ == '__main__':
         },
     ]
 
-    # Czy włączyć opcję "gilotynowych" cięć (tu niezaimplementowane)
+    # Czy włączyć opcję "gilotynowych" cięć (silnik "gilotyna")
     guillotine_cutting = True
 
     # Czy generować warianty 1/2 i 1/4 arkusza
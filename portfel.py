@@ -0,0 +1,139 @@
+import dataclasses
+import queue
+import threading
+import time
+
+from rozwiazywanie import PostepRozwiazywania
+
+# ==========================
+# Konfiguracje portfela
+# ==========================
+# Każda konfiguracja to słownik z nazwą, opcjonalnymi parametrami CpSolver ("parametry_solvera")
+# i dowolnymi argumentami nazwanymi funkcji rozwiązującej (tu: planowanie_plyt.rozwiaz).
+KONFIGURACJE_PLYT = [
+    {"nazwa": "heurystyki", "silnik": "szybki"},
+    {"nazwa": "cp_sat_pary", "formulacja": "pary"},
+    {"nazwa": "cp_sat_no_overlap_2d", "formulacja": "no_overlap_2d"},
+    {"nazwa": "cp_sat_no_overlap_2d_8_watkow", "formulacja": "no_overlap_2d",
+     "parametry_solvera": {"num_workers": 8}},
+    {"nazwa": "cp_sat_pary_ziarno_1", "formulacja": "pary",
+     "parametry_solvera": {"num_workers": 1, "random_seed": 1}},
+    {"nazwa": "lns", "silnik": "lns", "formulacja": "no_overlap_2d"},
+]
+
+
+def rozwiaz_portfelem(funkcja_rozwiazujaca, *args, konfiguracje=None, limit_czasu=60.0,
+                      parametr_postepu="postep", parametr_limitu="limit_czasu", **kwargs):
+    """
+    Uruchamia kilka konfiguracji solvera naraz i zwraca najlepszy wynik.
+
+    Każda konfiguracja działa w osobnym wątku (CP-SAT zwalnia GIL na czas rozwiązywania)
+    z tym samym limitem czasu. Portfel kończy pracę, gdy któraś konfiguracja udowodni
+    optymalność, gdy najlepszy koszt spośród wszystkich konfiguracji osiągnie najlepsze
+    dolne ograniczenie z którejkolwiek z nich, albo po upływie limitu – wtedy zwraca
+    najtańsze rozwiązanie. Pozostałe konfiguracje są przerywane (PostepRozwiazywania.przerwij),
+    a ich wątki – kończone przed powrotem.
+
+    Parametry:
+      - funkcja_rozwiazujaca: np. planowanie_plyt.rozwiaz (dla stock_optimization.solve należy
+                              podać parametr_postepu="progress", parametr_limitu="time_limit"
+                              i własne konfiguracje, np. {"formulation": "no_overlap_2d"})
+      - args, kwargs: argumenty wspólne dla wszystkich konfiguracji
+      - konfiguracje: lista konfiguracji (domyślnie KONFIGURACJE_PLYT)
+      - limit_czasu: wspólny limit czasu w sekundach
+
+    Zwraca krotkę (wynik, zwyciezca, raport): Wynik najlepszej konfiguracji, jej nazwę (None,
+    jeśli żadna nie znalazła rozwiązania) oraz listę {"nazwa", "status", "koszt", "czas"}
+    dla każdej konfiguracji – do strojenia ustawień domyślnych dla klas zleceń.
+    """
+    konfiguracje = KONFIGURACJE_PLYT if konfiguracje is None else konfiguracje
+    kolejka = queue.Queue()
+    start = time.perf_counter()
+
+    postepy = []
+    watki = []
+    for numer, konfiguracja in enumerate(konfiguracje):
+        postep = PostepRozwiazywania()
+        postep.parametry = dict(konfiguracja.get("parametry_solvera", {}))
+        ustawienia = {k: v for k, v in konfiguracja.items() if k not in ("nazwa", "parametry_solvera")}
+        ustawienia.update({parametr_postepu: postep, parametr_limitu: limit_czasu})
+
+        def uruchom(numer=numer, ustawienia=ustawienia):
+            try:
+                kolejka.put((numer, funkcja_rozwiazujaca(*args, **kwargs, **ustawienia), None))
+            except Exception as blad:
+                kolejka.put((numer, None, blad))
+
+        postepy.append(postep)
+        watki.append(threading.Thread(target=uruchom, daemon=True))
+    for watek in watki:
+        watek.start()
+
+    wyniki = {}
+    bledy = {}
+    zwyciezca = None
+    while len(wyniki) + len(bledy) < len(konfiguracje):
+        pozostalo = limit_czasu - (time.perf_counter() - start)
+        if pozostalo <= 0:
+            break
+        try:
+            numer, wynik, blad = kolejka.get(timeout=min(pozostalo, 0.1))
+            if blad is not None:
+                bledy[numer] = blad
+            else:
+                wynik.czasy["portfel"] = time.perf_counter() - start
+                wyniki[numer] = wynik
+                if wynik.status == "OPTIMAL":
+                    zwyciezca = numer
+                    break
+        except queue.Empty:
+            pass
+
+        # Najlepszy koszt (także z trwających rozwiązań) i najlepsze ograniczenie ze wszystkich konfiguracji
+        koszty = [w.koszt for w in wyniki.values() if w.znaleziono]
+        koszty += [p.historia[-1]["koszt"] for p in postepy if p.historia]
+        ograniczenia = [w.ograniczenie for w in wyniki.values() if w.ograniczenie is not None]
+        ograniczenia += [z["ograniczenie"] for p in postepy for z in p.historia[-1:]]
+        if koszty and ograniczenia and min(koszty) <= max(ograniczenia) + 1e-9:
+            break
+
+    # Przerwanie pozostałych konfiguracji i zebranie ich wyników
+    for postep in postepy:
+        postep.przerwij()
+    for watek in watki:
+        watek.join()
+    while not kolejka.empty():
+        numer, wynik, blad = kolejka.get()
+        if blad is not None:
+            bledy[numer] = blad
+        else:
+            wynik.czasy["portfel"] = time.perf_counter() - start
+            wyniki[numer] = wynik
+
+    znalezione = [n for n, w in wyniki.items() if w.znaleziono]
+    if zwyciezca is None and znalezione:
+        zwyciezca = min(znalezione, key=lambda n: (wyniki[n].koszt, wyniki[n].czasy["portfel"]))
+    if zwyciezca is None and bledy and not wyniki:
+        raise next(iter(bledy.values()))
+
+    raport = [
+        {
+            "nazwa": konfiguracja["nazwa"],
+            "status": wyniki[n].status if n in wyniki else f"BLAD: {bledy[n]}",
+            "koszt": wyniki[n].koszt if n in wyniki else None,
+            "czas": wyniki[n].czasy["portfel"] if n in wyniki else None,
+        }
+        for n, konfiguracja in enumerate(konfiguracje)
+    ]
+    if zwyciezca is None:
+        wynik = next(iter(wyniki.values()))
+        return wynik, None, raport
+
+    wynik = wyniki[zwyciezca]
+    ograniczenie = max([w.ograniczenie for w in wyniki.values() if w.ograniczenie is not None], default=None)
+    if ograniczenie is not None and wynik.koszt <= ograniczenie + 1e-9:
+        # Ograniczenie z innej konfiguracji dowodzi optymalności zwycięskiego rozwiązania
+        wynik = dataclasses.replace(wynik, status="OPTIMAL", ograniczenie=ograniczenie)
+    elif ograniczenie is not None:
+        wynik = dataclasses.replace(wynik, ograniczenie=ograniczenie)
+    return wynik, konfiguracje[zwyciezca]["nazwa"], raport
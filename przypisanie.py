@@ -0,0 +1,81 @@
+from ortools.sat.python import cp_model
+
+
+def dodaj_przypisanie(model, liczba_elementow, liczba_opcji, prefiks='przypisany', prefiks_uzycia='uzyta',
+                      dozwolone=None):
+    """
+    Dodaje wspólną warstwę przypisania elementów do opcji (listew lub arkuszy).
+
+    Przypisanie opisują wyłącznie zmienne logiczne – bez całkowitej zmiennej
+    z indeksem opcji i bez par ograniczeń reifikowanych == s / != s:
+      - AddExactlyOne: każdy element trafia na dokładnie jedną opcję,
+      - przypisany[i, s] => uzyta[s]: opcja z elementem jest użyta,
+      - uzyta[s] => OR_i przypisany[i, s]: użyta opcja ma co najmniej jeden element.
+    Zamiast ograniczeń big-M (suma wskaźników <= n * uzyta) są implikacje, co daje
+    mniejszy model, szybszy presolve i mocniejszą relaksację LP.
+    Jeśli podano dozwolone, zmienne powstają tylko dla wykonalnych par (i, s).
+
+    Parametry:
+      - model: model CP-SAT
+      - liczba_elementow: liczba elementów do przypisania
+      - liczba_opcji: liczba opcji (instancji listew lub arkuszy)
+      - prefiks, prefiks_uzycia: prefiksy nazw zmiennych przypisania i użycia
+      - dozwolone: opcjonalna macierz bool [element][opcja] (np. z macierz_dopasowania)
+
+    Zwraca krotkę (wskazniki, uzyte), gdzie wskazniki to słownik
+    {(indeks_elementu, indeks_opcji): BoolVar} (bez par niedozwolonych),
+    a uzyte to lista BoolVar.
+    """
+    wskazniki = {
+        (i, s): model.NewBoolVar(f'{prefiks}_{i}_{s}')
+        for i in range(liczba_elementow)
+        for s in range(liczba_opcji)
+        if dozwolone is None or dozwolone[i][s]
+    }
+    uzyte = [model.NewBoolVar(f'{prefiks_uzycia}_{s}') for s in range(liczba_opcji)]
+
+    for i in range(liczba_elementow):
+        model.AddExactlyOne(wskazniki[(i, s)] for s in range(liczba_opcji) if (i, s) in wskazniki)
+    for s in range(liczba_opcji):
+        na_opcji = [wskazniki[(i, s)] for i in range(liczba_elementow) if (i, s) in wskazniki]
+        for wskaznik in na_opcji:
+            model.AddImplication(wskaznik, uzyte[s])
+        model.AddBoolOr(na_opcji).OnlyEnforceIf(uzyte[s])
+    return wskazniki, uzyte
+
+
+def indeksy_opcji(wskazniki, liczba_elementow, liczba_opcji):
+    """
+    Indeks opcji każdego elementu jako wyrażenie liniowe sum_s s * przypisany[i, s].
+
+    Wyrażenia nie są zmiennymi modelu – służą tylko tam, gdzie potrzebny jest
+    porządek opcji (np. porządek kopii identycznych elementów).
+    """
+    indeksy = []
+    for i in range(liczba_elementow):
+        opcje = [s for s in range(liczba_opcji) if (i, s) in wskazniki]
+        indeksy.append(cp_model.LinearExpr.WeightedSum([wskazniki[(i, s)] for s in opcje], opcje))
+    return indeksy
+
+
+def dodaj_wspolna_opcje(model, wskazniki, i, j, liczba_opcji, nazwa):
+    """
+    Zwraca BoolVar, który musi być prawdziwy, gdy elementy i oraz j leżą na tej samej opcji.
+
+    Wystarczą klauzule przypisany[i, s] AND przypisany[j, s] => wspolna – zmienna
+    włącza tylko rozdzielenie elementów, więc solver nie ma powodu ustawiać jej
+    bez potrzeby. Zwraca None, gdy elementy nie mają żadnej wspólnej dozwolonej
+    opcji – wtedy para nie potrzebuje ograniczeń rozdzielenia.
+    """
+    wspolne = [s for s in range(liczba_opcji) if (i, s) in wskazniki and (j, s) in wskazniki]
+    if not wspolne:
+        return None
+    wspolna = model.NewBoolVar(nazwa)
+    for s in wspolne:
+        model.AddBoolOr([wskazniki[(i, s)].Not(), wskazniki[(j, s)].Not(), wspolna])
+    return wspolna
+
+
+def opcja_elementu(wartosci, wskazniki, i, liczba_opcji):
+    """Indeks opcji, na którą trafił element i (z wartości solvera albo callbacku)."""
+    return next(s for s in range(liczba_opcji) if (i, s) in wskazniki and wartosci.Value(wskazniki[(i, s)]))
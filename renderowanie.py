@@ -0,0 +1,132 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Formaty obsługiwane przez renderer (backendy Agg, SVG i PDF nie wymagają ekranu)
+FORMATY = ("png", "svg", "pdf")
+
+
+def _figura(arkusz):
+    """
+    Tworzy figurę bez pyplot o proporcjach arkusza.
+
+    Stałe marginesy zamiast bbox_inches='tight' – przy 'tight' matplotlib rysuje
+    każdą figurę dwukrotnie (raz tylko po to, by zmierzyć jej zawartość).
+    """
+    from matplotlib.figure import Figure
+
+    szerokosc = 8.0
+    return Figure(figsize=(szerokosc, szerokosc * arkusz["height"] / arkusz["width"] + 0.8))
+
+
+def _rysuj_arkusz(fig, wpis, elementy, etykiety=True):
+    """
+    Rysuje jeden arkusz na podanej figurze.
+
+    Wszystkie elementy arkusza trafiają do jednej kolekcji PatchCollection,
+    więc liczba obiektów matplotlib nie rośnie z liczbą elementów (poza etykietami).
+    """
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import Rectangle
+
+    arkusz = wpis["arkusz"]
+    ax = fig.add_axes((0.08, 0.08, 0.88, 0.84))
+    ax.set_aspect('equal')
+    ax.set_title(f"Arkusz {arkusz['id']} ({arkusz['width']}x{arkusz['height']} mm)")
+    ax.set_xlim(0, arkusz["width"])
+    ax.set_ylim(0, arkusz["height"])
+    ax.set_xticks(range(0, arkusz["width"] + 1, 500))
+    ax.set_yticks(range(0, arkusz["height"] + 1, 500))
+    ax.grid(True)
+
+    # Granice arkusza i jego wymiary
+    ax.add_patch(Rectangle((0, 0), arkusz["width"], arkusz["height"],
+                           edgecolor='black', facecolor='none', lw=2))
+    ax.text(10, arkusz["height"] - 30, f"{arkusz['width']}x{arkusz['height']} mm",
+            fontsize=12, color='red', backgroundcolor='white')
+
+    prostokaty = []
+    for i, x, y, obrot in wpis["elementy"]:
+        wymiary = (elementy[i][1], elementy[i][0]) if obrot else tuple(elementy[i])
+        prostokaty.append(Rectangle((x, y), wymiary[0], wymiary[1]))
+        if etykiety:
+            ax.text(x + 5, y + 5, f"P{i} {wymiary}", color="black", fontsize=10)
+    ax.add_collection(PatchCollection(prostokaty, edgecolor='blue', facecolor='cyan', alpha=0.5))
+
+    # Linie cięć gilotynowych (układy z silnika "gilotyna"), również jedną kolekcją
+    if "drzewo_ciec" in wpis:
+        from matplotlib.collections import LineCollection
+
+        from gilotyna import lista_ciec
+
+        ciecia = lista_ciec(wpis["drzewo_ciec"])
+        ax.add_collection(LineCollection([((c["x1"], c["y1"]), (c["x2"], c["y2"])) for c in ciecia],
+                                         colors='red', linewidths=0.8, linestyles='dashed'))
+
+
+def _renderuj_paczke(zadanie):
+    """
+    Renderuje paczkę arkuszy do osobnych plików (funkcja uruchamiana w procesie roboczym).
+
+    Figury tworzone są bez pyplot, więc nie trafiają do globalnego rejestru
+    i są zwalniane zaraz po zapisie – zużycie pamięci nie rośnie z liczbą arkuszy.
+    """
+    wpisy, elementy, katalog_wykresow, format, dpi, etykiety = zadanie
+    sciezki = []
+    for wpis in wpisy:
+        fig = _figura(wpis["arkusz"])
+        _rysuj_arkusz(fig, wpis, elementy, etykiety)
+        sciezka = os.path.join(katalog_wykresow, f"arkusz_{wpis['arkusz']['id']}.{format}")
+        fig.savefig(sciezka, format=format, dpi=dpi)
+        sciezki.append(sciezka)
+    return sciezki
+
+
+def renderuj_arkusze(uklad, elementy, katalog_wykresow="wykresy", format="png", dpi=150,
+                     procesy=None, etykiety=True):
+    """
+    Zapisuje każdy użyty arkusz do osobnego pliku bez otwierania okien.
+
+    Parametry:
+      - uklad: lista słowników {"arkusz": instancja arkusza, "elementy": [(indeks, x, y, obrot), ...]}
+      - elementy: lista krotek (szerokość, wysokość) elementów do wycięcia
+      - katalog_wykresow: katalog, w którym zapisywane są pliki
+      - format: "png", "svg" lub "pdf"
+      - dpi: rozdzielczość plików rastrowych
+      - procesy: liczba procesów roboczych (None – liczba procesorów, 1 – bez puli procesów)
+      - etykiety: bool, czy podpisywać elementy
+
+    Zwraca listę ścieżek zapisanych plików w kolejności układu.
+    """
+    if format not in FORMATY:
+        raise ValueError(f"Nieobsługiwany format: {format}")
+    os.makedirs(katalog_wykresow, exist_ok=True)
+
+    procesy = min(procesy or os.cpu_count() or 1, len(uklad))
+    if procesy <= 1:
+        return _renderuj_paczke((uklad, elementy, katalog_wykresow, format, dpi, etykiety))
+
+    # Kilka paczek na proces wyrównuje obciążenie, a jednocześnie ogranicza narzut komunikacji
+    rozmiar_paczki = math.ceil(len(uklad) / (4 * procesy))
+    zadania = [
+        (uklad[p:p + rozmiar_paczki], elementy, katalog_wykresow, format, dpi, etykiety)
+        for p in range(0, len(uklad), rozmiar_paczki)
+    ]
+    with ProcessPoolExecutor(max_workers=procesy) as pula:
+        return [sciezka for sciezki in pula.map(_renderuj_paczke, zadania) for sciezka in sciezki]
+
+
+def zapisz_atlas_pdf(uklad, elementy, sciezka=os.path.join("wykresy", "atlas_arkuszy.pdf"), etykiety=True):
+    """
+    Zapisuje wszystkie użyte arkusze do jednego wielostronicowego pliku PDF (strona na arkusz).
+    Strony renderowane są po kolei, a każda figura jest zwalniana po zapisaniu strony.
+    """
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    os.makedirs(os.path.dirname(sciezka) or ".", exist_ok=True)
+    with PdfPages(sciezka) as pdf:
+        for wpis in uklad:
+            fig = _figura(wpis["arkusz"])
+            _rysuj_arkusz(fig, wpis, elementy, etykiety)
+            pdf.savefig(fig)
+    return sciezka
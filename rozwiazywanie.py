@@ -0,0 +1,120 @@
+import queue
+import threading
+
+from ortools.sat.python import cp_model
+
+
+class PostepRozwiazywania(cp_model.CpSolverSolutionCallback):
+    """
+    Callback CP-SAT zbierający kolejne, coraz lepsze rozwiązania.
+
+    Dla każdego rozwiązania zapisuje zdarzenie {"koszt", "ograniczenie", "czas"}
+    (w jednostkach ceny, po podzieleniu przez skala) w historii i – jeśli podano
+    przy_rozwiazaniu – przekazuje je dalej, np. do kolejki strumienia. Jeśli model
+    ustawi funkcję odczytaj, zdarzenie zawiera też bieżący układ ("uklad").
+    Wyszukiwanie kończy się, gdy koszt osiągnie dolne ograniczenie (jeśli jest znane).
+    Słownik parametry (np. {"num_workers": 8, "random_seed": 1}) trafia do parametrów
+    CpSolver, a podrzedny to postęp aktualnie rozwiązywanego podproblemu (np. w LNS),
+    przerywany razem z tym.
+
+    Parametry:
+      - przy_rozwiazaniu: opcjonalna funkcja wywoływana z każdym zdarzeniem
+    """
+
+    def __init__(self, przy_rozwiazaniu=None):
+        super().__init__()
+        self.przy_rozwiazaniu = przy_rozwiazaniu
+        self.ograniczenie = None
+        self.odczytaj = None
+        self.skala = 1
+        self.historia = []
+        self.status = None
+        self.solver = None
+        self.przerwano = False
+        self.parametry = {}
+        self.podrzedny = None
+
+    def on_solution_callback(self):
+        zdarzenie = {
+            "koszt": self.ObjectiveValue() / self.skala,
+            "ograniczenie": self.BestObjectiveBound() / self.skala,
+            "czas": self.WallTime(),
+        }
+        self.historia.append(dict(zdarzenie))
+        if self.przy_rozwiazaniu is not None:
+            if self.odczytaj is not None:
+                zdarzenie["uklad"] = self.odczytaj(self)
+            self.przy_rozwiazaniu(zdarzenie)
+        if self.przerwano or (self.ograniczenie is not None and self.ObjectiveValue() <= self.ograniczenie):
+            self.StopSearch()
+
+    def rozwiaz(self, model, limit_czasu=None, wzgledna_luka=None):
+        """
+        Rozwiązuje model z tym callbackiem i podanymi limitami.
+
+        Parametry:
+          - limit_czasu: maksymalny czas rozwiązywania w sekundach (None – bez limitu)
+          - wzgledna_luka: względna luka między kosztem a ograniczeniem, przy której
+                           solver kończy pracę (np. 0.01 = 1%; None – do optimum)
+
+        Po upływie limitu solver zwraca najlepsze dotąd znalezione rozwiązanie (status FEASIBLE).
+        Zwraca krotkę (solver, status).
+        """
+        self.solver = cp_model.CpSolver()
+        if limit_czasu is not None:
+            self.solver.parameters.max_time_in_seconds = limit_czasu
+        if wzgledna_luka is not None:
+            self.solver.parameters.relative_gap_limit = wzgledna_luka
+        for nazwa, wartosc in self.parametry.items():
+            setattr(self.solver.parameters, nazwa, wartosc)
+        if self.przerwano:
+            # Przerwano jeszcze przed startem solvera (np. w trakcie budowy modelu)
+            self.solver.parameters.max_time_in_seconds = 0
+        status = self.solver.Solve(model, self)
+        self.status = self.solver.StatusName(status)
+        return self.solver, status
+
+    def przerwij(self):
+        """Przerywa trwające rozwiązywanie (solver zwróci najlepsze dotąd rozwiązanie)."""
+        self.przerwano = True
+        if self.solver is not None:
+            self.solver.StopSearch()
+        if self.podrzedny is not None:
+            self.podrzedny.przerwij()
+
+
+def strumien_rozwiazan(funkcja_rozwiazujaca, *args, parametr_postepu="postep", **kwargs):
+    """
+    Generator kolejnych, coraz lepszych rozwiązań.
+
+    Uruchamia funkcja_rozwiazujaca(*args, postep=..., **kwargs) w osobnym wątku
+    (np. planowanie_plyt.rozwiaz; dla stock_optimization.solve należy podać
+    parametr_postepu="progress") i zwraca zdarzenia {"koszt", "ograniczenie", "czas", "uklad"}
+    na bieżąco, gdy solver znajduje lepsze rozwiązania. Ostatnie zdarzenie ma postać
+    {"koniec": True, "wynik": Wynik} z wynikiem końcowym (najlepszym w ramach limitów).
+    Zamknięcie generatora przed końcem przerywa rozwiązywanie.
+    """
+    kolejka = queue.Queue()
+    postep = PostepRozwiazywania(przy_rozwiazaniu=kolejka.put)
+
+    def uruchom():
+        try:
+            wynik = funkcja_rozwiazujaca(*args, **{parametr_postepu: postep}, **kwargs)
+            kolejka.put({"koniec": True, "wynik": wynik})
+        except BaseException as blad:
+            kolejka.put({"koniec": True, "blad": blad})
+
+    watek = threading.Thread(target=uruchom, daemon=True)
+    watek.start()
+    try:
+        while True:
+            zdarzenie = kolejka.get()
+            if zdarzenie.get("koniec"):
+                if "blad" in zdarzenie:
+                    raise zdarzenie["blad"]
+                yield zdarzenie
+                return
+            yield zdarzenie
+    finally:
+        postep.przerwij()
+        watek.join()
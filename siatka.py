@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+
+def nwd_wymiarow(opcje_arkuszy, elementy, grubosc_krawedzi):
+    """
+    Największy wspólny dzielnik wszystkich wymiarów arkuszy, elementów i grubości cięcia.
+
+    Podzielenie wszystkich wymiarów przez NWD nie zmienia zbioru rozwiązań,
+    a zmniejsza zakresy zmiennych położenia tyle samo razy.
+    """
+    wymiary = [grubosc_krawedzi]
+    wymiary += [wymiar for arkusz in opcje_arkuszy for wymiar in (arkusz["width"], arkusz["height"])]
+    wymiary += [wymiar for element in elementy for wymiar in element]
+    return math.gcd(*wymiary) or 1
+
+
+def punkty_normalne(elementy, grubosc_krawedzi, limit):
+    """
+    Wzorce normalne: wszystkie sumy (wymiar + rzaz) podzbiorów elementów nie większe niż limit.
+
+    Każdy element wnosi 0, swoją szerokość albo wysokość (elementy wolno obracać).
+    Każdy układ da się dosunąć w lewo i w dół tak, aby położenia elementów były
+    takimi sumami, więc ograniczenie położeń do wzorców normalnych nie pogarsza
+    rozwiązania. Zwraca tablicę bool długości limit + 1 (True – punkt osiągalny).
+    """
+    osiagalne = np.zeros(limit + 1, dtype=bool)
+    osiagalne[0] = True
+    for element in elementy:
+        nowe = osiagalne.copy()
+        for wymiar in set(element):
+            krok = wymiar + grubosc_krawedzi
+            if krok <= limit:
+                nowe[krok:] |= osiagalne[:limit + 1 - krok]
+        osiagalne = nowe
+    return osiagalne
+
+
+def punkty_rastra(normalne, pojemnosci):
+    """
+    Zredukowane punkty rastra: {<W - r> : r wzorzec normalny} dla każdej pojemności W.
+
+    <z> to największy wzorzec normalny nie większy niż z. Zbiór jest podzbiorem
+    wzorców normalnych i nadal wystarcza do znalezienia rozwiązania optymalnego;
+    przy kilku rozmiarach arkuszy bierzemy sumę zbiorów.
+    Zwraca posortowaną tablicę punktów.
+    """
+    punkty = np.flatnonzero(normalne)
+    # Dla każdego z: indeks największego punktu normalnego <= z
+    najblizszy = np.maximum.accumulate(np.where(normalne, np.arange(len(normalne)), 0))
+    raster = set()
+    for pojemnosc in set(pojemnosci):
+        reszty = pojemnosc - punkty[punkty <= pojemnosc]
+        raster.update(najblizszy[reszty].tolist())
+    return np.array(sorted(raster), dtype=np.int64)
+
+
+def dziedziny_polozen(elementy, szerokosci, wysokosci, grubosc_krawedzi, podpowiedz=None):
+    """
+    Dziedziny zmiennych położenia x i y dla każdego elementu (punkty rastra).
+
+    Parametry:
+      - elementy: lista krotek (szerokość, wysokość) – już przeskalowanych
+      - szerokosci, wysokosci: wymiary arkuszy (przeskalowane)
+      - grubosc_krawedzi: grubość cięcia (przeskalowana)
+      - podpowiedz: opcjonalny słownik {indeks_elementu: (x, y)} (przeskalowany) – położenia
+                    z rozwiązania heurystycznego, dodawane do dziedzin, aby podpowiedź
+                    dla solvera była dopuszczalna także poza punktami rastra
+
+    Zwraca krotkę (dziedziny_x, dziedziny_y) – list obiektów cp_model.Domain. Element
+    nie może zacząć się dalej niż największy arkusz minus jego mniejszy wymiar z rzazem.
+    """
+    wyniki = []
+    for wspolrzedna, pojemnosci in enumerate((szerokosci, wysokosci)):
+        limit = max(pojemnosci)
+        raster = punkty_rastra(punkty_normalne(elementy, grubosc_krawedzi, limit), pojemnosci)
+        dziedziny = []
+        for i, element in enumerate(elementy):
+            koniec = limit - min(element) - grubosc_krawedzi
+            wartosci = raster[raster <= max(koniec, 0)].tolist()
+            if podpowiedz is not None and i in podpowiedz:
+                wartosci.append(podpowiedz[i][wspolrzedna])
+            dziedziny.append(cp_model.Domain.FromValues(wartosci))
+        wyniki.append(dziedziny)
+    return tuple(wyniki)
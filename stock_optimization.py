@@ -1,10 +1,18 @@
-import matplotlib
-# Ustawienie backendu na TkAgg – powinno rozwiązać problem z 'tostring_rgb'
-matplotlib.use('TkAgg')
-
-import matplotlib.pyplot as plt
 from ortools.sat.python import cp_model
+import math
 import os
+import time
+
+from agregacja_popytu import agreguj_elementy, dodaj_liczniki_typow, dodaj_porzadek_kopii
+from dopasowanie import dodaj_wymuszone_obroty, macierz_dopasowania
+from nakladanie_2d import dodaj_no_overlap_2d
+from ograniczenia_plyt import dolne_ograniczenia
+from przypisanie import dodaj_przypisanie, dodaj_wspolna_opcje, indeksy_opcji, opcja_elementu
+from renderowanie import renderuj_arkusze
+from rozwiazywanie import PostepRozwiazywania
+from siatka import dziedziny_polozen, nwd_wymiarow
+from symetria import dodaj_lamanie_symetrii
+from wyniki import Wynik
 
 def generate_sheet_options(original_sheets, allow_splitting=True):
     """
@@ -41,57 +49,79 @@ def generate_sheet_options(original_sheets, allow_splitting=True):
             sheet_options.extend([half_width, half_height, quarter])
     return sheet_options
 
-def main():
-    # ==========================
-    # Dane wejściowe i ustawienia konfiguracyjne
-    # ==========================
-
-    # Oryginalne arkusze – przykładowe wymiary (w mm) i ceny
-    original_sheets = [
-        {"width": 2500, "height": 1250, "price": 120, "id": "sheet0"},
-        {"width": 2800, "height": 2070, "price": 180, "id": "sheet1"},
-    ]
+def solve(original_sheets, allow_splitting, cut_thickness, pieces, symmetry_breaking=True,
+          time_limit=None, relative_gap=None, progress=None, formulation="pairs"):
+    """
+    Buduje i rozwiązuje model cięcia arkuszy bez wypisywania i rysowania.
 
-    # Ustawienia konfiguracyjne
-    allow_splitting = True  # Czy dodawać arkusze podzielone (1/2 i 1/4)
-    cut_thickness = 10      # Grubość krawędzi cięcia (mm)
+    time_limit (sekundy) i relative_gap ograniczają pracę solvera; po upływie limitu
+    zwracane jest najlepsze dotąd rozwiązanie. progress to opcjonalny PostepRozwiazywania
+    (np. ze strumien_rozwiazan z parametr_postepu="progress"). formulation wybiera zakaz
+    nakładania: "pairs" (zmienne left/right/above/below dla par) lub "no_overlap_2d".
 
-    # Elementy do wycięcia (w mm): lista krotek (szerokość, wysokość)
-    pieces = [(800, 600), (1200, 600), (1000, 500), (700, 700)]
+    Zwraca obiekt Wynik, w którego układzie każdy użyty arkusz ma listę krotek
+    (indeks_elementu, x, y, obrot), oraz czasy "budowa" i "rozwiazanie".
+    Dolne ograniczenia 2D (ograniczenia_plyt) zawężają dziedzinę kosztu i kończą wyszukiwanie,
+    gdy tylko rozwiązanie je osiągnie – jest ono wtedy zwracane jako optymalne.
+    """
+    if formulation not in ("pairs", "no_overlap_2d"):
+        raise ValueError(f"Unknown formulation: {formulation}")
+    start = time.perf_counter()
 
     # Generujemy opcje arkuszy na podstawie oryginalnych arkuszy i ustawienia allow_splitting
     sheet_options = generate_sheet_options(original_sheets, allow_splitting)
     num_sheet_options = len(sheet_options)
     num_pieces = len(pieces)
 
+    # Dolne ograniczenia 2D (powierzchnia z rzazem, DFF, duże elementy) i minimalna liczba arkuszy;
+    # ograniczenia_plyt liczy koszt w groszach, a ceny są tu całkowite, więc zaokrąglamy w górę
+    bounds = dolne_ograniczenia(sheet_options, pieces, cut_thickness)
+    if bounds is None:
+        # Któryś element nie mieści się w żadnym arkuszu
+        return Wynik(status="INFEASIBLE", elementy=list(pieces),
+                     czasy={"budowa": time.perf_counter() - start, "rozwiazanie": 0.0})
+    lower_bound, min_sheets = math.ceil(bounds[0] / 100 - 1e-9), bounds[1]
+
     # ==========================
     # Budowa modelu CP-SAT
     # ==========================
     model = cp_model.CpModel()
 
     # Zmienne decyzyjne:
-    # Dla każdego elementu wybieramy arkusz (indeks w sheet_options)
-    piece_sheet = [
-        model.NewIntVar(0, num_sheet_options - 1, f'piece_sheet_{i}')
-        for i in range(num_pieces)
-    ]
+    # Wykonalne trójki (element, arkusz, obrót) z uwzględnieniem grubości cięcia
+    fits = macierz_dopasowania(pieces, sheet_options, cut_thickness)
+
+    # Dla każdego elementu wybieramy dokładnie jeden arkusz, w którym się mieści
+    # (assigned_indicator[(i, s)]), sheet_used[s] mówi, czy arkusz s został użyty
+    assigned_indicator, sheet_used = dodaj_przypisanie(model, num_pieces, num_sheet_options,
+                                                       'assigned', 'sheet_used', fits.any(axis=2))
 
     # Zmienna binarna określająca, czy element jest obrócony
     # (False: oryginalne wymiary, True: zamienione)
     rotated = [model.NewBoolVar(f'rotated_{i}') for i in range(num_pieces)]
+    dodaj_wymuszone_obroty(model, fits, pieces, assigned_indicator, rotated)
+
+    # Geometria modelu: wymiary podzielone przez ich NWD (współrzędne mnożymy z powrotem przy odczycie)
+    scale = nwd_wymiarow(sheet_options, pieces, cut_thickness)
+    model_sheets = [dict(sheet, width=sheet["width"] // scale, height=sheet["height"] // scale)
+                    for sheet in sheet_options]
+    model_pieces = [(w // scale, h // scale) for w, h in pieces]
+    kerf = cut_thickness // scale
 
     # Maksymalne wymiary spośród dostępnych arkuszy – używane przy definiowaniu zakresu współrzędnych
-    max_width = max(sheet["width"] for sheet in sheet_options)
-    max_height = max(sheet["height"] for sheet in sheet_options)
+    max_width = max(sheet["width"] for sheet in model_sheets)
+    max_height = max(sheet["height"] for sheet in model_sheets)
 
-    # Współrzędne lewego dolnego rogu elementu
-    x = [model.NewIntVar(0, max_width, f'x_{i}') for i in range(num_pieces)]
-    y = [model.NewIntVar(0, max_height, f'y_{i}') for i in range(num_pieces)]
+    # Współrzędne lewego dolnego rogu elementu – tylko w zredukowanych punktach rastra
+    x_domains, y_domains = dziedziny_polozen(model_pieces, [sheet["width"] for sheet in model_sheets],
+                                             [sheet["height"] for sheet in model_sheets], kerf)
+    x = [model.NewIntVarFromDomain(x_domains[i], f'x_{i}') for i in range(num_pieces)]
+    y = [model.NewIntVarFromDomain(y_domains[i], f'y_{i}') for i in range(num_pieces)]
 
     # Wymiary elementu – zależne od rotacji
     piece_width = []
     piece_height = []
-    for i, (w, h) in enumerate(pieces):
+    for i, (w, h) in enumerate(model_pieces):
         pw = model.NewIntVar(0, max_width, f'piece_width_{i}')
         ph = model.NewIntVar(0, max_height, f'piece_height_{i}')
         # Jeśli element nie jest obracany: szerokość = w, wysokość = h
@@ -104,126 +134,197 @@ def main():
         piece_height.append(ph)
 
     # --- Ograniczenia: element musi mieścić się w arkuszu, do którego jest przypisany ---
-    assigned_indicator = {}
-    for i in range(num_pieces):
-        for s in range(num_sheet_options):
-            # Zmienna pomocnicza – True, gdy element i został przypisany do arkusza s
-            assigned_indicator[(i, s)] = model.NewBoolVar(f'assigned_{i}_{s}')
-            model.Add(piece_sheet[i] == s).OnlyEnforceIf(assigned_indicator[(i, s)])
-            model.Add(piece_sheet[i] != s).OnlyEnforceIf(assigned_indicator[(i, s)].Not())
-            # Element (z uwzględnieniem krawędzi cięcia) musi mieścić się w arkuszu
-            sheet = sheet_options[s]
-            model.Add(x[i] + piece_width[i] + cut_thickness <= sheet["width"]).OnlyEnforceIf(assigned_indicator[(i, s)])
-            model.Add(y[i] + piece_height[i] + cut_thickness <= sheet["height"]).OnlyEnforceIf(assigned_indicator[(i, s)])
+    for (i, s), indicator in assigned_indicator.items():
+        # Element (z uwzględnieniem krawędzi cięcia) musi mieścić się w arkuszu
+        sheet = model_sheets[s]
+        model.Add(x[i] + piece_width[i] + kerf <= sheet["width"]).OnlyEnforceIf(indicator)
+        model.Add(y[i] + piece_height[i] + kerf <= sheet["height"]).OnlyEnforceIf(indicator)
+
+    # --- Agregacja popytu: identyczne elementy tworzą jeden typ (rozmiar, ilość) ---
+    piece_types = agreguj_elementy(pieces)
+    pieces_on_sheet = dodaj_liczniki_typow(model, piece_types, assigned_indicator, num_sheet_options)
+    # Kopie tego samego typu są wymienne – porządkujemy je po (arkusz, x)
+    dodaj_porzadek_kopii(model, piece_types, indeksy_opcji(assigned_indicator, num_pieces, num_sheet_options),
+                         x, max_width)
 
     # --- Ograniczenie: brak nachodzenia elementów na tym samym arkuszu ---
-    for i in range(num_pieces):
-        for j in range(i + 1, num_pieces):
-            same_sheet = model.NewBoolVar(f'same_sheet_{i}_{j}')
-            model.Add(piece_sheet[i] == piece_sheet[j]).OnlyEnforceIf(same_sheet)
-            model.Add(piece_sheet[i] != piece_sheet[j]).OnlyEnforceIf(same_sheet.Not())
-            left = model.NewBoolVar(f'left_{i}_{j}')
-            right = model.NewBoolVar(f'right_{i}_{j}')
-            above = model.NewBoolVar(f'above_{i}_{j}')
-            below = model.NewBoolVar(f'below_{i}_{j}')
-            model.Add(x[i] + piece_width[i] + cut_thickness <= x[j]).OnlyEnforceIf(left)
-            model.Add(x[j] + piece_width[j] + cut_thickness <= x[i]).OnlyEnforceIf(right)
-            model.Add(y[i] + piece_height[i] + cut_thickness <= y[j]).OnlyEnforceIf(below)
-            model.Add(y[j] + piece_height[j] + cut_thickness <= y[i]).OnlyEnforceIf(above)
-            model.AddBoolOr([left, right, above, below]).OnlyEnforceIf(same_sheet)
-
-    # --- Zmienne informujące, czy arkusz został użyty ---
-    sheet_used = []
-    for s in range(num_sheet_options):
-        used = model.NewBoolVar(f'sheet_used_{s}')
-        sheet_used.append(used)
+    if formulation == "pairs":
+        for i in range(num_pieces):
+            for j in range(i + 1, num_pieces):
+                same_sheet = dodaj_wspolna_opcje(model, assigned_indicator, i, j, num_sheet_options,
+                                                 f'same_sheet_{i}_{j}')
+                if same_sheet is None:
+                    # Elementy nie mieszczą się na żadnym wspólnym arkuszu
+                    continue
+                left = model.NewBoolVar(f'left_{i}_{j}')
+                right = model.NewBoolVar(f'right_{i}_{j}')
+                above = model.NewBoolVar(f'above_{i}_{j}')
+                below = model.NewBoolVar(f'below_{i}_{j}')
+                model.Add(x[i] + piece_width[i] + kerf <= x[j]).OnlyEnforceIf(left)
+                model.Add(x[j] + piece_width[j] + kerf <= x[i]).OnlyEnforceIf(right)
+                model.Add(y[i] + piece_height[i] + kerf <= y[j]).OnlyEnforceIf(below)
+                model.Add(y[j] + piece_height[j] + kerf <= y[i]).OnlyEnforceIf(above)
+                model.AddBoolOr([left, right, above, below]).OnlyEnforceIf(same_sheet)
+    elif formulation == "no_overlap_2d":
+        dodaj_no_overlap_2d(model, assigned_indicator, model_sheets, x, y, piece_width, piece_height,
+                            kerf, max_width, max_height)
 
-    # --- Powiązanie zmiennej sheet_used z przypisaniem elementów ---
+    # Pojemność powierzchniowa: łączne pole elementów na arkuszu nie przekracza pola arkusza
+    area_on_sheet = [
+        sum(t["rozmiar"][0] * t["rozmiar"][1] * pieces_on_sheet[(k, s)]
+            for k, t in enumerate(piece_types))
+        for s in range(num_sheet_options)
+    ]
     for s in range(num_sheet_options):
-        indicators = [assigned_indicator[(i, s)] for i in range(num_pieces)]
-        model.Add(sum(indicators) <= num_pieces * sheet_used[s])
-        model.Add(sheet_used[s] <= sum(indicators))
+        model.Add(area_on_sheet[s] <= sheet_options[s]["width"] * sheet_options[s]["height"] * sheet_used[s])
+
+    # --- Łamanie symetrii: identyczne arkusze są używane i obciążane po kolei ---
+    if symmetry_breaking:
+        dodaj_lamanie_symetrii(model, sheet_options, sheet_used, ("width", "height", "price"), area_on_sheet)
 
     # --- Cel optymalizacyjny: minimalizacja łącznego kosztu użytych arkuszy ---
-    total_cost = model.NewIntVar(0, sum(sheet["price"] for sheet in sheet_options), 'total_cost')
+    # Dziedzina kosztu zaczyna się od dolnego ograniczenia, a liczba arkuszy od minimalnej
+    max_cost = sum(sheet["price"] for sheet in sheet_options)
+    total_cost = model.NewIntVar(min(lower_bound, max_cost), max_cost, 'total_cost')
     model.Add(total_cost == sum(sheet_options[s]["price"] * sheet_used[s] for s in range(num_sheet_options)))
+    model.Add(sum(sheet_used) >= min_sheets)
     model.Minimize(total_cost)
 
     # ==========================
     # Rozwiązywanie modelu
     # ==========================
-    solver = cp_model.CpSolver()
-    status = solver.Solve(model)
+    def read_layout(values):
+        """Układ arkuszy z wartości zmiennych (solver albo callback z bieżącym rozwiązaniem)."""
+        layout = []
+        piece_sheet = [opcja_elementu(values, assigned_indicator, i, num_sheet_options) for i in range(num_pieces)]
+        for s_idx in sorted(set(piece_sheet)):
+            on_sheet = [
+                (i, values.Value(x[i]) * scale, values.Value(y[i]) * scale, bool(values.Value(rotated[i])))
+                for i in range(num_pieces)
+                if piece_sheet[i] == s_idx
+            ]
+            layout.append({"arkusz": sheet_options[s_idx], "elementy": on_sheet})
+        return layout
 
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        print("Znaleziono rozwiązanie!")
-        for i in range(num_pieces):
-            s_idx = solver.Value(piece_sheet[i])
-            sheet = sheet_options[s_idx]
-            rot = solver.Value(rotated[i])
-            # Ustalamy wymiary wyświetlane w etykiecie – jeśli obrót, zamieniamy wymiary
+    build_time = time.perf_counter() - start
+    if progress is None:
+        progress = PostepRozwiazywania()
+    progress.odczytaj = read_layout
+    # Wyszukiwanie kończy się, gdy tylko koszt rozwiązania osiągnie dolne ograniczenie
+    progress.ograniczenie = lower_bound
+    solver, status = progress.rozwiaz(model, time_limit, relative_gap)
+    timings = {"budowa": build_time, "rozwiazanie": solver.WallTime()}
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return Wynik(status=solver.StatusName(status), elementy=list(pieces), czasy=timings)
+
+    # Koszt równy dolnemu ograniczeniu dowodzi optymalności także po przerwaniu wyszukiwania
+    cost = solver.Value(total_cost)
+    bound = max(lower_bound, solver.BestObjectiveBound())
+    return Wynik(status="OPTIMAL" if cost <= bound else solver.StatusName(status), koszt=cost,
+                 uklad=read_layout(solver), elementy=list(pieces), czasy=timings, ograniczenie=bound,
+                 historia=progress.historia)
+
+def print_result(result):
+    """Wypisuje położenie elementów na arkuszach oraz łączny koszt."""
+    print("Znaleziono rozwiązanie!")
+    placements = {}
+    for entry in result.uklad:
+        for i, px, py, rot in entry["elementy"]:
+            placements[i] = (entry["arkusz"], px, py, rot)
+    for i in sorted(placements):
+        sheet, px, py, rot = placements[i]
+        print(f"Element {i} o wymiarach {result.elementy[i]} (obrót: {rot}) "
+              f"umieszczony na arkuszu {sheet['id']} "
+              f"({sheet['width']}x{sheet['height']} mm) w pozycji ({px}, {py})")
+    print("Łączny koszt:", result.koszt)
+
+def plot_sheets(layout, pieces, output_dir="wykresy", show=True):
+    """
+    Rysuje każdy użyty arkusz na osobnym wykresie i zapisuje go do pliku PNG.
+    Parametr show decyduje, czy wykres jest dodatkowo wyświetlany (plt.show).
+    """
+    # matplotlib importowany dopiero tutaj, aby samo rozwiązywanie go nie wymagało
+    import matplotlib.pyplot as plt
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    for entry in layout:
+        sheet = entry["arkusz"]
+        fig, ax = plt.subplots()
+        ax.set_title(f'Arkusz {sheet["id"]} ({sheet["width"]}x{sheet["height"]} mm)')
+        ax.set_xlim(0, sheet["width"])
+        ax.set_ylim(0, sheet["height"])
+        ax.set_xticks(range(0, sheet["width"] + 1, 500))
+        ax.set_yticks(range(0, sheet["height"] + 1, 500))
+        ax.grid(True)
+
+        # Rysowanie granic arkusza
+        ax.add_patch(plt.Rectangle((0, 0), sheet["width"], sheet["height"],
+                                   edgecolor='black', facecolor='none', lw=2))
+        # Dodanie tekstu z rozmiarami arkusza
+        ax.text(10, sheet["height"] - 30, f'{sheet["width"]}x{sheet["height"]} mm',
+                fontsize=12, color='red', backgroundcolor='white')
+
+        # Rysowanie elementów wraz z etykietą zawierającą wymiary
+        for i, rx, ry, rot in entry["elementy"]:
+            # Ustalanie wymiarów: jeśli obrót, zamieniamy wymiary
             if rot:
                 dims = (pieces[i][1], pieces[i][0])
             else:
                 dims = pieces[i]
-            print(f"Element {i} o wymiarach {pieces[i]} (obrót: {bool(rot)}) "
-                  f"umieszczony na arkuszu {sheet['id']} "
-                  f"({sheet['width']}x{sheet['height']} mm) w pozycji ({solver.Value(x[i])}, {solver.Value(y[i])})")
-        print("Łączny koszt:", solver.Value(total_cost))
-
-        # ==========================
-        # Wizualizacja i zapis wykresów
-        # ==========================
-        output_dir = "wykresy"
-        os.makedirs(output_dir, exist_ok=True)
-
-        used_sheet_indices = {solver.Value(piece_sheet[i]) for i in range(num_pieces)}
-        for s_idx in used_sheet_indices:
-            sheet = sheet_options[s_idx]
-            fig, ax = plt.subplots()
-            ax.set_title(f'Arkusz {sheet["id"]} ({sheet["width"]}x{sheet["height"]} mm)')
-            ax.set_xlim(0, sheet["width"])
-            ax.set_ylim(0, sheet["height"])
-            ax.set_xticks(range(0, sheet["width"] + 1, 500))
-            ax.set_yticks(range(0, sheet["height"] + 1, 500))
-            ax.grid(True)
-
-            # Rysowanie granic arkusza
-            ax.add_patch(plt.Rectangle((0, 0), sheet["width"], sheet["height"],
-                                       edgecolor='black', facecolor='none', lw=2))
-            # Dodanie tekstu z rozmiarami arkusza
-            ax.text(10, sheet["height"] - 30, f'{sheet["width"]}x{sheet["height"]} mm',
-                    fontsize=12, color='red', backgroundcolor='white')
-
-            # Rysowanie elementów wraz z etykietą zawierającą wymiary
-            for i in range(num_pieces):
-                if solver.Value(piece_sheet[i]) == s_idx:
-                    rx = solver.Value(x[i])
-                    ry = solver.Value(y[i])
-                    rw = solver.Value(piece_width[i])
-                    rh = solver.Value(piece_height[i])
-                    rect = plt.Rectangle(
-                        (rx, ry),
-                        rw,
-                        rh,
-                        edgecolor='blue', facecolor='cyan', alpha=0.5
-                    )
-                    ax.add_patch(rect)
-
-                    # Ustalanie etykiety: jeśli obrót, zamieniamy wymiary
-                    if solver.Value(rotated[i]):
-                        dims = (pieces[i][1], pieces[i][0])
-                    else:
-                        dims = pieces[i]
-                    label = f"P{i} {dims}"
-
-                    ax.text(rx + 5, ry + 5, label, color="black", fontsize=10)
-
-            # Zapis wykresu do pliku PNG
-            filename = os.path.join(output_dir, f"arkusz_{sheet['id']}.png")
-            fig.savefig(filename, dpi=300, bbox_inches='tight')
-            print(f'Wykres arkusza {sheet["id"]} zapisany jako: {filename}')
+            rect = plt.Rectangle(
+                (rx, ry),
+                dims[0],
+                dims[1],
+                edgecolor='blue', facecolor='cyan', alpha=0.5
+            )
+            ax.add_patch(rect)
+
+            label = f"P{i} {dims}"
+            ax.text(rx + 5, ry + 5, label, color="black", fontsize=10)
+
+        # Zapis wykresu do pliku PNG
+        filename = os.path.join(output_dir, f"arkusz_{sheet['id']}.png")
+        fig.savefig(filename, dpi=300, bbox_inches='tight')
+        print(f'Wykres arkusza {sheet["id"]} zapisany jako: {filename}')
+        if show:
             plt.show()
+        plt.close(fig)
+
+def main(symmetry_breaking=True, show=False, time_limit=None, relative_gap=None, formulation="pairs"):
+    # ==========================
+    # Dane wejściowe i ustawienia konfiguracyjne
+    # ==========================
+
+    # Oryginalne arkusze – przykładowe wymiary (w mm) i ceny
+    original_sheets = [
+        {"width": 2500, "height": 1250, "price": 120, "id": "sheet0"},
+        {"width": 2800, "height": 2070, "price": 180, "id": "sheet1"},
+    ]
+
+    # Ustawienia konfiguracyjne
+    allow_splitting = True  # Czy dodawać arkusze podzielone (1/2 i 1/4)
+    cut_thickness = 10      # Grubość krawędzi cięcia (mm)
+
+    # Elementy do wycięcia (w mm): lista krotek (szerokość, wysokość)
+    pieces = [(800, 600), (1200, 600), (1000, 500), (700, 700)]
+
+    result = solve(original_sheets, allow_splitting, cut_thickness, pieces, symmetry_breaking,
+                   time_limit, relative_gap, formulation=formulation)
+
+    if result.znaleziono:
+        print_result(result)
+
+        if show:
+            # Ustawienie backendu na TkAgg – powinno rozwiązać problem z 'tostring_rgb'
+            import matplotlib
+            matplotlib.use('TkAgg')
+            plot_sheets(result.uklad, pieces)
+        else:
+            # Zapis bez ekranu (Agg), arkusze renderowane w puli procesów
+            for filename in renderuj_arkusze(result.uklad, pieces, dpi=300):
+                print(f'Wykres zapisany jako: {filename}')
     else:
         print("Nie znaleziono rozwiązania.")
 
@@ -0,0 +1,35 @@
+def grupy_identycznych_opcji(opcje, klucze):
+    """
+    Grupuje indeksy opcji (listew lub arkuszy), które są nierozróżnialne dla modelu.
+
+    Dwie opcje są identyczne, jeśli mają te same wartości pod wszystkimi kluczami
+    (np. "length" i "price" dla listew, "width", "height" i "price" dla arkuszy).
+    Zwraca listę grup (list indeksów) mających co najmniej dwa elementy.
+    """
+    grupy = {}
+    for s, opcja in enumerate(opcje):
+        grupy.setdefault(tuple(opcja[k] for k in klucze), []).append(s)
+    return [grupa for grupa in grupy.values() if len(grupa) > 1]
+
+
+def dodaj_lamanie_symetrii(model, opcje, uzyte, klucze, obciazenie=None):
+    """
+    Dodaje ograniczenia łamiące symetrię między identycznymi instancjami opcji.
+
+    Instancje powstałe z tej samej pozycji katalogu (albo o tych samych wymiarach
+    i cenie) można dowolnie permutować, więc bez straty optymalności wymagamy:
+      - uzyte[a] >= uzyte[b] dla kolejnych instancji a < b (najpierw używamy wcześniejszych),
+      - obciazenie[a] >= obciazenie[b] (wcześniejsza instancja jest co najmniej tak samo obciążona).
+
+    Parametry:
+      - model: model CP-SAT
+      - opcje: lista słowników z opcjami (listwy lub arkusze)
+      - uzyte: lista BoolVar mówiących, czy opcja jest użyta
+      - klucze: klucze słownika opcji decydujące o identyczności
+      - obciazenie: opcjonalna lista wyrażeń liniowych (np. suma długości lub pól elementów na opcji)
+    """
+    for grupa in grupy_identycznych_opcji(opcje, klucze):
+        for a, b in zip(grupa, grupa[1:]):
+            model.AddImplication(uzyte[b], uzyte[a])
+            if obciazenie is not None:
+                model.Add(obciazenie[a] >= obciazenie[b])
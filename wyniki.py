@@ -0,0 +1,40 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Wynik:
+    """
+    Wynik rozwiązania zlecenia cięcia, niezależny od wypisywania i rysowania.
+
+    Pola:
+      - status: nazwa statusu ("OPTIMAL", "FEASIBLE", "INFEASIBLE", "UNKNOWN", ...)
+      - koszt: łączny koszt użytych listew/arkuszy albo None, gdy nie ma rozwiązania
+      - uklad: lista słowników – dla listew {"listwa": instancja, "elementy": [(indeks, pozycja), ...]},
+               dla arkuszy {"arkusz": instancja, "elementy": [(indeks, x, y, obrot), ...]}
+               (silnik "gilotyna" dodaje klucz "drzewo_ciec" z drzewem cięć arkusza)
+      - elementy: wymiary elementów z zamówienia (indeksy w ukladzie odnoszą się do tej listy)
+      - czasy: czasy kolejnych etapów w sekundach, np. {"budowa": ..., "rozwiazanie": ...}
+      - ograniczenie: dolne ograniczenie kosztu znane po zakończeniu rozwiązywania (jeśli jest)
+      - historia: kolejne, coraz lepsze rozwiązania solvera jako {"koszt", "ograniczenie", "czas"}
+    """
+    status: str
+    koszt: float | None = None
+    uklad: list = field(default_factory=list)
+    elementy: list = field(default_factory=list)
+    czasy: dict = field(default_factory=dict)
+    ograniczenie: float | None = None
+    historia: list = field(default_factory=list)
+
+    @property
+    def znaleziono(self):
+        """Czy wynik zawiera rozwiązanie (optymalne lub dopuszczalne)."""
+        return self.status in ("OPTIMAL", "FEASIBLE")
+
+    @property
+    def przypisanie(self):
+        """Słownik {indeks_elementu: id instancji listwy/arkusza}."""
+        return {
+            wpis_elementu[0]: (wpis.get("listwa") or wpis.get("arkusz"))["id"]
+            for wpis in self.uklad
+            for wpis_elementu in wpis["elementy"]
+        }